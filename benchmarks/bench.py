@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Throughput and peak memory benchmarks for the pyblux read and write paths.
+
+    python benchmarks/bench.py --rows 10000,100000 --widths 4,16 --chunksizes 10000,100000 --output results.json
+    python benchmarks/bench.py --output new.json --baseline results.json --tolerance 0.15
+
+SQLite runs on a temporary database file. Postgres runs when --postgres (or PYBLUX_BENCH_POSTGRES) gives a psycopg2 dsn,
+e.g. a local container: docker run -e POSTGRES_PASSWORD=bench -p 5432:5432 postgres
+    --postgres "host=localhost port=5432 dbname=postgres user=postgres password=bench"
+"""
+import os, sys, json, time, argparse, platform, statistics, tempfile, tracemalloc, datetime
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyblux.blux import Blux
+from pyblux import metrics
+from pyblux.utils import create_table_text, create_table_from_dataframe, drop_table, is_exist
+
+# column dtypes cycled through the generated dataframe
+_DTYPES = {
+    'int':      lambda rng, rows: rng.integers(0, 1000000, rows),
+    'float':    lambda rng, rows: rng.random(rows) * 1000,
+    'str':      lambda rng, rows: pd.Series(rng.integers(0, 100000, rows)).map('value_{:06d}'.format).to_numpy(dtype=object),
+    'datetime': lambda rng, rows: pd.Timestamp('2021-01-01') + pd.to_timedelta(rng.integers(0, 10 ** 8, rows), unit='s'),
+    'bool':     lambda rng, rows: rng.random(rows) < 0.5,
+}
+_MIXES = {'mixed': ['int', 'float', 'str', 'datetime', 'bool'], 'numeric': ['int', 'float'], 'text': ['str']}
+
+
+def make_frame(rows:int, width:int, mix:str='mixed', seed:int=0):
+    """
+    - make_frame(rows, width, mix, seed)
+    - Returns (pd.DataFrame): rows x width frame whose columns cycle through the dtypes of the mix
+    """
+    rng = np.random.default_rng(seed)
+    kinds = _MIXES[mix]
+    return pd.DataFrame({'c{}_{}'.format(i, kinds[i % len(kinds)]): _DTYPES[kinds[i % len(kinds)]](rng, rows) for i in range(width)})
+
+
+def connect(dialect:str, postgres:str=None, directory:str=None):
+    if dialect == 'sqlite':
+        import sqlite3
+        return sqlite3.connect(os.path.join(directory, 'bench.db'), check_same_thread=False)
+    import psycopg2
+    return psycopg2.connect(postgres)
+
+
+def measure(func, repeat:int=3, memory:bool=True):
+    """
+    - measure(func, repeat, memory)
+    - Runs func repeat times for timing, then once more under tracemalloc for the peak allocation
+    - Returns (dict): min and median seconds, peak MB (None when memory=False)
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        finally:
+            tracemalloc.stop()
+    return {'seconds_min': min(seconds), 'seconds_median': statistics.median(seconds), 'peak_mb': peak}
+
+
+def run(dialects:list, rows_list:list, widths:list, chunksizes:list, mixes:list, repeat:int=3, memory:bool=True, postgres:str=None, log=print):
+    """
+    - run(dialects, rows_list, widths, chunksizes, mixes, repeat, memory, postgres)
+    - Returns (list): one result dict per case: load, extract and stream per chunksize, create_table_from_dataframe and is_exist
+    """
+    results = []
+    collector = metrics.register_hook(metrics.MemoryCollector())
+    try:
+        with tempfile.TemporaryDirectory(prefix='pyblux_bench_') as directory:
+            for dialect in dialects:
+                conn = connect(dialect, postgres, directory)
+                blux = Blux(engine=conn, dialect=dialect)
+                try:
+                    for rows in rows_list:
+                        for width in widths:
+                            for mix in mixes:
+                                frame = make_frame(rows, width, mix)
+                                case = {'dialect': dialect, 'rows': rows, 'width': width, 'mix': mix}
+                                results += _run_case(blux, frame, case, chunksizes, repeat, memory, collector, log)
+                    results.append(_is_exist_case(blux, dialect, repeat, collector, log))
+                finally:
+                    conn.close()
+    finally:
+        metrics.remove_hook(collector)
+    return results
+
+
+def _result(name:str, case:dict, timing:dict, rows:int, collector, operation:str, chunksize:int=None):
+    records = collector.records(operation)
+    phases = records[-1]['phases'] if records else {}
+    collector.clear()
+    return dict(case, name=name, chunksize=chunksize, **timing, rows_per_sec=rows / timing['seconds_min'] if timing['seconds_min'] else None,
+                phases={k: round(v, 6) for k, v in phases.items()})
+
+
+def _run_case(blux:Blux, frame:pd.DataFrame, case:dict, chunksizes:list, repeat:int, memory:bool, collector, log):
+    results = []
+    table = 'bench_{}x{}_{}'.format(case['rows'], case['width'], case['mix'])
+    ddl = create_table_text(frame, table, dialect=blux.dialect)
+    for chunksize in chunksizes:
+        def load():
+            drop_table(table=table, Blux=blux)
+            blux.sql(query=ddl)
+            blux.sql(dataframe=frame, table=table, chunksize=chunksize)
+        timing = measure(load, repeat, memory)
+        results.append(_result('load', case, timing, len(frame), collector, 'load', chunksize))
+        log(_line(results[-1]))
+
+        def stream():
+            for chunk in blux.sql(query="select * from {}".format(table), chunksize=chunksize, stream=True):
+                pass
+        timing = measure(stream, repeat, memory)
+        results.append(_result('stream', case, timing, len(frame), collector, 'iter_sql', chunksize))
+        log(_line(results[-1]))
+
+    timing = measure(lambda: blux.sql(query="select * from {}".format(table)), repeat, memory)
+    results.append(_result('extract', case, timing, len(frame), collector, 'sql'))
+    log(_line(results[-1]))
+
+    timing = measure(lambda: create_table_from_dataframe(dataframe=frame, table=table, Blux=blux, chunksize=max(chunksizes)), repeat, memory)
+    results.append(_result('create_table_from_dataframe', case, timing, len(frame), collector, 'load', max(chunksizes)))
+    log(_line(results[-1]))
+    drop_table(table=table, Blux=blux)
+    return results
+
+
+def _is_exist_case(blux:Blux, dialect:str, repeat:int, collector, log, calls:int=100):
+    blux.sql(query="create table bench_exists (id integer)")
+    try:
+        timing = measure(lambda: [is_exist(table='bench_exists', Blux=blux) for _ in range(calls)], repeat, memory=False)
+    finally:
+        drop_table(table='bench_exists', Blux=blux)
+    result = _result('is_exist', {'dialect': dialect, 'rows': calls, 'width': None, 'mix': None}, timing, calls, collector, 'is_exist')
+    log(_line(result))
+    return result
+
+
+def _key(result:dict):
+    return (result['name'], result['dialect'], result['rows'], result['width'], result['mix'], result['chunksize'])
+
+
+def _line(result:dict):
+    peak = ' peak {:8.1f} MB'.format(result['peak_mb']) if result.get('peak_mb') is not None else ''
+    return '{:<28} {:<8} rows={:<8} width={:<4} mix={:<8} chunksize={:<8} {:8.3f}s {:>12,.0f} rows/s{}'.format(
+        result['name'], result['dialect'], result['rows'], str(result['width']), str(result['mix']), str(result['chunksize']),
+        result['seconds_min'], result['rows_per_sec'] or 0, peak)
+
+
+def compare(results:list, baseline:list, tolerance:float=0.10, log=print):
+    """
+    - compare(results, baseline, tolerance)
+    - Returns (list): cases whose best time is more than tolerance slower than the baseline
+    """
+    previous = {_key(r): r for r in baseline}
+    regressions = []
+    for result in results:
+        base = previous.get(_key(result))
+        if base is None:
+            continue
+        ratio = result['seconds_min'] / base['seconds_min'] if base['seconds_min'] else 1.0
+        flag = 'REGRESSION' if ratio > 1 + tolerance else ('faster' if ratio < 1 - tolerance else '')
+        log('{:<28} {:<8} rows={:<8} width={:<4} chunksize={:<8} {:6.2f}x baseline {}'.format(
+            result['name'], result['dialect'], result['rows'], str(result['width']), str(result['chunksize']), ratio, flag))
+        if ratio > 1 + tolerance:
+            regressions.append(dict(result, baseline_seconds=base['seconds_min'], ratio=ratio))
+    return regressions
+
+
+def _ints(text:str):
+    return [int(v) for v in text.split(',') if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='pyblux read/write benchmarks')
+    parser.add_argument('--rows', default='10000,100000', help='comma separated row counts')
+    parser.add_argument('--widths', default='4,16', help='comma separated column counts')
+    parser.add_argument('--chunksizes', default='10000,100000', help='comma separated chunksize values')
+    parser.add_argument('--mixes', default='mixed', help='comma separated dtype mixes: ' + ', '.join(_MIXES))
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case, the best is kept')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run per case')
+    parser.add_argument('--postgres', default=os.environ.get('PYBLUX_BENCH_POSTGRES'), help='psycopg2 dsn of a local postgres')
+    parser.add_argument('--output', default=None, help='write results to this JSON file')
+    parser.add_argument('--baseline', default=None, help='compare against a previous JSON results file')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='slowdown ratio over the baseline reported as a regression')
+    args = parser.parse_args(argv)
+
+    dialects = ['sqlite'] + (['postgres'] if args.postgres else [])
+    results = run(dialects, _ints(args.rows), _ints(args.widths), _ints(args.chunksizes), args.mixes.split(','),
+                  repeat=args.repeat, memory=not args.no_memory, postgres=args.postgres)
+    meta = {'created': datetime.datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+            'platform': platform.platform(), 'pandas': pd.__version__, 'numpy': np.__version__, 'repeat': args.repeat}
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'meta': meta, 'results': results}, output, indent=2, default=str)
+        print('Results written to {}'.format(args.output))
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline)['results'], args.tolerance)
+        if regressions:
+            print('{} regression(s) over {:.0%}'.format(len(regressions), args.tolerance))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# coding: utf-8
+"""
+Import-time budget check: importing pyblux must not load pandas, SQLAlchemy, requests, smtplib or a database driver,
+and must stay under the budget in a fresh interpreter.
+
+    python benchmarks/import_budget.py --budget-ms 150
+"""
+import os, sys, json, argparse, subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules that must only load on first use
+HEAVY = ['pandas', 'numpy', 'sqlalchemy', 'requests', 'smtplib', 'pyarrow', 'psycopg2', 'pymysql', 'cx_Oracle',
+         'teradatasql', 'teradatasqlalchemy', 'pyodbc', 'asyncpg', 'aiomysql', 'aiosqlite']
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {modules}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(modules:list, runs:int=5):
+    """
+    - measure(modules, runs)
+    - Returns (dict): best import time in seconds over runs fresh interpreters, and the heavy modules they loaded
+    """
+    code = _PROBE.format(modules=', '.join(modules), heavy=HEAVY)
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return {'seconds': min(r['seconds'] for r in results), 'loaded': sorted({m for r in results for m in r['loaded']})}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='pyblux import-time budget')
+    parser.add_argument('--modules', default='pyblux,pyblux.utils,pyblux.logger', help='comma separated modules to import')
+    parser.add_argument('--budget-ms', type=float, default=150.0, help='maximum import time in milliseconds')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters, the best time is kept')
+    args = parser.parse_args(argv)
+    result = measure(args.modules.split(','), args.runs)
+    print('import {}: {:.1f} ms (budget {:.0f} ms)'.format(args.modules, result['seconds'] * 1000, args.budget_ms))
+    failed = False
+    if result['loaded']:
+        print('loaded at import time: {}'.format(', '.join(result['loaded'])))
+        failed = True
+    if result['seconds'] * 1000 > args.budget_ms:
+        print('over budget')
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
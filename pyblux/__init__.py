@@ -0,0 +1,41 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+import importlib
+
+# public names and their modules, imported on first access so `import pyblux` stays cheap
+_EXPORTS = {
+    'Blux': 'pyblux.blux',
+    'AsyncBlux': 'pyblux.asyncblux',
+    'Logger': 'pyblux.logger',
+    'ResultCache': 'pyblux.cache',
+    'get_engine': 'pyblux.utils',
+    'get_connection': 'pyblux.utils',
+    'dispose_engines': 'pyblux.utils',
+    'is_exist': 'pyblux.utils',
+    'is_exist_many': 'pyblux.utils',
+    'drop_table': 'pyblux.utils',
+    'create_table_text': 'pyblux.utils',
+    'create_table_from_dataframe': 'pyblux.utils',
+    'merge_dataframe': 'pyblux.utils',
+    'register_dialect': 'pyblux.dialects',
+    'register_loader': 'pyblux.loaders',
+    'RejectedRowsError': 'pyblux.loaders',
+    'MailSender': 'pyblux.mail',
+    'transfer': 'pyblux.transfer',
+    'export': 'pyblux.export',
+    'LoadError': 'pyblux.checkpoint',
+    'FileCheckpoint': 'pyblux.checkpoint',
+    'TableCheckpoint': 'pyblux.checkpoint',
+}
+
+
+def __getattr__(name:str):
+    if name not in _EXPORTS:
+        raise AttributeError("module 'pyblux' has no attribute '{}'".format(name))
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_EXPORTS))
@@ -0,0 +1,25 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+import types, importlib
+
+
+class LazyModule(types.ModuleType):
+    """
+    Module placeholder that imports the real module on first attribute access:
+    >>> pd = LazyModule('pandas')
+    >>> pd.DataFrame   # pandas is imported here
+    """
+
+    def __init__(self, name:str):
+        super().__init__(name)
+
+    def __getattr__(self, attr:str):
+        # import_module waits for a first import running on another thread, where sys.modules holds a partial module
+        module = importlib.import_module(self.__name__)
+        # later lookups hit the copied attributes without going through __getattr__
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+pandas = LazyModule('pandas')
+numpy = LazyModule('numpy')
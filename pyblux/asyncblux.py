@@ -0,0 +1,383 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+import time, asyncio, decimal, functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pyblux._lazy import pandas as pd
+from typing import Callable
+from pyblux.blux import Blux
+from pyblux.columnar import fetch_arrow, fetch_numpy
+from pyblux.loaders import records, report
+from pyblux.params import bind
+from pyblux.utils import exists_query, get_engine
+
+# native asyncio drivers, recognised from the module of the pool or connection handed to AsyncBlux
+_DRIVERS = ('asyncpg', 'aiomysql', 'aiosqlite')
+
+
+class _Rows:
+    """
+    Fetched rows behind the cursor interface pyblux.columnar reads (description and fetchmany).
+    """
+
+    def __init__(self, description, rows:list):
+        self.description = description
+        self._rows = rows
+        self._offset = 0
+
+    def fetchmany(self, size:int):
+        rows = self._rows[self._offset:self._offset + size]
+        self._offset += len(rows)
+        return rows
+
+
+async def _raising(future):
+    # Blux exits the process on failure, which must not happen inside an event loop: the coroutine raises instead
+    try:
+        return await future
+    except SystemExit as e:
+        raise RuntimeError(str(e)) from None
+
+
+def _driver(engine):
+    module = type(engine).__module__.split('.')[0]
+    return module if module in _DRIVERS else None
+
+
+class AsyncBlux:
+    """
+    This class runs pyblux operations from asyncio code, with at most max_concurrency of them in flight.
+    Postgres, MySQL and SQLite run on their asyncio drivers (asyncpg, aiomysql, aiosqlite); the other dialects
+    run the blocking Blux on a bounded thread pool. Failures raise the driver's exception, or RuntimeError for
+    the dialects run on Blux, instead of exiting the process:
+    >>> blux = await AsyncBlux.connect(dialect='postgres', user='etl', password='...', host='localhost', port=5432, database='mydata', pool_size=10)
+    >>> frames = await asyncio.gather(*[blux.sql(query=q) for q in queries])
+    >>> await blux.close()
+    """
+
+    def __init__(self, engine=None, dialect=None, max_concurrency:int=10):
+        """
+        Args:
+            engine: asyncpg pool, aiomysql pool or aiosqlite connection; otherwise a Blux, or an engine for Blux
+                (get_engine(raw_engine=False, pool_size=...) lets the thread pool use max_concurrency sessions)
+            dialect (str): database system name(postgres, oracle, teradata,...)
+            max_concurrency (int): operations allowed in flight at once, keep it at or below the pool size
+        Note: Database Connection package must be installed in order to use this backend.
+        """
+        self._driver = _driver(engine)
+        self._dialect = dialect
+        self.engine = engine
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+        self._blux = None
+        self._executor = None
+        if self._driver is None:
+            self._blux = engine if isinstance(engine, Blux) else Blux(engine=engine, dialect=dialect)
+            # a bare DBAPI connection must not be shared between threads
+            workers = max_concurrency if hasattr(self._blux.engine, 'raw_connection') else 1
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pyblux')
+
+    @property
+    def dialect(self):
+        return self._dialect
+
+    @classmethod
+    async def connect(cls, dialect:str, user:str=None, password:str=None, host:str=None, port:int=None, database:str=None,
+                      pool_size:int=10, max_concurrency:int=None, **options):
+        """
+        - connect(dialect, user, password, host, port, database, pool_size, max_concurrency)
+        - Opens an asyncpg/aiomysql pool of pool_size connections, an aiosqlite connection to the database file,
+          or a pooled engine (get_engine) for dialects without an asyncio driver
+        - Returns (AsyncBlux)
+        """
+        if dialect == 'postgres':
+            import asyncpg
+            engine = await asyncpg.create_pool(user=user, password=password, host=host, port=port, database=database,
+                                               min_size=1, max_size=pool_size, **options)
+        elif dialect == 'mysql':
+            import aiomysql
+            engine = await aiomysql.create_pool(user=user, password=password, host=host, port=port, db=database,
+                                                minsize=1, maxsize=pool_size, **options)
+        elif dialect == 'sqlite':
+            import aiosqlite
+            engine = await aiosqlite.connect(database, **options)
+        else:
+            engine = get_engine(user=user, password=password, host=host, port=port, database=database, dialect=dialect,
+                                raw_engine=False, pool_size=pool_size)
+        return cls(engine=engine, dialect=dialect, max_concurrency=max_concurrency or pool_size)
+
+    async def close(self):
+        """
+        Close the pool or connection and the thread pool.
+        """
+        if self._driver == 'aiomysql':
+            self.engine.close()
+            await self.engine.wait_closed()
+        elif self._driver is not None:
+            await self.engine.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def sql(self, query:str=None, dataframe:pd.DataFrame='', table:str=None, chunksize:int=100000, verbose:bool=False, logger:Callable=print,
+                  stream:bool=False, output:str='pandas', binary:bool=False, mode:str='insert', sessions:int=1, params=None, prepare:bool=True,
+                  checkpoint=None, load_id:str=None, commit_every:int=1, transform=None, transform_workers:int=0, max_in_flight:int=None):
+        """
+            Same arguments and results as Blux.sql, awaited:
+            >>> df = await blux.sql(query="select * from flights where origin = :origin", params={'origin': 'ATL'})
+            >>> await blux.sql(dataframe=final, table=table, chunksize=100000)
+            With stream=True the result is an async generator of dataframes of at most chunksize rows:
+            >>> async for chunk in await blux.sql(query=query, chunksize=100000, stream=True):
+            ...     process(chunk)
+            checkpoint and transform run on the wrapped Blux: the asyncio drivers (asyncpg, aiomysql, aiosqlite) raise ValueError.
+        """
+        if self._driver is not None and (checkpoint is not None or transform is not None):
+            raise ValueError("checkpoint and transform are not supported with {}, use AsyncBlux(engine=Blux(...))".format(self._driver))
+        if query != None and stream and not (len(dataframe)>0 and table!=None):
+            return self.iter_sql(query=query, chunksize=chunksize, verbose=verbose, logger=logger, params=params, transform=transform,
+                                 transform_workers=transform_workers, max_in_flight=max_in_flight)
+        if self._driver is None:
+            return await self.__run(self._blux.sql, query=query, dataframe=dataframe, table=table, chunksize=chunksize, verbose=verbose,
+                                    logger=logger, output=output, binary=binary, mode=mode, sessions=sessions, params=params, prepare=prepare,
+                                    checkpoint=checkpoint, load_id=load_id, commit_every=commit_every, transform=transform,
+                                    transform_workers=transform_workers, max_in_flight=max_in_flight)
+        if len(dataframe)>0 and table!=None:
+            await self.__bulk_load(dataframe=dataframe, table=table, chunksize=chunksize, verbose=verbose, logger=logger)
+        elif query != None:
+            return await self.__sql(query=query, verbose=verbose, logger=logger, output=output, chunksize=chunksize, params=params)
+
+    async def iter_sql(self, query:str, chunksize:int=100000, verbose:bool=False, logger:Callable=print, params=None, transform=None,
+                       transform_workers:int=0, max_in_flight:int=None):
+        """
+            Run a SQL query and yield the result as dataframes of at most chunksize rows:
+            >>> async for chunk in blux.iter_sql(query=query, chunksize=100000):
+            ...     chunk.to_csv(output, mode='a', header=False)
+            transform is applied by the wrapped Blux (see Blux.iter_sql), the asyncio drivers raise ValueError.
+        """
+        if self._driver is not None and transform is not None:
+            raise ValueError("transform is not supported with {}, use AsyncBlux(engine=Blux(...))".format(self._driver))
+        if self._driver is None:
+            # one thread owns the generator and its session for the whole stream
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                with ThreadPoolExecutor(max_workers=1, thread_name_prefix='pyblux') as executor:
+                    chunks = self._blux.iter_sql(query=query, chunksize=chunksize, verbose=verbose, logger=logger, params=params,
+                                                 transform=transform, transform_workers=transform_workers, max_in_flight=max_in_flight)
+                    while True:
+                        data = await _raising(loop.run_in_executor(executor, next, chunks, None))
+                        if data is None:
+                            break
+                        yield data
+            return
+        total=0
+        if verbose:
+            logger("Attempting to stream sql query...{}".format(query))
+        async with self.__acquire() as conn:
+            try:
+                async for rows, col_names in self.__fetch_chunks(conn, query, params, chunksize):
+                    total += len(rows)
+                    if verbose:
+                        logger("\n Return chunk -- # of records-->:  {}".format(total))
+                    yield pd.DataFrame(rows, columns=col_names)
+                if verbose:
+                    logger("Completed streaming sql query -- # of records-->:  {}".format(total))
+            except Exception as e:
+                if verbose:
+                    logger("### Exception ### \n {}".format(str(e).split("\n")[0]))
+                raise
+
+    async def is_exist(self, table:str='', verbose:bool=False, logger:Callable=print):
+        """
+        Check if table exist, same catalog queries as pyblux.utils.is_exist
+        Returns
+        -------
+        boolean Object
+        """
+        if self._driver is None:
+            from pyblux.utils import is_exist
+            return await self.__run(is_exist, table=table, Blux=self._blux, verbose=verbose, logger=logger)
+        if verbose:
+            logger('Check if the table or view {} Exists in the database......'.format(table))
+        query, params = exists_query(table, self._dialect)
+        df = await self.sql(query=query, params=params, verbose=verbose, logger=logger)
+        if verbose:
+            logger(' Table or view {} {} in database {}......result-->{}'.format(table, 'Does not Exists' if df.empty else 'Already Exists',
+                                                                                 params['database'], not df.empty))
+        return not df.empty
+
+    async def drop_table(self, table:str=None, verbose:bool=False, logger:Callable=print):
+        """
+        Drop table when it exists.
+        """
+        if verbose:
+            logger("\nAttempting to drop table {}....\n".format(table))
+        if await self.is_exist(table=table, verbose=verbose, logger=logger):
+            await self.sql(query="""DROP TABLE {};""".format(table), verbose=verbose, logger=logger)
+        elif verbose:
+            logger("\n Table {} doesn't exist....\n".format(table))
+        if verbose:
+            logger("\nDone with drop table {}....\n".format(table))
+
+    async def __run(self, func:Callable, **kwargs):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await _raising(loop.run_in_executor(self._executor, functools.partial(func, **kwargs)))
+
+    @asynccontextmanager
+    async def __acquire(self):
+        async with self._semaphore:
+            if self._driver == 'aiosqlite':
+                # one sqlite connection: keep each operation's statements and commit together
+                async with self._lock:
+                    yield self.engine
+            else:
+                async with self.engine.acquire() as conn:
+                    yield conn
+
+    async def __sql(self, query:str, verbose:bool=False, logger:Callable=print, output:str='pandas', chunksize:int=100000, params=None):
+        if verbose:
+            logger("Attempting to run sql query...{}".format(query))
+        async with self.__acquire() as conn:
+            try:
+                description, data = await self.__execute(conn, query, params)
+                if description and output in ('arrow', 'numpy'):
+                    fetch = fetch_arrow if output == 'arrow' else fetch_numpy
+                    data = fetch(_Rows(description, data), chunksize=chunksize, dialect=self._dialect)
+                    if verbose:
+                        logger("\n Return {} -- # of records-->:  {}".format(output, len(data)))
+                    return data
+                if description:
+                    if verbose:
+                        logger("\n Return dataframe -- # of records-->:  {}".format(len(data)))
+                    col_names = [desc[0].lower() for desc in description]
+                    if verbose:
+                        logger("\n Return dataframe -- Column Names-->:  {}".format(col_names))
+                    return pd.DataFrame(data, columns=col_names)
+                if verbose:
+                    logger("Completed cursor execution for sql query...")
+            except Exception as e:
+                if verbose:
+                    logger("### Exception ### \n {}".format(str(e).split("\n")[0]))
+                if self._driver != 'asyncpg':
+                    await conn.rollback()
+                raise
+
+    async def __execute(self, conn, query:str, params=None):
+        """
+            Execute query with bound params; returns the cursor description (None without a result set) and the rows.
+        """
+        if self._driver == 'asyncpg':
+            text, values = bind(query, params, style='dollar')
+            if isinstance(values, list):
+                await conn.executemany(text, values)
+                return None, None
+            if params is None and ';' in query.strip().rstrip(';'):
+                # scripts cannot be prepared, they run as a simple query without a result set
+                await conn.execute(query)
+                return None, None
+            # asyncpg prepares and caches the statement on the connection
+            statement = await conn.prepare(text)
+            rows = await statement.fetch(*(values or ()))
+            attributes = statement.get_attributes()
+            if not attributes:
+                return None, None
+            return [(a.name, a.type.oid) for a in attributes], [tuple(row) for row in rows]
+        text, values = bind(query, params, style='pyformat' if self._driver == 'aiomysql' else 'qmark')
+        cur = await conn.cursor()
+        try:
+            if isinstance(values, list):
+                await cur.executemany(text, values)
+            elif values is not None:
+                await cur.execute(text, values)
+            else:
+                await cur.execute(text)
+            rows = await cur.fetchall() if cur.description else None
+            description = cur.description
+        finally:
+            await cur.close()
+        await conn.commit()
+        return description, rows
+
+    async def __fetch_chunks(self, conn, query:str, params, chunksize:int):
+        if self._driver == 'asyncpg':
+            text, values = bind(query, params, style='dollar')
+            # asyncpg cursors live inside a transaction and fetch chunksize rows per round trip
+            async with conn.transaction():
+                cur = await conn.cursor(text, *(values or ()))
+                col_names = None
+                while True:
+                    rows = await cur.fetch(chunksize)
+                    if not rows:
+                        break
+                    col_names = col_names or list(rows[0].keys())
+                    yield [tuple(row) for row in rows], [name.lower() for name in col_names]
+            return
+        text, values = bind(query, params, style='pyformat' if self._driver == 'aiomysql' else 'qmark')
+        if self._driver == 'aiomysql':
+            import aiomysql
+            # unbuffered cursor: rows stay on the server until fetched
+            cur = await conn.cursor(aiomysql.SSCursor)
+        else:
+            cur = await conn.cursor()
+        try:
+            await cur.execute(text, values) if values is not None else await cur.execute(text)
+            col_names = [desc[0].lower() for desc in cur.description] if cur.description else []
+            while True:
+                rows = await cur.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield rows, col_names
+        finally:
+            await cur.close()
+
+    async def __bulk_load(self, dataframe:pd.DataFrame, table:str, chunksize:int=100000, verbose:bool=False, logger:Callable=print):
+        start = time.perf_counter()
+        rows = 0
+        if verbose:
+            logger("Attempting to load data with {}...".format(self._driver))
+        async with self.__acquire() as conn:
+            try:
+                if self._driver == 'asyncpg':
+                    schema, name = table.split('.') if '.' in table else (None, table)
+                    columns = [str(c).lower() for c in dataframe.columns]
+                    # binary COPY of python values, all chunks in one transaction
+                    async with conn.transaction():
+                        for i in range(0, len(dataframe), chunksize):
+                            chunk = dataframe.iloc[i:i+chunksize]
+                            await conn.copy_records_to_table(name, records=records(chunk, native_bool=True), columns=columns, schema_name=schema)
+                            rows += len(chunk)
+                            if verbose:
+                                report(logger, table, rows, start)
+                else:
+                    marker = '%s' if self._driver == 'aiomysql' else '?'
+                    insert_str = "INSERT INTO {} VALUES ({})".format(table, ", ".join([marker] * dataframe.shape[1]))
+                    cur = await conn.cursor()
+                    try:
+                        for i in range(0, len(dataframe), chunksize):
+                            chunk = dataframe.iloc[i:i+chunksize]
+                            values = records(chunk)
+                            if self._driver == 'aiosqlite':
+                                # sqlite3 cannot bind Decimal
+                                values = [tuple(float(v) if isinstance(v, decimal.Decimal) else v for v in row) for row in values]
+                            # aiomysql rewrites the batch into multi-row INSERT statements
+                            await cur.executemany(insert_str, values)
+                            rows += len(chunk)
+                            if verbose:
+                                report(logger, table, rows, start)
+                    finally:
+                        await cur.close()
+                    await conn.commit()
+                if verbose:
+                    report(logger, table, rows, start, final=True)
+            except Exception as e:
+                if verbose:
+                    logger("### Exception ### \n {}".format(str(e).split("\n")[0]))
+                if self._driver != 'asyncpg':
+                    await conn.rollback()
+                raise
@@ -1,23 +1,40 @@
 #!/bin/python
 # -*- coding: utf-8 -*-
-import os, sys, io
-import pandas as pd
+from __future__ import annotations
+import os, sys, io, time, uuid
+from contextlib import contextmanager
+from pyblux._lazy import pandas as pd
 from typing import AnyStr, Callable
+from pyblux.columnar import fetch_arrow, fetch_numpy, arrow_types, arrow_batch, conform_batch, widen_schema
+from pyblux.loaders import get_loader
+from pyblux.partition import read_partitioned
+from pyblux.cache import query_tables, is_cacheable
+from pyblux.catalog import Catalog
+from pyblux.params import bind, PARAMSTYLES, StatementCache
+from pyblux import metrics
+from pyblux.logger import enabled
+from pyblux.checkpoint import LoadError, checkpoint_store
+from pyblux.transform import transform_chunks
  
 class Blux:
     """
     This class connects to a local database session using the db `dialect` library.
     """
 
-    def __init__(self, engine=None,dialect=None):
+    def __init__(self, engine=None,dialect=None,cache=None,catalog_ttl:float=None):
         """
         Args:
             engine (str): Database connection engine.
             dialect (str): database system name(postgres, oracle, teradata,...)
+            cache (ResultCache): optional pyblux.cache.ResultCache reused for repeated queries
+            catalog_ttl (float): when set, is_exist/drop_table answer from a catalog cache refreshed after catalog_ttl seconds
         Note: Database Connection package must be installed in order to use this backend.
         """
         self.engine = engine
         self._dialect = dialect
+        self.cache = cache
+        self._statements = StatementCache()
+        self.catalog = Catalog(self, ttl=catalog_ttl) if catalog_ttl else None
 
         self.__errlimit = 1
         self.__warnings = []
@@ -28,130 +45,404 @@ class Blux:
     def dialect(self):
         return self._dialect
 
-    def  sql(self,query:str=None,dataframe:pd.DataFrame='',table:str=None, chunksize:int=100000, verbose:bool=False, logger:Callable=print):
+    def  sql(self,query:str=None,dataframe:pd.DataFrame='',table:str=None, chunksize:int=100000, verbose:bool=False, logger:Callable=print, stream:bool=False, output:str='pandas', binary:bool=False,
+             mode:str='insert', sessions:int=1, params=None, prepare:bool=True, checkpoint=None, load_id:str=None, commit_every:int=1,
+             transform=None, transform_workers:int=0, max_in_flight:int=None):
         """
             Run SQL Queries using connection from self:
             >>> blux= Blux(engine=engine, dialect ='postgres')
             >>> blux.sql(dataframe=final,table=table, chunksize=100000)
+            With stream=True a query returns a generator of dataframes of at most chunksize rows:
+            >>> for chunk in blux.sql(query=query, chunksize=100000, stream=True):
+            ...     process(chunk)
+            output='arrow' returns a pyarrow.Table and output='numpy' a typed dataframe, both built
+            column by column from cur.description instead of an object dtype dataframe of row tuples:
+            >>> blux.sql(query=query, output='arrow')
+            params binds values instead of formatting them into the SQL text: a dict for :name placeholders, a tuple for ?
+            placeholders, or a list of either to run executemany. Placeholders are rewritten to the driver paramstyle and, with
+            prepare=True, the statement is prepared once per connection and reused:
+            >>> blux.sql(query="select * from flights where origin = :origin", params={'origin': 'ATL'})
+            Dataframe loads use the bulk loader registered for the dialect in pyblux.loaders (COPY for postgres,
+            fast_executemany for mssql, LOAD DATA for mysql, array DML for oracle, batched executemany for sqlite),
+            chunksize rows at a time; binary=True uses the postgres binary COPY format.
+            On teradata mode='fastload' loads an empty table with FastLoad, and sessions=n spreads a mode='insert'
+            load over n pooled sessions:
+            >>> blux.sql(dataframe=final, table=table, chunksize=100000, mode='fastload')
+            With a cache, query results are reused until they expire or a write through this Blux touches their tables.
+            With a checkpoint the load is resumable and raises pyblux.checkpoint.LoadError instead of exiting (see Blux.load).
+            transform applies a function, or a list of them, to each chunk as it is fetched or loaded (see pyblux.transform);
+            transform_workers=n runs it on n processes, keeping chunk order with at most max_in_flight chunks submitted:
+            >>> blux.sql(query=query, transform=[Clean(), Ascii(['city']), Cast({'amount': 'float64'})], transform_workers=4)
+            Transformed query results are streamed with iter_sql and concatenated, and are not cached. Transformed loads
+            commit every commit_every chunks, each group spread over sessions on teradata.
         """
-        stdout,schema,name='','',''
-        if ( len(dataframe)>0 and table!=None and self._dialect=='teradata'):
-            with self.engine.cursor() as cur:
-                # Turn autocommit off
-                request_str = "{fn teradata_nativesql}{fn teradata_autocommit_off}"
-                if verbose:
-                    logger("Autocommit turned off \n")
-                cur.execute(request_str)
-                cur.fast_executemany = True
-                if verbose:
-                    logger("Attempting to load data...")
-                    logger("columns: {}".format(dataframe.columns))
-                    logger("dataframe---> Len= {}".format(len(dataframe)))
+        if ( len(dataframe)>0 and table!=None and checkpoint is not None):
+            return self.load(dataframe=dataframe, table=table, chunksize=chunksize, checkpoint=checkpoint, load_id=load_id, commit_every=commit_every,
+                             transform=transform, transform_workers=transform_workers, max_in_flight=max_in_flight,
+                             verbose=verbose, logger=logger, binary=binary, mode=mode)
+        elif ( len(dataframe)>0 and table!=None and transform is not None):
+            try:
+                return self.load(dataframe=dataframe, table=table, chunksize=chunksize, commit_every=commit_every, transform=transform,
+                                 transform_workers=transform_workers, max_in_flight=max_in_flight, verbose=verbose, logger=logger,
+                                 binary=binary, mode=mode, sessions=sessions)
+            except LoadError as e:
+                stdout = str(e).split("\n")[0] + "\n"
+            if verbose:
+                sys.exit("### Exception ### \n {}".format(stdout))
+            sys.exit("### Exception - hint: verbose=True to have error details###")
+        elif ( len(dataframe)>0 and table!=None):
+            if self.cache is not None:
+                self.cache.invalidate(table)
+            with metrics.operation('load', dialect=self._dialect, table=table) as op:
+                with self.connection() as conn:
+                    self.__bulk_load(conn, dataframe=dataframe, table=table, chunksize=chunksize, verbose=verbose, logger=logger,
+                                     binary=binary, mode=mode, sessions=sessions)
+                op.rows = len(dataframe)
+                op.bytes = op.bytes or int(dataframe.memory_usage(index=False).sum())
+        elif query != None and stream:
+            return self.iter_sql(query=query, chunksize=chunksize, verbose=verbose, logger=logger, params=params,
+                                 output='arrow' if output == 'arrow' else 'pandas', transform=transform,
+                                 transform_workers=transform_workers, max_in_flight=max_in_flight)
+        elif query != None and transform is not None:
+            frames = list(self.iter_sql(query=query, chunksize=chunksize, verbose=verbose, logger=logger, params=params, transform=transform,
+                                        transform_workers=transform_workers, max_in_flight=max_in_flight))
+            return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        elif query != None:
+            with metrics.operation('sql', dialect=self._dialect) as op:
+                if self.cache is not None and is_cacheable(query, self._dialect):
+                    data = self.__cached_sql(query=query, verbose=verbose, logger=logger, output=output, chunksize=chunksize, params=params, prepare=prepare)
+                else:
+                    with self.connection() as conn:
+                        data = self.__sql(conn, query=query, verbose=verbose, logger=logger, output=output, chunksize=chunksize, params=params, prepare=prepare)
+                    if self.cache is not None:
+                        # writes, including INSERT/UPDATE ... RETURNING, change the tables they touch
+                        for name in query_tables(query, write=True):
+                            self.cache.invalidate(name)
+                if data is not None:
+                    op.rows = len(data)
+                    op.bytes = int(data.memory_usage(index=False).sum()) if isinstance(data, pd.DataFrame) else int(getattr(data, 'nbytes', 0))
+            if data is None and self.catalog is not None:
+                self.catalog.note(query)
+            return data
+
+    def  __cached_sql(self, query:str, verbose:bool=False, logger:Callable=print, output:str='pandas', chunksize:int=100000, params=None, prepare:bool=True):
+        log = verbose and enabled(logger)
+        key = self.cache.key(query, params=params, namespace='{}:{}'.format(self._dialect, getattr(self.engine, 'url', id(self.engine))), output=output)
+        data = self.cache.get(key)
+        metrics.current().labels['cache'] = 'hit' if data is not None else 'miss'
+        if data is not None:
+            if log:
+                logger("Returning cached result for sql query...{}".format(query))
+            return data
+        with self.connection() as conn:
+            data = self.__sql(conn, query=query, verbose=verbose, logger=logger, output=output, chunksize=chunksize, params=params, prepare=prepare)
+        if data is not None:
+            self.cache.put(key, data, tables=query_tables(query))
+        return data
+
+    def  sql_partitioned(self, query:str, column:str, partitions:int=4, bounds:list=None, scheme:str='range', workers:int=None,
+                         executor:str='thread', stream:bool=False, verbose:bool=False, logger:Callable=print):
+        """
+            Split a query on a partition column and run the slices concurrently, each on its own session.
+            scheme='range' uses explicit bounds or partitions evenly spaced slices between MIN and MAX of the column,
+            scheme='hash' uses the column modulo partitions. Needs a pooled engine:
+            >>> blux = Blux(engine=get_engine(..., raw_engine=False, pool_size=8), dialect='postgres')
+            >>> blux.sql_partitioned(query="select * from sales", column='sale_id', partitions=8)
+        """
+        return read_partitioned(self, query=query, column=column, partitions=partitions, bounds=bounds, scheme=scheme, workers=workers,
+                                executor=executor, stream=stream, verbose=verbose, logger=logger)
+
+    @contextmanager
+    def  connection(self):
+        """
+            Borrow a DBAPI connection for one operation.
+            When engine is a pooled SQLAlchemy engine (get_engine(raw_engine=False, pool_size=...)) the connection is
+            checked out of the pool and returned to it afterwards, so threads can share one Blux:
+            >>> with blux.connection() as conn:
+            ...     conn.cursor().execute(query)
+        """
+        if hasattr(self.engine, 'raw_connection'):
+            with metrics.phase('connect'):
+                conn = self.engine.raw_connection()
+            try:
+                yield conn
+            finally:
+                conn.close()
+        else:
+            yield self.engine
+
+    def  load(self, dataframe:pd.DataFrame, table:str, chunksize:int=100000, checkpoint=None, load_id:str=None, commit_every:int=1,
+              transform=None, transform_workers:int=0, max_in_flight:int=None, verbose:bool=False, logger:Callable=print, **options):
+        """
+            Bulk load a dataframe and raise on failure instead of exiting the process.
+            With a checkpoint (a state file path, FileCheckpoint or TableCheckpoint) the rows are loaded and committed
+            commit_every chunks at a time, the committed row offset is recorded under load_id (the table name by default)
+            after each commit, and a rerun of the same load resumes after the last committed group:
+            >>> try:
+            ...     blux.load(dataframe=final, table='flights', chunksize=100000, commit_every=10, checkpoint='/var/lib/etl/flights.state')
+            ... except LoadError as e:
+            ...     alert(e)   # rows before e.offset are in the table; run again to resume
+            A checkpoint recorded for a dataframe of another length raises ValueError instead of resuming.
+            The checkpoint is cleared when the load completes. Teradata sessions are not used with a checkpoint, and
+            mode='fastload' (which needs an empty table) is committed as one group.
+            With a transform each group is transformed before it is loaded, on transform_workers processes when set
+            (see pyblux.transform.transform_chunks); without a checkpoint the groups are then commit_every chunks too.
+            - Returns (int): rows loaded by this call
+        """
+        log = verbose and enabled(logger)
+        if self.cache is not None:
+            self.cache.invalidate(table)
+        store = checkpoint_store(checkpoint) if checkpoint is not None else None
+        load_id = load_id or table
+        offset = store.get(load_id) if store is not None else 0
+        total = store.total(load_id) if offset and hasattr(store, 'total') else None
+        if total is not None and total != len(dataframe):
+            # offsets of another dataframe would skip or repeat rows of this one
+            raise ValueError("Checkpoint {} was recorded for {} rows but the dataframe has {}: clear it or use another load_id".format(
+                load_id, total, len(dataframe)))
+        step = max(1, len(dataframe) if (store is None and transform is None) or options.get('mode') == 'fastload' else chunksize * max(1, commit_every))
+        if store is not None:
+            options.pop('sessions', None)
+            if log and offset:
+                logger("Resuming load {} into {} after {} committed records...".format(load_id, table, offset))
+        loaded = 0
+        with metrics.operation('load', dialect=self._dialect, table=table) as op:
+            starts = range(offset, len(dataframe), step)
+            parts = (dataframe.iloc[start:start+step] for start in starts)
+            if transform is not None:
+                parts = transform_chunks(parts, transform, workers=transform_workers, max_in_flight=max_in_flight)
+            for start, part in zip(starts, self.__guard(parts, table, load_id, offset, step)):
                 try:
-                    for i in range(0, len(dataframe), chunksize):
-                        chunk = dataframe[i:i+chunksize]                        
-                        insert_str = "INSERT INTO {} ({})".format(table,str("?, " * dataframe.shape[1]).rstrip(", "))
-                        cur.executemany(insert_str, chunk)
-                        if verbose:
-                            logger("{} records attempted.".format(str(i+len(chunk))))
-                            
-                        request_str = "{fn teradata_nativesql}{fn teradata_get_warnings}" + "ERRLIMIT {};".format(self.__errlimit) + insert_str
-                        cur.execute(request_str)
-                        warn = cur.fetchall()
-                        self.__warnings += warn
-                            
-                        request_str = "{fn teradata_nativesql}{fn teradata_get_errors}" + insert_str
-                        cur.execute(request_str)
-                        err = cur.fetchall()
-                        self.__errors += err
-                        if '' not in self.__errors[0]:
-                            if verbose:
-                                logger(self.__errors[0][0].split(' Batched')[0])
-                            request_str = "{fn teradata_nativesql}{fn teradata_logon_sequence_number}" + insert_str
-                            cur.execute(request_str)
-                            lsn = cur.fetchall()
-                            self.__logons += lsn
-                    
-                    flat_warnings = [item for sublist in self.__warnings for item in sublist]
-                    flat_errors = [item for sublist in self.__errors for item in sublist]
-                    if verbose:
-                        if len("".join(flat_warnings)) > 0 or len("".join(flat_errors)) > 0:
-                            logger("\n Warnings or errors detected. \n")
-                            logger("\n Warnings: {}\n".format(flat_warnings))
-                            logger("\n Errors: {} \n".format(flat_warnings))
-                        else:
-                            logger("\nFinished. No warnings or errors detected. \n")
+                    with self.connection() as conn:
+                        self.__load(conn, dataframe=part, table=table, chunksize=chunksize, verbose=log, logger=logger, **options)
                 except Exception as e:
-                    stdout = str(e).split("\n")[0] + "\n"
-                    if verbose:
-                        logger("### Exception ### \n {}".format(stdout))
-                if len(stdout)>0 and verbose:
-                    sys.exit("### Exception ### \n {}".format(stdout))
-                elif len(stdout)>0:
-                    sys.exit("### Exception - hint: verbose=True to have error details###")
-        
-        elif ( len(dataframe)>0 and table != None and self._dialect != 'teradata'):
+                    if log:
+                        logger("### Exception ### \n {}".format(str(e).split("\n")[0]))
+                    metrics.fail(str(e).split("\n")[0])
+                    raise LoadError(table, load_id, start, e) from e
+                loaded += len(part)
+                # offsets count source rows, a transform may drop or add rows
+                committed = min(start + step, len(dataframe))
+                if store is not None:
+                    store.set(load_id, committed, len(dataframe))
+                    if log:
+                        logger("Checkpoint {} -- # of records committed-->:  {}".format(load_id, committed))
+            if store is not None:
+                store.clear(load_id)
+            op.rows = loaded
+            op.bytes = op.bytes or int(dataframe.memory_usage(index=False).sum())
+        return loaded
+
+    def  __guard(self, parts, table:str, load_id:str, offset:int, step:int):
+        # a failing transform is reported like a failing load, at the offset of its group
+        start = offset
+        iterator = iter(parts)
+        while True:
             try:
-                output = io.StringIO()
-                dataframe.to_csv(output, sep='\t', header=False, index=False)
-                cur=self.engine.cursor()
-                output.seek(0)
-                contents = output.getvalue()
-                if '.' in table:
-                    schema, name = table.split('.')[0], table.split('.')[1]
-                    cur.execute("SET search_path TO {};".format(schema))
-                    self.engine.commit()
-                    cur.copy_from(output,name, null="")
-                else:
-                    cur.copy_from(output,table, null="")
-                self.engine.commit()
+                part = next(iterator)
+            except StopIteration:
+                return
+            except Exception as e:
+                metrics.fail(str(e).split("\n")[0])
+                raise LoadError(table, load_id, start, e) from e
+            yield part
+            start += step
+
+    def  __load(self, conn, dataframe:pd.DataFrame, table:str, chunksize:int=100000, verbose:bool=False, logger:Callable=print, **options):
+        loader = get_loader(self._dialect)
+        if verbose:
+            logger("Attempting to load data with {}...".format(loader.__name__))
+        if self._dialect == 'teradata':
+            options.update(errlimit=self.__errlimit, warnings=self.__warnings, errors=self.__errors, logons=self.__logons,
+                           connection=self.connection if hasattr(self.engine, 'raw_connection') else None)
+        try:
+            loader(conn, dataframe=dataframe, table=table, chunksize=chunksize, verbose=verbose, logger=logger, **options)
+        except Exception:
+            conn.rollback()
+            raise
+        if verbose:
+            logger("Completed cursor execution for sql alchemy engine query...")
+
+    def  __bulk_load(self, conn, dataframe:pd.DataFrame, table:str, chunksize:int=100000, verbose:bool=False, logger:Callable=print, **options):
+        log = verbose and enabled(logger)
+        stdout=''
+        try:
+            self.__load(conn, dataframe=dataframe, table=table, chunksize=chunksize, verbose=log, logger=logger, **options)
+        except Exception as e:
+            stdout = str(e).split("\n")[0] + "\n"
+            if log:
+                logger("### Exception ### \n {}".format(stdout))
+            metrics.fail(stdout)
+        if len(stdout)>0 and verbose:
+             sys.exit("### Exception ### \n {}".format(stdout))
+        elif len(stdout)>0:
+            sys.exit("### Exception - hint: verbose=True to have error details###")
+
+    def  iter_sql(self, query:str, chunksize:int=100000, verbose:bool=False, logger:Callable=print, params=None, output:str='pandas',
+                  transform=None, transform_workers:int=0, max_in_flight:int=None):
+        """
+            Run a SQL query and yield the result as dataframes of at most chunksize rows.
+            Rows are pulled with fetchmany so only one chunk is held in memory at a time:
+            >>> for chunk in blux.iter_sql(query=query, chunksize=100000):
+            ...     chunk.to_csv(output, mode='a', header=False)
+            output='arrow' yields pyarrow.RecordBatch objects typed from cur.description instead of dataframes; a column
+            the driver does not type is inferred from the values, so its type may widen in a later batch (int64 to
+            float64, null to the type of the first value).
+            transform is applied to each chunk before it is yielded, on transform_workers processes when set, in order:
+            >>> for chunk in blux.iter_sql(query=query, transform=[Clean(), HashColumns(name='row_hash')], transform_workers=4):
+            ...     load(chunk)
+        """
+        chunks = self.__iter_chunks(query=query, chunksize=chunksize, verbose=verbose, logger=logger, params=params, output=output)
+        if transform is None:
+            return chunks
+        return transform_chunks(chunks, transform, workers=transform_workers, max_in_flight=max_in_flight)
+
+    def  __iter_chunks(self, query:str, chunksize:int=100000, verbose:bool=False, logger:Callable=print, params=None, output:str='pandas'):
+        log = verbose and enabled(logger)
+        stdout=''
+        col_names=None
+        schema=None
+        total=0
+        cur=None
+        # the generator is suspended between chunks, so its operation is timed without becoming the thread's current one
+        op = metrics.operation('iter_sql', dialect=self._dialect)
+        if log:
+            logger("Attempting to stream sql query...{}".format(query))
+        start = time.perf_counter()
+        with self.connection() as conn:
+            op.phases['connect'] = time.perf_counter() - start
+            try:
+                cur=self.__stream_cursor(conn, chunksize)
+                with op.phase('execute'):
+                    if params is not None:
+                        cur.execute(*bind(query, params, style=PARAMSTYLES.get(self._dialect, 'qmark')))
+                    else:
+                        cur.execute(query)
+                while True:
+                    fetched = time.perf_counter()
+                    with op.phase('fetch'):
+                        data = cur.fetchmany(chunksize)
+                    if not data:
+                        break
+                    if col_names is None:
+                        # server-side cursors only describe the result after the first fetch
+                        col_names = [desc[0].lower() for desc in cur.description]
+                        if output == 'arrow':
+                            kinds, types = arrow_types(cur.description, self._dialect)
+                    total += len(data)
+                    if log:
+                        logger("\n Return chunk -- # of records-->:  {}".format(total))
+                    with op.phase('dataframe'):
+                        if output == 'arrow':
+                            frame = arrow_batch(data, col_names, kinds, types)
+                            # untyped columns are inferred per chunk: a later chunk may widen the schema, never truncate
+                            schema = frame.schema if schema is None else widen_schema(schema, frame.schema)
+                            frame = conform_batch(frame, schema)
+                        else:
+                            frame = pd.DataFrame(data, columns=col_names)
+                    # time to fetch and build the chunk, not the time the consumer holds it
+                    op.chunk(len(data), seconds=time.perf_counter() - fetched)
+                    if op.name:
+                        op.bytes += frame.nbytes if output == 'arrow' else int(frame.memory_usage(index=False).sum())
+                    del data
+                    yield frame
                 cur.close()
-                if verbose:
-                    logger("Completed cursor execution for sql alchemy engine query...")   
+                with op.phase('commit'):
+                    conn.commit()
+                if log:
+                    logger("Completed streaming sql query -- # of records-->:  {}".format(total))
             except Exception as e:
                 stdout = str(e).split("\n")[0] + "\n"
-                if verbose:
+                if log:
                     logger("### Exception ### \n {}".format(stdout))
-                cur.execute("ROLLBACK")
-                cur.close()
-            if len(stdout)>0 and verbose:
-                 sys.exit("### Exception ### \n {}".format(stdout))
-            elif len(stdout)>0:
-                sys.exit("### Exception - hint: verbose=True to have error details###")
-                
-        elif query != None:
-            return self.__sql(query=query, verbose=verbose, logger=logger) 
+                conn.rollback()
+                if cur is not None:
+                    cur.close()
+        op.rows = total
+        op.finish(error=stdout.strip() or None)
+        if len(stdout)>0 and verbose:
+            sys.exit("### Exception ### \n {}".format(stdout))
+        elif len(stdout)>0:
+            sys.exit("### Exception - hint: verbose=True to have error details###")
+
+    def  __stream_cursor(self, conn, chunksize:int):
+        """
+            Open a cursor that keeps the result on the server side where the driver supports it.
+        """
+        if self._dialect == 'postgres':
+            # psycopg2 named cursor: rows stay on the server until fetched
+            cur = conn.cursor(name='pyblux_{}'.format(uuid.uuid4().hex))
+            cur.itersize = chunksize
+        else:
+            cur = conn.cursor()
+            # cx_Oracle and teradatasql fetch arraysize rows per round trip
+            cur.arraysize = chunksize
+        return cur
              
-    def  __sql(self, query:str, verbose:bool=False, logger:Callable=print):
+    def  __sql(self, conn, query:str, verbose:bool=False, logger:Callable=print, output:str='pandas', chunksize:int=100000, params=None, prepare:bool=True):
+        log = verbose and enabled(logger)
         stdout=''
         col_names=''
-        if verbose:
+        cached=False
+        if log:
             logger("Attempting to run sql query...{}".format(query))
         try:
-            cur=self.engine.cursor()
-            data = cur.execute(query)
-            self.engine.commit()
-            if cur.description:
-                data = cur.fetchall()
-                if verbose:
+            with metrics.phase('execute'):
+                cur, cached = self.__execute(conn, query, params, prepare)
+            description = cur.description
+            data = None
+            if description and output in ('arrow', 'numpy'):
+                fetch = fetch_arrow if output == 'arrow' else fetch_numpy
+                with metrics.phase('fetch'):
+                    data = fetch(cur, chunksize=chunksize, dialect=self._dialect)
+                if log:
+                    logger("\n Return {} -- # of records-->:  {}".format(output, len(data)))
+            elif description:
+                with metrics.phase('fetch'):
+                    data = cur.fetchall()
+                if log:
                     logger("\n Return dataframe -- # of records-->:  {}".format(len(data)))
-                col_names = [desc[0].lower() for desc in cur.description]
-                if verbose:
+                col_names = [desc[0].lower() for desc in description]
+                if log:
                     logger("\n Return dataframe -- Column Names-->:  {}".format(col_names))
+            if not cached:
                 cur.close()
-                return pd.DataFrame(data, columns=col_names)
-            if verbose:
+            # after the fetch: sqlite cannot commit while an INSERT ... RETURNING still has rows to return
+            with metrics.phase('commit'):
+                conn.commit()
+            if description and output in ('arrow', 'numpy'):
+                return data
+            if description:
+                with metrics.phase('dataframe'):
+                    return pd.DataFrame(data, columns=col_names)
+            if log:
                 logger("Completed cursor execution for sql query...")
         except Exception as e:
             stdout = str(e).split("\n")[0] + "\n"
-            if verbose:
+            if log:
                 logger("### Exception ### \n {}".format(stdout))
-            cur.execute("ROLLBACK")
-            cur.close()
+            metrics.fail(stdout)
+            conn.rollback()
         if len(stdout)>0 and verbose:
             sys.exit("### Exception ### \n {}".format(stdout))
         elif len(stdout)>0:
             sys.exit("### Exception - hint: verbose=True to have error details###")
-     
-
 
+    def  __execute(self, conn, query:str, params=None, prepare:bool=True):
+        """
+            Execute query with bound params; returns the cursor and whether it is owned by the statement cache.
+        """
+        if params is None:
+            cur = conn.cursor()
+            cur.execute(query)
+            return cur, False
+        text, values = bind(query, params, style=PARAMSTYLES.get(self._dialect, 'qmark'))
+        if isinstance(values, list):
+            cur = conn.cursor()
+            cur.executemany(text, values)
+            return cur, False
+        if prepare:
+            return self._statements.execute(conn, query, params, self._dialect)
+        cur = conn.cursor()
+        cur.execute(text, values)
+        return cur, False
@@ -0,0 +1,229 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+import os, re, time, hashlib, threading
+from pyblux._lazy import pandas as pd
+from collections import OrderedDict
+
+_TABLE_READ = re.compile(r'\b(?:from|join)\s+([\w."$#]+)', re.IGNORECASE)
+_TABLE_WRITE = re.compile(r'\b(?:insert\s+into|update|delete\s+from|delete|drop\s+table|drop\s+view|truncate\s+table|truncate'
+                          r'|alter\s+table|create\s+table|merge\s+into|replace\s+into)\s+(?:if\s+(?:not\s+)?exists\s+)?([\w."$#]+)', re.IGNORECASE)
+
+# system catalogs change with DDL that table based invalidation cannot see: schema-qualified catalog names,
+# sqlite's reserved sqlite_ tables, and the unqualified catalog views of postgres and oracle for their dialect only
+_CATALOG_PREFIXES = ('information_schema.', 'pg_catalog.', 'sys.', 'dbc.', 'mysql.', 'performance_schema.', 'sqlite_', 'main.sqlite_')
+_POSTGRES_CATALOGS = {'pg_' + name for name in ('class', 'namespace', 'tables', 'views', 'matviews', 'indexes', 'index', 'attribute',
+                                                 'type', 'proc', 'constraint', 'database', 'roles', 'user', 'settings', 'sequences',
+                                                 'description', 'inherits', 'partitioned_table', 'locks', 'stat_activity',
+                                                 'stat_user_tables', 'stat_all_tables')}
+_ORACLE_CATALOGS = {prefix + name for prefix in ('user_', 'all_', 'dba_')
+                    for name in ('tables', 'tab_columns', 'views', 'objects', 'indexes', 'ind_columns', 'constraints', 'cons_columns',
+                                 'sequences', 'synonyms', 'tab_comments', 'col_comments', 'tab_partitions', 'part_tables', 'mviews',
+                                 'source', 'triggers', 'procedures', 'dependencies', 'segments', 'users')}
+
+
+def normalize_sql(query:str):
+    """
+    - normalize_sql(query)
+    - Returns (string): query with whitespace collapsed and the trailing semicolon removed
+    """
+    return ' '.join(query.split()).rstrip(';').strip()
+
+
+def query_tables(query:str, write:bool=False):
+    """
+    - query_tables(query, write)
+    - Returns (set): lower case table names read by the query, or written by it when write=True
+    """
+    pattern = _TABLE_WRITE if write else _TABLE_READ
+    return {name.replace('"', '').lower() for name in pattern.findall(query) if not name.startswith('(')}
+
+
+def is_catalog_query(query:str, dialect:str=None):
+    """
+    - is_catalog_query(query, dialect)
+    - Returns (boolean): True when the query reads a system catalog and must not be cached; user tables such as
+      user_sessions or pg_import are not catalogs
+    """
+    for name in query_tables(query):
+        if name.startswith(_CATALOG_PREFIXES):
+            return True
+        if dialect == 'postgres' and name in _POSTGRES_CATALOGS:
+            return True
+        if dialect == 'oracle' and (name in _ORACLE_CATALOGS or name.startswith(('v$', 'gv$'))):
+            return True
+    return False
+
+
+def is_cacheable(query:str, dialect:str=None):
+    """
+    - is_cacheable(query, dialect)
+    - Returns (boolean): True for reads whose result can be cached: SELECT or WITH statements that write no table
+      (INSERT/UPDATE ... RETURNING and data-modifying CTEs are not) and read no system catalog
+    """
+    text = normalize_sql(query).lstrip('( ').lower()
+    if not text.startswith(('select', 'with')) or query_tables(query, write=True):
+        return False
+    return not is_catalog_query(query, dialect)
+
+
+def _table_match(cached:set, table:str):
+    table = table.replace('"', '').lower()
+    short = table.split('.')[-1]
+    return any(name == table or name.split('.')[-1] == short for name in cached)
+
+
+def _nbytes(data):
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(deep=True).sum())
+    return int(getattr(data, 'nbytes', 0))
+
+
+class ResultCache:
+    """
+    This class keeps query results in memory for reuse by Blux.sql, keyed on the normalized SQL text, parameters and database.
+    >>> cache = ResultCache(max_bytes=512 * 1024 ** 2, ttl=600, spill_dir='/tmp/pyblux_cache')
+    >>> blux = Blux(engine=engine, dialect='postgres', cache=cache)
+    """
+
+    def __init__(self, max_bytes:int=256 * 1024 ** 2, ttl:float=None, spill_dir:str=None):
+        """
+        Args:
+            max_bytes (int): memory budget for cached results, least recently used results are evicted first
+            ttl (float): seconds a result stays valid, None keeps it until evicted or invalidated
+            spill_dir (str): directory where evicted results are written to files instead of being dropped: dataframes
+                as pickles so they come back with the same dtypes, arrow tables as parquet
+        """
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._spill_dir = spill_dir
+        self._entries = OrderedDict()
+        self._spilled = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.spills = 0
+        if spill_dir and not os.path.exists(spill_dir):
+            os.makedirs(spill_dir)
+
+    def key(self, query:str, params=None, namespace:str='', output:str='pandas'):
+        """
+        - key(query, params, namespace, output)
+        - Returns (string): cache key for a query on a database
+        """
+        text = '\x1f'.join([str(namespace), normalize_sql(query), repr(params), output])
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get(self, key:str):
+        """
+        - get(key)
+        - Returns: a copy of the cached result, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self.__expired(entry):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry['data'].copy() if isinstance(entry['data'], pd.DataFrame) else entry['data']
+            if entry is not None:
+                self.__drop(key)
+            spilled = self._spilled.pop(key, None)
+            if spilled is not None and not self.__expired(spilled):
+                data = self.__read_spill(spilled)
+                if data is not None:
+                    self.hits += 1
+                    self.__store(key, data, spilled['tables'], spilled['expires'])
+                    return data.copy() if isinstance(data, pd.DataFrame) else data
+            elif spilled is not None:
+                self.__remove_file(spilled['path'])
+            self.misses += 1
+            return None
+
+    def put(self, key:str, data, tables:set=None):
+        """
+        Cache a result; results larger than the whole budget are not cached.
+        """
+        expires = time.monotonic() + self._ttl if self._ttl else None
+        with self._lock:
+            self.__drop(key)
+            spilled = self._spilled.pop(key, None)
+            if spilled is not None:
+                self.__remove_file(spilled['path'])
+            self.__store(key, data, tables or set(), expires)
+
+    def invalidate(self, table:str=None):
+        """
+        Drop the cached results that read table, or everything when table is None.
+        """
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if table is None or _table_match(e['tables'], table)]:
+                self.__drop(key)
+            for key in [k for k, e in self._spilled.items() if table is None or _table_match(e['tables'], table)]:
+                self.__remove_file(self._spilled.pop(key)['path'])
+
+    def clear(self):
+        self.invalidate()
+
+    def stats(self):
+        """
+        - Returns (dict): hit, miss, eviction and spill counters with current memory use
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'spills': self.spills,
+                    'entries': len(self._entries), 'spilled': len(self._spilled), 'bytes': self._bytes}
+
+    def __expired(self, entry:dict):
+        return entry['expires'] is not None and entry['expires'] <= time.monotonic()
+
+    def __store(self, key:str, data, tables:set, expires):
+        nbytes = _nbytes(data)
+        if nbytes > self._max_bytes:
+            return
+        self._entries[key] = {'data': data, 'bytes': nbytes, 'tables': tables, 'expires': expires}
+        self._bytes += nbytes
+        while self._bytes > self._max_bytes:
+            old_key, entry = self._entries.popitem(last=False)
+            self._bytes -= entry['bytes']
+            self.evictions += 1
+            if self._spill_dir:
+                self.__spill(old_key, entry)
+
+    def __drop(self, key:str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry['bytes']
+
+    def __spill(self, key:str, entry:dict):
+        # parquet would change dataframe dtypes (object columns of Decimal or mixed values), pickle keeps them;
+        # the files are only read back by this cache
+        kind = 'pandas' if isinstance(entry['data'], pd.DataFrame) else 'arrow'
+        path = os.path.join(self._spill_dir, key + ('.pkl' if kind == 'pandas' else '.parquet'))
+        try:
+            if kind == 'pandas':
+                entry['data'].to_pickle(path)
+            else:
+                import pyarrow.parquet as pq
+                pq.write_table(entry['data'], path)
+        except Exception:
+            self.__remove_file(path)
+            return
+        self._spilled[key] = {'path': path, 'kind': kind, 'tables': entry['tables'], 'expires': entry['expires']}
+        self.spills += 1
+
+    def __read_spill(self, spilled:dict):
+        try:
+            if spilled['kind'] == 'pandas':
+                data = pd.read_pickle(spilled['path'])
+            else:
+                import pyarrow.parquet as pq
+                data = pq.read_table(spilled['path'])
+        except Exception:
+            data = None
+        self.__remove_file(spilled['path'])
+        return data
+
+    def __remove_file(self, path:str):
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,142 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+import re, time, threading
+from typing import Callable
+
+# tables and views of a list of schemas, {schemas} expands to bound parameters
+_LISTING = {
+    'postgres': """select table_schema as schema_name, table_name as name from information_schema.tables where table_schema in ({schemas})
+                   union all
+                   select schemaname as schema_name, matviewname as name from pg_matviews where schemaname in ({schemas})""",
+    'teradata': """select databasename as schema_name, tablename as name from dbc.tables where databasename in ({schemas})""",
+    'mssql':    """select table_schema as schema_name, table_name as name from information_schema.tables where table_schema in ({schemas})""",
+    'mysql':    """select table_schema as schema_name, table_name as name from information_schema.tables where table_schema in ({schemas})""",
+    'oracle':   """select owner as schema_name, table_name as name from all_all_tables where owner in ({schemas})
+                   union all
+                   select owner as schema_name, view_name as name from all_views where owner in ({schemas})""",
+    'sqlite':   """select '' as schema_name, tbl_name as name from sqlite_schema where type in ('table', 'view')""",
+}
+
+# schema used for unqualified names
+_DEFAULT_SCHEMA = {
+    'postgres': "select current_schema() as name",
+    'teradata': "select database as name",
+    'mssql':    "select schema_name() as name",
+    'mysql':    "select database() as name",
+    'oracle':   "select user as name from dual",
+}
+
+_DDL = re.compile(r'^\s*(create|drop)\s+(?:or\s+replace\s+)?(?:(?:global\s+|local\s+)?(?:temporary\s+|temp\s+|volatile\s+|multiset\s+|set\s+)*)?'
+                  r'(?:table|view|materialized\s+view)\s+(?:if\s+(?:not\s+)?exists\s+)?([\w."$#]+)', re.IGNORECASE)
+_OTHER_DDL = re.compile(r'^\s*(alter|rename)\s', re.IGNORECASE)
+
+
+class Catalog:
+    """
+    This class caches the table and view names of the schemas a Blux works with, so existence checks
+    are answered from memory instead of a catalog query per table.
+    >>> blux = Blux(engine=engine, dialect='teradata', catalog_ttl=300)
+    >>> blux.catalog.exists_many(['stage.orders', 'stage.customers'])
+    """
+
+    def __init__(self, blux, ttl:float=300):
+        """
+        Args:
+            blux (Blux): Blux used to query the catalog
+            ttl (float): seconds a schema listing is trusted before it is loaded again
+        """
+        self._blux = blux
+        self._ttl = ttl
+        self._schemas = {}
+        self._default = None
+        self._lock = threading.RLock()
+
+    def split(self, table:str):
+        """
+        - split(table)
+        - Returns (tuple): lower case schema and name, schema '' for unqualified names and on sqlite
+        """
+        table = table.replace('"', '').strip().lower()
+        # the sqlite listing has no schema column (main.x and x are the same table), as in exists_query
+        if '.' in table and self._blux.dialect == 'sqlite':
+            return '', table.split('.')[-1]
+        if '.' in table:
+            schema, name = table.split('.')[0], table.split('.')[-1]
+            return schema, name
+        return '', table
+
+    def exists(self, table:str, verbose:bool=False, logger:Callable=print):
+        """
+        - exists(table)
+        - Returns (boolean): True when the table or view is in the cached listing of its schema
+        """
+        return self.exists_many([table], verbose=verbose, logger=logger)[table]
+
+    def exists_many(self, tables:list, verbose:bool=False, logger:Callable=print):
+        """
+        - exists_many(tables)
+        - Loads the listing of every schema not cached yet in one query
+        - Returns (dict): table -> boolean
+        """
+        names = {table: self.split(table) for table in tables}
+        with self._lock:
+            now = time.monotonic()
+            missing = sorted({self.__resolve(schema, verbose, logger) for schema, _ in names.values()
+                              if self.__stale(self.__resolve(schema, verbose, logger), now)})
+            if missing:
+                self.__load(missing, verbose, logger)
+            return {table: name in self._schemas[self.__resolve(schema, verbose, logger)][1] for table, (schema, name) in names.items()}
+
+    def note(self, query:str):
+        """
+        Keep the cached listings in step with DDL issued through pyblux.
+        """
+        match = _DDL.match(query)
+        with self._lock:
+            if match:
+                schema, name = self.split(match.group(2))
+                schema = schema or self._default or ''
+                if schema in self._schemas:
+                    if match.group(1).lower() == 'create':
+                        self._schemas[schema][1].add(name)
+                    else:
+                        self._schemas[schema][1].discard(name)
+            elif _OTHER_DDL.match(query):
+                self._schemas.clear()
+
+    def invalidate(self, schema:str=None):
+        """
+        Forget the listing of a schema, or of every schema when schema is None.
+        """
+        with self._lock:
+            if schema is None:
+                self._schemas.clear()
+            else:
+                self._schemas.pop(schema.lower(), None)
+
+    def __stale(self, schema:str, now:float):
+        entry = self._schemas.get(schema)
+        return entry is None or (self._ttl is not None and entry[0] + self._ttl <= now)
+
+    def __resolve(self, schema:str, verbose:bool=False, logger:Callable=print):
+        if schema or self._blux.dialect not in _DEFAULT_SCHEMA:
+            return schema
+        if self._default is None:
+            df = self._blux.sql(query=_DEFAULT_SCHEMA[self._blux.dialect], verbose=verbose, logger=logger)
+            self._default = str(df.iloc[0, 0]).strip().lower()
+        return self._default
+
+    def __load(self, schemas:list, verbose:bool=False, logger:Callable=print):
+        dialect = self._blux.dialect
+        params = {'s{}'.format(i): schema.upper() if dialect == 'oracle' else schema for i, schema in enumerate(schemas)}
+        query = _LISTING[dialect].format(schemas=', '.join(':' + key for key in params))
+        if verbose:
+            logger('Loading catalog for {}......'.format(', '.join(schemas)))
+        df = self._blux.sql(query=query, params=params if dialect != 'sqlite' else None, verbose=verbose, logger=logger)
+        now = time.monotonic()
+        for schema in schemas:
+            self._schemas[schema] = (now, set())
+        for schema, name in df.itertuples(index=False, name=None):
+            schema = str(schema).strip().lower()
+            if schema in self._schemas:
+                self._schemas[schema][1].add(str(name).strip().lower())
@@ -0,0 +1,155 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+import os, json, datetime, threading
+from pyblux.params import bind, PARAMSTYLES
+
+
+class LoadError(Exception):
+    """
+    A checkpointed load failed. Rows before offset are committed and recorded, so running the same load again resumes there.
+    """
+
+    def __init__(self, table:str, load_id:str, offset:int, cause:BaseException):
+        self.table = table
+        self.load_id = load_id
+        self.offset = offset
+        self.cause = cause
+        super().__init__("Load {} into {} failed at row {}: {}".format(load_id, table, offset, str(cause).split("\n")[0]))
+
+
+class FileCheckpoint:
+    """
+    Committed row offsets kept in a local JSON state file, one entry per load id:
+    >>> blux.load(dataframe=final, table='flights', checkpoint=FileCheckpoint('/var/lib/etl/flights.state'))
+    """
+
+    def __init__(self, path:str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def get(self, load_id:str):
+        """
+        - Returns (int): rows committed by the load, 0 when it has no checkpoint
+        """
+        with self._lock:
+            return int(self.__read().get(load_id, {}).get('rows', 0))
+
+    def total(self, load_id:str):
+        """
+        - Returns (int): rows of the dataframe the checkpoint was recorded for, None when unknown
+        """
+        with self._lock:
+            total = self.__read().get(load_id, {}).get('total')
+        return int(total) if total is not None else None
+
+    def set(self, load_id:str, rows:int, total:int=None):
+        with self._lock:
+            state = self.__read()
+            state[load_id] = {'rows': rows, 'total': total, 'updated': datetime.datetime.now().isoformat(timespec='seconds')}
+            self.__write(state)
+
+    def clear(self, load_id:str):
+        with self._lock:
+            state = self.__read()
+            if state.pop(load_id, None) is not None:
+                self.__write(state)
+
+    def __read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def __write(self, state:dict):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # replace the file in one step so a crash never leaves a truncated state file
+        temp = '{}.{}.tmp'.format(self.path, os.getpid())
+        with open(temp, 'w') as f:
+            json.dump(state, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+
+
+class TableCheckpoint:
+    """
+    Committed row offsets kept in a control table of a database, created on first use:
+    >>> blux.load(dataframe=final, table='flights', checkpoint=TableCheckpoint(blux, table='etl.pyblux_checkpoint'))
+    """
+
+    def __init__(self, blux, table:str='pyblux_checkpoint'):
+        """
+        Args:
+            blux (Blux): session of the database holding the control table
+            table (str): control table name
+        """
+        self._blux = blux
+        self._table = table
+        self._style = PARAMSTYLES.get(blux.dialect, 'qmark')
+        self._ready = False
+
+    def get(self, load_id:str):
+        """
+        - Returns (int): rows committed by the load, 0 when it has no checkpoint
+        """
+        rows = self.__run("SELECT committed_rows FROM {} WHERE load_id = :load_id".format(self._table), {'load_id': load_id}, fetch=True)
+        return int(rows[0][0]) if rows else 0
+
+    def total(self, load_id:str):
+        """
+        - Returns (int): rows of the dataframe the checkpoint was recorded for, None when unknown
+        """
+        rows = self.__run("SELECT total_rows FROM {} WHERE load_id = :load_id".format(self._table), {'load_id': load_id}, fetch=True)
+        return int(rows[0][0]) if rows and rows[0][0] is not None else None
+
+    def set(self, load_id:str, rows:int, total:int=None):
+        # delete and insert in one transaction instead of a dialect specific upsert
+        self.__run(["DELETE FROM {} WHERE load_id = :load_id".format(self._table),
+                    "INSERT INTO {} (load_id, committed_rows, total_rows, updated_at) VALUES (:load_id, :rows, :total, :updated)".format(self._table)],
+                   {'load_id': load_id, 'rows': rows, 'total': total, 'updated': datetime.datetime.now().isoformat(timespec='seconds')})
+
+    def clear(self, load_id:str):
+        self.__run("DELETE FROM {} WHERE load_id = :load_id".format(self._table), {'load_id': load_id})
+
+    def __create(self, conn):
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT committed_rows FROM {} WHERE 1 = 0".format(self._table))
+            cur.fetchall()
+        except Exception:
+            conn.rollback()
+            cur.execute("""CREATE TABLE {} (load_id varchar(255) NOT NULL PRIMARY KEY, committed_rows decimal(18,0) NOT NULL,
+                           total_rows decimal(18,0), updated_at varchar(32))""".format(self._table))
+        conn.commit()
+        cur.close()
+        self._ready = True
+
+    def __run(self, queries, params:dict, fetch:bool=False):
+        with self._blux.connection() as conn:
+            if not self._ready:
+                self.__create(conn)
+            cur = conn.cursor()
+            try:
+                for query in [queries] if isinstance(queries, str) else queries:
+                    cur.execute(*bind(query, params, style=self._style))
+                rows = cur.fetchall() if fetch else None
+                conn.commit()
+                return rows
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+
+
+def checkpoint_store(checkpoint):
+    """
+    - checkpoint_store(checkpoint)
+    - checkpoint: a state file path, or an object with get/set/clear and optionally total (FileCheckpoint, TableCheckpoint)
+    - Returns (object): the checkpoint store
+    """
+    if isinstance(checkpoint, (str, os.PathLike)):
+        return FileCheckpoint(os.fspath(checkpoint))
+    return checkpoint
@@ -0,0 +1,268 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+import datetime, decimal
+from pyblux._lazy import pandas as pd
+
+# pandas dtype and pyarrow type name for each logical column kind
+_KINDS = {
+    'int':      ('Int64', 'int64'),
+    'float':    ('float64', 'float64'),
+    'bool':     ('boolean', 'bool_'),
+    'datetime': ('datetime64[ns]', 'timestamp'),
+    'date':     ('datetime64[ns]', 'date32'),
+    'string':   ('object', 'string'),
+}
+
+# psycopg2 type OIDs
+_POSTGRES_OIDS = {16: 'bool', 20: 'int', 21: 'int', 23: 'int', 700: 'float', 701: 'float', 1700: 'float',
+                  1082: 'date', 1114: 'datetime', 1184: 'datetime', 25: 'string', 1042: 'string', 1043: 'string'}
+
+# pymysql FIELD_TYPE codes
+_MYSQL_TYPES = {1: 'int', 2: 'int', 3: 'int', 8: 'int', 9: 'int', 4: 'float', 5: 'float', 0: 'float', 246: 'float',
+                7: 'datetime', 12: 'datetime', 10: 'date', 15: 'string', 253: 'string', 254: 'string'}
+
+# type names reported by cx_Oracle (DB_TYPE_ prefix removed) and other drivers naming their type codes;
+# matched whole, so DB_TYPE_INTERVAL_DS is not taken for an integer
+_TYPE_NAMES = {
+    'INT': 'int', 'INTEGER': 'int', 'BIGINT': 'int', 'SMALLINT': 'int', 'TINYINT': 'int', 'BYTEINT': 'int',
+    'BINARY_INTEGER': 'int', 'PLS_INTEGER': 'int',
+    'FLOAT': 'float', 'REAL': 'float', 'DOUBLE': 'float', 'DOUBLE PRECISION': 'float', 'BINARY_FLOAT': 'float', 'BINARY_DOUBLE': 'float',
+    'BOOL': 'bool', 'BOOLEAN': 'bool',
+    'DATE': 'datetime', 'DATETIME': 'datetime', 'TIMESTAMP': 'datetime', 'TIMESTAMP_TZ': 'datetime', 'TIMESTAMP_LTZ': 'datetime',
+    'CHAR': 'string', 'NCHAR': 'string', 'VARCHAR': 'string', 'VARCHAR2': 'string', 'NVARCHAR': 'string', 'NVARCHAR2': 'string',
+    'STRING': 'string', 'TEXT': 'string', 'CLOB': 'string', 'NCLOB': 'string', 'LONG': 'string',
+}
+
+# python types reported by teradatasql, pyodbc and sqlite adapters
+_PYTHON_TYPES = {bool: 'bool', int: 'int', float: 'float', decimal.Decimal: 'float',
+                 datetime.datetime: 'datetime', datetime.date: 'date', str: 'string'}
+
+
+def column_kind(desc, dialect:str=None):
+    """
+    - column_kind(desc, dialect)
+    - desc: one entry of cursor.description
+    - Returns (string): logical column kind (int, float, bool, datetime, date, string) or None when unknown
+    """
+    type_code = desc[1]
+    if type_code is None:
+        return None
+    if isinstance(type_code, type):
+        return _PYTHON_TYPES.get(type_code)
+    if dialect == 'postgres':
+        return _POSTGRES_OIDS.get(type_code)
+    if dialect == 'mysql':
+        return _MYSQL_TYPES.get(type_code)
+    name = str(getattr(type_code, 'name', type_code)).upper()
+    if name.startswith('DB_TYPE_'):
+        name = name[len('DB_TYPE_'):]
+    if name in ('NUMBER', 'DECIMAL', 'NUMERIC'):
+        # cx_Oracle NUMBER(p,0) holds integers
+        precision, scale = desc[4], desc[5]
+        return 'int' if scale == 0 and precision and precision < 19 else 'float'
+    return _TYPE_NAMES.get(name)
+
+
+def _is_decimal(desc, dialect:str=None):
+    # exact numeric columns: built as decimal128 in arrow output instead of float64
+    type_code = desc[1]
+    if type_code is decimal.Decimal:
+        return True
+    if dialect == 'postgres':
+        return type_code == 1700
+    if dialect == 'mysql':
+        return type_code in (0, 246)
+    if type_code is None or isinstance(type_code, type):
+        return False
+    name = str(getattr(type_code, 'name', type_code)).upper()
+    return name in ('NUMBER', 'DECIMAL', 'NUMERIC', 'DB_TYPE_NUMBER') and column_kind(desc, dialect) == 'float'
+
+
+def fetch_arrow(cur, chunksize:int=100000, dialect:str=None):
+    """
+    - fetch_arrow(cur, chunksize, dialect)
+    - cur: executed cursor with a result set
+    - Returns (pyarrow.Table): result built batch by batch from fetchmany, typed from cur.description
+    """
+    import pyarrow as pa
+    if hasattr(cur, 'fetch_arrow_table'):
+        # ADBC/DuckDB cursors return arrow data natively
+        return cur.fetch_arrow_table()
+    names = [desc[0].lower() for desc in cur.description]
+    kinds, types = arrow_types(cur.description, dialect)
+    batches = []
+    while True:
+        rows = cur.fetchmany(chunksize)
+        if not rows:
+            break
+        batch = arrow_batch(rows, names, kinds, types)
+        schema = batch.schema if not batches else widen_schema(schema, batch.schema)
+        batches.append(batch)
+        del rows
+    if not batches:
+        return pa.table({name: pa.array([], type=t or pa.null()) for name, t in zip(names, types)})
+    # untyped columns are inferred per batch: every batch is cast to the type that holds the values of all of them
+    return pa.Table.from_batches([conform_batch(batch, schema) for batch in batches], schema=schema).combine_chunks()
+
+
+def arrow_types(description, dialect:str=None):
+    """
+    - arrow_types(description, dialect)
+    - description: cursor.description
+    - Returns (tuple): column kinds and pyarrow types, None where the driver does not report a usable type.
+      Exact numerics are decimal128(38, scale), or inferred from the values when the driver does not report the scale.
+    """
+    import pyarrow as pa
+    kinds = [column_kind(desc, dialect) for desc in description]
+    types = []
+    for i, (kind, desc) in enumerate(zip(kinds, description)):
+        if _is_decimal(desc, dialect):
+            kinds[i] = 'decimal'
+            precision, scale = (desc[4], desc[5]) if len(desc) > 5 else (None, None)
+            # no precision: the scale is not reported either (unconstrained NUMERIC)
+            types.append(pa.decimal128(38, scale) if precision and isinstance(scale, int) and 0 <= scale <= 38 else None)
+        elif kind == 'datetime':
+            types.append(pa.timestamp('us'))
+        elif kind is not None:
+            types.append(getattr(pa, _KINDS[kind][1])())
+        else:
+            types.append(None)
+    return kinds, types
+
+
+def arrow_batch(rows:list, names:list, kinds:list, types:list):
+    """
+    - arrow_batch(rows, names, kinds, types)
+    - rows: row tuples from fetchmany
+    - kinds, types: from arrow_types; a None type is inferred from the values of this batch, so it may differ between
+      batches (see widen_schema)
+    - Returns (pyarrow.RecordBatch): the rows transposed into typed columns
+    """
+    import pyarrow as pa
+    columns = [_float_column(col) if kind == 'float' else _decimal_column(col) if kind == 'decimal' else col
+               for col, kind in zip(zip(*rows), kinds)]
+    return pa.RecordBatch.from_arrays([pa.array(col, type=t, from_pandas=True) if t is not None else _infer_array(col)
+                                       for col, t in zip(columns, types)], names=names)
+
+
+def _infer_array(values):
+    import pyarrow as pa
+    try:
+        array = pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # values of several types in one column (sqlite): kept as text
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+    if pa.types.is_decimal(array.type) and array.type.scale <= 38:
+        # a fixed precision, so batches with more digits do not change the type
+        return array.cast(pa.decimal128(38, array.type.scale))
+    return array
+
+
+def fetch_numpy(cur, chunksize:int=100000, dialect:str=None):
+    """
+    - fetch_numpy(cur, chunksize, dialect)
+    - cur: executed cursor with a result set
+    - Returns (pd.DataFrame): typed numpy-backed dataframe built column by column instead of from row tuples
+    """
+    if hasattr(cur, 'fetch_arrow_table'):
+        return cur.fetch_arrow_table().to_pandas()
+    names = [desc[0].lower() for desc in cur.description]
+    dtypes = []
+    for desc in cur.description:
+        kind = column_kind(desc, dialect)
+        dtypes.append(_KINDS[kind][0] if kind is not None else None)
+    parts = [[] for _ in names]
+    while True:
+        rows = cur.fetchmany(chunksize)
+        if not rows:
+            break
+        for i, col in enumerate(zip(*rows)):
+            parts[i].append(_column_array(col, dtypes[i]))
+        del rows
+    data = {}
+    for name, chunks, dtype in zip(names, parts, dtypes):
+        if not chunks:
+            data[name] = pd.Series([], dtype=dtype or 'object')
+        elif len(chunks) == 1:
+            data[name] = pd.Series(chunks[0])
+        else:
+            data[name] = pd.Series(pd.concat([pd.Series(c) for c in chunks], ignore_index=True))
+    return pd.DataFrame(data, columns=names)
+
+
+def widen_type(left, right):
+    """
+    - widen_type(left, right)
+    - Returns (pyarrow.DataType): a type holding the values of both: null takes the other type, integers widen to int64,
+      float64 or a decimal, decimals to the larger scale, dates to timestamps, and incompatible types to string
+    """
+    import pyarrow as pa
+    types = pa.types
+    if left.equals(right) or types.is_null(right):
+        return left
+    if types.is_null(left):
+        return right
+    exact = [t for t in (left, right) if types.is_integer(t) or types.is_boolean(t) or types.is_decimal(t)]
+    if len(exact) == 2:
+        if not (types.is_decimal(left) or types.is_decimal(right)):
+            return pa.int64()
+        scale = max(t.scale for t in (left, right) if types.is_decimal(t))
+        # int64 values need 19 integer digits
+        if types.is_decimal(left) and types.is_decimal(right) or scale <= 19:
+            return pa.decimal128(38, scale)
+        return pa.float64()
+    if all(types.is_integer(t) or types.is_floating(t) or types.is_decimal(t) for t in (left, right)):
+        return pa.float64()
+    if all(types.is_timestamp(t) or types.is_date(t) for t in (left, right)):
+        stamps = [t for t in (left, right) if types.is_timestamp(t)]
+        if len({t.tz for t in stamps}) == 1:
+            return pa.timestamp('ns' if any(t.unit == 'ns' for t in stamps) else 'us', tz=stamps[0].tz)
+    return pa.string()
+
+
+def widen_schema(schema, other):
+    """
+    - widen_schema(schema, other)
+    - schema, other: schemas with the same column names in the same order (two batches of one result)
+    - Returns (pyarrow.Schema): schema with each column widened to hold the values of other too (see widen_type)
+    """
+    import pyarrow as pa
+    if schema.equals(other):
+        return schema
+    return pa.schema([pa.field(f.name, widen_type(f.type, o.type)) for f, o in zip(schema, other)])
+
+
+def conform_batch(batch, schema):
+    """
+    - conform_batch(batch, schema)
+    - Returns (pyarrow.RecordBatch): the batch with each column cast to the type of the schema where it differs;
+      raises pyarrow.ArrowInvalid rather than truncating a value that does not fit
+    """
+    import pyarrow as pa
+    if batch.schema.equals(schema):
+        return batch
+    return pa.RecordBatch.from_arrays([col if col.type == f.type else col.cast(f.type, safe=True) for col, f in zip(batch.columns, schema)],
+                                      schema=schema)
+
+
+def _column_array(values, dtype):
+    if dtype is None:
+        # unknown driver type: let pandas infer the narrowest dtype for the batch
+        return pd.Series(values).infer_objects().array
+    if dtype == 'float64':
+        return pd.array(_float_column(values), dtype=dtype)
+    try:
+        return pd.array(values, dtype=dtype)
+    except (TypeError, ValueError):
+        return pd.Series(values).infer_objects().array
+
+
+def _decimal_column(values):
+    # drivers returning floats for exact numerics: pyarrow only builds decimals from int and Decimal
+    return [decimal.Decimal(repr(v)) if isinstance(v, float) and v == v else None if isinstance(v, float) else v for v in values]
+
+
+def _float_column(values):
+    # Decimal values from NUMERIC columns are not accepted by float buffers as-is
+    return [float(v) if v is not None else None for v in values]
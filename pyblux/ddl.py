@@ -0,0 +1,117 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+import datetime, decimal
+from pyblux._lazy import pandas as pd
+
+# column types per dialect, None entries fall back to the generic ANSI type
+_TYPES = {
+    None:       {'bool': 'boolean', 'int8': 'smallint', 'int16': 'smallint', 'int32': 'integer', 'int64': 'bigint',
+                 'float': 'double precision', 'timestamp': 'timestamp', 'timestamptz': 'timestamp with time zone', 'date': 'date',
+                 'varchar': 'varchar({})', 'text': 'varchar({})', 'max_varchar': 65535,
+                 'wide_varchar': 'varchar(4000)', 'key_varchar': 'varchar(1024)'},
+    'postgres': {'bool': 'boolean', 'timestamptz': 'timestamptz', 'text': 'text', 'max_varchar': 10485760,
+                 'wide_varchar': 'text', 'key_varchar': 'text'},
+    'mysql':    {'bool': 'boolean', 'int8': 'tinyint', 'float': 'double', 'timestamp': 'datetime(6)', 'timestamptz': 'datetime(6)',
+                 'text': 'longtext', 'max_varchar': 16383, 'wide_varchar': 'longtext', 'key_varchar': 'varchar(768)'},
+    'mssql':    {'bool': 'bit', 'int8': 'smallint', 'float': 'float', 'timestamp': 'datetime2', 'timestamptz': 'datetimeoffset',
+                 'varchar': 'nvarchar({})', 'text': 'nvarchar(max)', 'max_varchar': 4000,
+                 'wide_varchar': 'nvarchar(max)', 'key_varchar': 'nvarchar(450)'},
+    'oracle':   {'bool': 'number(1)', 'int8': 'number(3)', 'int16': 'number(5)', 'int32': 'number(10)', 'int64': 'number(19)',
+                 'float': 'binary_double', 'varchar': 'varchar2({} char)', 'text': 'clob', 'max_varchar': 4000,
+                 'wide_varchar': 'varchar2(4000 char)', 'key_varchar': 'varchar2(1000 char)'},
+    'teradata': {'bool': 'byteint', 'int8': 'byteint', 'float': 'float', 'timestamp': 'timestamp(6)', 'timestamptz': 'timestamp(6) with time zone',
+                 'varchar': 'varchar({}) character set unicode', 'text': 'clob character set unicode', 'max_varchar': 32000,
+                 'wide_varchar': 'varchar(4000) character set unicode', 'key_varchar': 'varchar(1024) character set unicode'},
+    'sqlite':   {'bool': 'integer', 'int8': 'integer', 'int16': 'integer', 'int32': 'integer', 'int64': 'integer', 'float': 'real',
+                 'varchar': 'text', 'text': 'text', 'wide_varchar': 'text', 'key_varchar': 'text'},
+}
+
+# wide_varchar / key_varchar: text columns of tables that keep receiving new rows (merge targets, transfers), sized for
+# values longer than the ones seen so far; key columns stay within the index key limits of the dialect
+
+_QUOTES = {'mysql': '`{}`'}
+
+
+def _type(dialect:str, kind:str):
+    return _TYPES.get(dialect, {}).get(kind) or _TYPES[None][kind]
+
+
+def quote(name:str, dialect:str=None):
+    """
+    - quote(name, dialect)
+    - Returns (string): lower case column name quoted for the dialect
+    """
+    return _QUOTES.get(dialect, '"{}"').format(str(name).lower())
+
+
+def _varchar_length(length:int):
+    # round up so small growth in later loads still fits
+    for size in (16, 32, 64, 128, 255):
+        if length <= size:
+            return size
+    return ((length + 255) // 256) * 256
+
+
+def column_type(column:pd.Series, dialect:str=None, wide:bool=False, key:bool=False):
+    """
+    - column_type(column, dialect, wide, key)
+    - column: dataframe column
+    - dialect: database system name, None for ANSI types
+    - wide: size for values larger than the observed ones: 64 bit integers, 38 digit decimals and wide text columns
+    - key: the column is part of the primary key (wide text stays indexable)
+    - Returns (string): column type sized from the dtype and the observed values
+    """
+    values = column.dropna()
+    if pd.api.types.is_bool_dtype(column):
+        return _type(dialect, 'bool')
+    if pd.api.types.is_integer_dtype(column) and wide:
+        return _type(dialect, 'int64')
+    if pd.api.types.is_integer_dtype(column):
+        low, high = (int(values.min()), int(values.max())) if len(values) else (0, 0)
+        for kind, bound in (('int8', 127), ('int16', 32767), ('int32', 2147483647)):
+            if -bound - 1 <= low and high <= bound:
+                return _type(dialect, kind)
+        return _type(dialect, 'int64')
+    if pd.api.types.is_float_dtype(column):
+        return _type(dialect, 'float')
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return _type(dialect, 'timestamptz' if getattr(column.dt, 'tz', None) is not None else 'timestamp')
+    if len(values) == 0:
+        return _type(dialect, 'key_varchar' if key else 'wide_varchar') if wide else _type(dialect, 'varchar').format(255)
+    sample = values.iloc[0]
+    if isinstance(sample, bool) and values.map(type).eq(bool).all():
+        return _type(dialect, 'bool')
+    if isinstance(sample, decimal.Decimal) and values.map(lambda v: isinstance(v, decimal.Decimal)).all():
+        return _decimal_type(values, dialect, wide)
+    if isinstance(sample, datetime.datetime) and values.map(lambda v: isinstance(v, datetime.datetime)).all():
+        return _type(dialect, 'timestamp')
+    if isinstance(sample, datetime.date) and values.map(lambda v: isinstance(v, datetime.date)).all():
+        return _type(dialect, 'date') if dialect != 'sqlite' else 'date'
+    length = int(values.astype(str).str.len().max())
+    limit = _type(dialect, 'max_varchar')
+    if length > limit:
+        return _type(dialect, 'text').format(length)
+    if wide:
+        return _type(dialect, 'key_varchar' if key else 'wide_varchar')
+    # the rounded length must stay within the varchar limit of the dialect
+    return _type(dialect, 'varchar').format(min(_varchar_length(length), limit))
+
+
+def _decimal_type(values:pd.Series, dialect:str=None, wide:bool=False):
+    digits, scale = 1, 0
+    for value in values:
+        sign, value_digits, exponent = value.as_tuple()
+        if not isinstance(exponent, int):
+            continue
+        value_scale = max(0, -exponent)
+        # a positive exponent adds integer digits: Decimal('1E+5') is 100000
+        digits = max(digits, len(value_digits) + exponent)
+        scale = max(scale, value_scale)
+    # keep every integer digit when the precision is capped at 38, giving up fractional digits instead
+    digits = 38 - scale if wide else min(digits, 38)
+    scale = min(scale, 38 - digits)
+    precision = digits + scale
+    if dialect == 'sqlite':
+        return 'numeric'
+    return '{}({},{})'.format('number' if dialect == 'oracle' else 'decimal', precision, scale)
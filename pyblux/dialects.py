@@ -0,0 +1,103 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+from typing import Callable
+
+# SQLAlchemy url builder and DBAPI connect function per dialect; drivers are imported inside them, on first use
+DIALECTS = {}
+
+
+def register_dialect(dialect:str, url:Callable=None, connect:Callable=None):
+    """
+    - register_dialect(dialect, url, connect)
+    - url: url(user, password, host, port, database, parameter) -> SQLAlchemy connection string, used by get_engine
+    - connect: connect(user, password, host, port, database, parameter) -> DBAPI connection, used by get_connection
+    - Returns (dict): the registry entry of the dialect
+    """
+    entry = DIALECTS.setdefault(dialect, {})
+    if url is not None:
+        entry['url'] = url
+    if connect is not None:
+        entry['connect'] = connect
+    return entry
+
+
+def get_dialect(dialect:str, kind:str):
+    """
+    - get_dialect(dialect, kind)
+    - Returns (Callable): the 'url' or 'connect' function registered for the dialect
+    """
+    entry = DIALECTS.get(dialect, {})
+    if kind not in entry:
+        raise ValueError("No {} registered for dialect {}, available: {}".format(
+            kind, dialect, ', '.join(sorted(d for d, e in DIALECTS.items() if kind in e))))
+    return entry[kind]
+
+
+def _teradata_url(user, password, host, port, database, parameter=None):
+    import teradatasqlalchemy
+    return 'teradatasql://{user}:{password}@{host}:{port}/{database}{parameter}'.format(
+        host=host, user=user, password=password, port=port, database=database, parameter=parameter or '')
+
+
+def _teradata_connect(user, password, host, port, database, parameter=None):
+    import teradatasql
+    return teradatasql.connect(None, host=host, user=user, password=password, database=database, dbs_port=str(port or 1025),
+                               **dict(p.split('=', 1) for p in (parameter or '').lstrip('?').split('&') if '=' in p))
+
+
+def _oracle_url(user, password, host, port, database, parameter=None):
+    import cx_Oracle
+    return 'oracle://{user}:{password}@{dsn}'.format(user=user, password=password, dsn=cx_Oracle.makedsn(host, port, service_name=database))
+
+
+def _oracle_connect(user, password, host, port, database, parameter=None):
+    import cx_Oracle
+    return cx_Oracle.connect(user, password, cx_Oracle.makedsn(host, port, service_name=database))
+
+
+def _postgres_url(user, password, host, port, database, parameter=None):
+    import psycopg2
+    return 'postgresql+psycopg2://{user}:{password}@{host}:{port}/{database}'.format(host=host, user=user, password=password, port=port, database=database)
+
+
+def _postgres_connect(user, password, host, port, database, parameter=None):
+    import psycopg2
+    return psycopg2.connect(host=host, user=user, password=password, port=port, dbname=database)
+
+
+def _mssql_url(user, password, host, port, database, parameter=None):
+    import pyodbc
+    return 'mssql+pyodbc://{user}:{password}@{host}:{port}/{database}?driver=SQL+Server+Native+Client+10.0'.format(
+        host=host, user=user, password=password, port=port, database=database)
+
+
+def _mssql_connect(user, password, host, port, database, parameter=None):
+    import pyodbc
+    return pyodbc.connect(driver=parameter, uid=user, pwd=password, server=host, database=database, port=port)
+
+
+def _mysql_url(user, password, host, port, database, parameter=None):
+    import pymysql
+    return 'mysql+pymysql://{user}:{password}@{host}:{port}/{database}'.format(host=host, user=user, password=password, port=port, database=database)
+
+
+def _mysql_connect(user, password, host, port, database, parameter=None):
+    import pymysql
+    return pymysql.connect(host=host, user=user, password=password, port=port, database=database)
+
+
+def _sqlite_url(user, password, host, port, database, parameter=None):
+    return 'sqlite://'
+
+
+def _sqlite_connect(user, password, host, port, database, parameter=None):
+    import sqlite3
+    return sqlite3.connect(database or ':memory:')
+
+
+register_dialect('teradata', url=_teradata_url, connect=_teradata_connect)
+register_dialect('oracle', url=_oracle_url, connect=_oracle_connect)
+register_dialect('postgres', url=_postgres_url, connect=_postgres_connect)
+register_dialect('mssql', url=_mssql_url, connect=_mssql_connect)
+register_dialect('mysql', url=_mysql_url, connect=_mysql_connect)
+register_dialect('sqlite', url=_sqlite_url, connect=_sqlite_connect)
@@ -0,0 +1,278 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+import os, sys, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pyblux.blux import Blux
+from pyblux import metrics
+from pyblux.logger import enabled
+from pyblux.columnar import conform_batch, widen_schema
+from typing import Callable
+
+# file extension and default compression per format
+_FORMATS = {
+    'parquet': ('.parquet', 'snappy'),
+    'csv':     ('.csv', 'gzip'),
+    'arrow':   ('.arrow', None),
+}
+
+_CSV_EXTENSIONS = {'gzip': '.gz', 'bz2': '.bz2', 'zstd': '.zst', 'lz4': '.lz4'}
+
+# directory name for rows whose partition column is NULL, as in Hive
+_NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+
+class _Sink:
+    """
+    One output file, opened on the first batch. Only its writer thread touches the file.
+    """
+
+    def __init__(self, path:str, format:str, schema, compression:str=None):
+        self.path = path
+        self.rows = 0
+        # rows routed to the file by the reading thread, ahead of what is written
+        self.planned = 0
+        self._format = format
+        self._schema = schema
+        self._compression = compression
+        self._writer = None
+        self._stream = None
+        self._opened = False
+
+    def write(self, batch):
+        if self._writer is None:
+            self.__open()
+        if self._format == 'parquet':
+            # one row group per batch
+            self._writer.write_batch(batch, row_group_size=max(1, batch.num_rows))
+        else:
+            self._writer.write_batch(batch)
+        self.rows += batch.num_rows
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    def widen(self, schema):
+        """
+        Switch to schema, where a later batch widened some column types (see widen_schema), rewriting the rows already in the file.
+        """
+        if schema.equals(self._schema):
+            return
+        self._schema = schema
+        if not self._opened:
+            return
+        closed = self._writer is None
+        if self._format == 'csv':
+            # the text already written reads back as the wider type: the rest of the file goes on without a header
+            if not closed:
+                import pyarrow.csv as pcsv
+                self._writer.close()
+                self._writer = pcsv.CSVWriter(self._stream, schema, write_options=pcsv.WriteOptions(include_header=False))
+            return
+        if not closed:
+            self._writer.close()
+        moved = self.path + '.widen'
+        os.replace(self.path, moved)
+        self.__open()
+        if self._format == 'parquet':
+            import pyarrow.parquet as pq
+            source = pq.ParquetFile(moved)
+            for i in range(source.num_row_groups):
+                group = source.read_row_group(i)
+                self._writer.write_table(group.cast(schema), row_group_size=max(1, group.num_rows))
+            source.close()
+        else:
+            import pyarrow as pa
+            with pa.OSFile(moved) as handle:
+                source = pa.ipc.open_file(handle)
+                for i in range(source.num_record_batches):
+                    self._writer.write_batch(conform_batch(source.get_batch(i), schema))
+        os.remove(moved)
+        if closed:
+            self.close()
+
+    def __open(self):
+        import pyarrow as pa
+        self._opened = True
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self._format == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self.path, self._schema, compression=self._compression or 'none')
+        elif self._format == 'csv':
+            import pyarrow.csv as pcsv
+            self._stream = pa.CompressedOutputStream(self.path, self._compression) if self._compression else pa.OSFile(self.path, 'wb')
+            self._writer = pcsv.CSVWriter(self._stream, self._schema)
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=self._compression, use_threads=True)
+            self._writer = pa.ipc.new_file(self.path, self._schema, options=options)
+
+
+def _split(batch, column:str):
+    """
+    Yield (value, rows) for each distinct value of column in the batch, grouped with one sort instead of one filter per value.
+    """
+    import numpy as np
+    import pyarrow.compute as pc
+    encoded = pc.dictionary_encode(batch.column(column))
+    codes = encoded.indices.fill_null(-1).to_numpy(zero_copy_only=False)
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    rows = batch.take(order)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(codes)) + 1))
+    ends = np.append(starts[1:], len(codes))
+    dictionary = encoded.dictionary
+    for start, end in zip(starts, ends):
+        code = int(codes[start])
+        yield (dictionary[code].as_py() if code >= 0 else None), rows.slice(start, end - start)
+
+
+def _without(batch, schema):
+    # the partition value is in the directory name, as with Hive and pyarrow.dataset, so files do not repeat the column
+    import pyarrow as pa
+    return pa.RecordBatch.from_arrays([batch.column(name) for name in schema.names], schema=schema)
+
+
+def _partition_name(column:str, value):
+    if value is None:
+        return '{}={}'.format(column, _NULL_PARTITION)
+    return '{}={}'.format(column, str(value).replace('/', '_').replace(os.sep, '_'))
+
+
+def export(blux:Blux, query:str, path:str, format:str='parquet', chunksize:int=100000, compression:str='default', partition_by:str=None,
+           max_rows:int=None, workers:int=1, params=None, verbose:bool=False, logger:Callable=print):
+    """
+    - export(blux, query, path, format, chunksize, compression, partition_by, max_rows, workers, params)
+    - Streams the result of query into files without building a dataframe: the cursor is read chunksize rows at a time
+      into arrow batches (Blux.iter_sql(output='arrow')) that are written as they arrive.
+    - format: 'parquet' (one row group per batch), 'csv' or 'arrow' (Arrow IPC file)
+    - compression: codec of the format, 'default' for snappy parquet, gzip csv and uncompressed arrow, None for none
+      (parquet: snappy, gzip, zstd, lz4, brotli; csv: gzip, bz2, zstd, lz4; arrow: zstd, lz4)
+    - partition_by: write one directory per value of this column under path (path/column=value/part-00000.parquet);
+      the column is only in the directory names, so pyarrow.parquet.read_table(path) restores it from them
+    - max_rows: start a new file after this many rows (path/part-00000.parquet, path/part-00001.parquet, ...)
+    - Columns the driver does not type take the type of their values; when a later batch widens one (all NULL to int64,
+      int64 to float64), the files already written are rewritten with the wider type, so every file has the same schema.
+    - path: the output file, or the output directory with partition_by or max_rows
+    - workers: threads compressing and writing files while the next batches are fetched, 0 to write on the calling thread.
+      Each file is written by one thread in order; several files (partitions, row-count parts) are written in parallel.
+      At most 2 x workers batches wait for their writer, so memory stays bounded by the chunksize.
+    >>> export(blux, "select * from sales.flights", '/data/flights', partition_by='flight_date', max_rows=5000000, workers=4)
+    - Returns (dict): rows, files (paths written), bytes (total file size) and seconds; no file is written for an empty result
+    """
+    log = verbose and enabled(logger)
+    if format not in _FORMATS:
+        raise ValueError("format must be one of {}, got {}".format(', '.join(_FORMATS), format))
+    extension, default = _FORMATS[format]
+    compression = default if compression == 'default' else compression
+    if format == 'csv' and compression:
+        extension += _CSV_EXTENSIONS.get(compression, '.' + compression)
+    split = partition_by is not None or max_rows is not None
+    executors = [ThreadPoolExecutor(max_workers=1, thread_name_prefix='pyblux-export') for _ in range(workers)]
+    pending = deque()
+    sinks = {}
+    # every file with its key, including the parts already closed
+    written = []
+    parts = {}
+    files = []
+    schema = None
+    file_schema = None
+    stats = {'rows': 0, 'files': files, 'bytes': 0, 'seconds': 0.0}
+    stdout=''
+    start = time.perf_counter()
+
+    def submit(key, call, *args):
+        if not executors:
+            call(*args)
+            return
+        pending.append(executors[hash(key) % len(executors)].submit(call, *args))
+        while len(pending) > 2 * len(executors):
+            pending.popleft().result()
+
+    def sink(key):
+        # key is the partition value, or None without partition_by
+        current = sinks.get(key)
+        if current is not None and (max_rows is None or current.planned < max_rows):
+            return current
+        if current is not None:
+            submit(key, current.close)
+        part = parts.get(key, 0)
+        parts[key] = part + 1
+        if not split:
+            target = path
+        else:
+            directory = os.path.join(path, _partition_name(partition_by, key)) if partition_by is not None else path
+            target = os.path.join(directory, 'part-{:05d}{}'.format(part, extension))
+        sinks[key] = _Sink(target, format, file_schema, compression)
+        written.append((key, sinks[key]))
+        files.append(target)
+        return sinks[key]
+
+    def route(key, batch):
+        while batch.num_rows:
+            current = sink(key)
+            room = batch.num_rows if max_rows is None else min(batch.num_rows, max_rows - current.planned)
+            current.planned += room
+            submit(key, current.write, batch.slice(0, room))
+            batch = batch.slice(room)
+
+    with metrics.operation('export', dialect=blux.dialect, format=format) as op:
+        if log:
+            logger("Attempting to export sql query...{} to {}".format(query, path))
+        try:
+            for batch in blux.iter_sql(query=query, chunksize=chunksize, verbose=verbose, logger=logger, params=params, output='arrow'):
+                widened = batch.schema if schema is None else widen_schema(schema, batch.schema)
+                if schema is None or not widened.equals(schema):
+                    # a column the driver does not type changed type (null to int64, int64 to float64): the files
+                    # written so far are rewritten with the wider types by their writer threads, before the next rows
+                    schema = widened
+                    file_schema = schema if partition_by is None else schema.remove(schema.get_field_index(partition_by))
+                    for key, current in written:
+                        submit(key, current.widen, file_schema)
+                batch = conform_batch(batch, schema)
+                if partition_by is not None:
+                    for value, rows in _split(batch, partition_by):
+                        route(value, _without(rows, file_schema))
+                else:
+                    route(None, batch)
+                stats['rows'] += batch.num_rows
+                op.chunk(batch.num_rows, batch.nbytes)
+                if log:
+                    logger("\n Exported chunk -- # of records-->:  {}".format(stats['rows']))
+            for key, current in sinks.items():
+                submit(key, current.close)
+            while pending:
+                pending.popleft().result()
+        except (Exception, SystemExit) as e:
+            stdout = (str(e) or type(e).__name__).split("\n")[0] + "\n"
+            if log:
+                logger("### Exception ### \n {}".format(stdout))
+            metrics.fail(stdout)
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=True)
+            if stdout:
+                # release the file handles of a failed export
+                for current in sinks.values():
+                    try:
+                        current.close()
+                    except Exception:
+                        pass
+        stats['bytes'] = sum(os.path.getsize(f) for f in files if os.path.exists(f))
+        op.rows = stats['rows']
+        op.bytes = stats['bytes']
+    stats['seconds'] = time.perf_counter() - start
+    if len(stdout)>0 and verbose:
+        sys.exit("### Exception ### \n {}".format(stdout))
+    elif len(stdout)>0:
+        sys.exit("### Exception - hint: verbose=True to have error details###")
+    if log:
+        logger("Completed export to {} -- # of records-->:  {} in {} files, {:.1f}s".format(path, stats['rows'], len(files), stats['seconds']))
+    return stats
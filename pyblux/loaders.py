@@ -0,0 +1,541 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+import io, os, struct, time, tempfile, decimal, threading
+from concurrent.futures import ThreadPoolExecutor
+from pyblux._lazy import numpy as np
+from pyblux._lazy import pandas as pd
+from typing import Callable
+from pyblux import metrics
+
+# PGCOPY binary header: signature, flags and header extension length
+_PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+_PGCOPY_TRAILER = struct.pack('!h', -1)
+# postgres timestamps count microseconds and dates days from 2000-01-01
+_PG_EPOCH_US = 946684800000000
+_PG_EPOCH_DAYS = 10957
+# type OIDs the binary encoder can write: bool, int8, int2, int4, float4, float8, date, timestamp, timestamptz and text types
+_PG_BINARY_OIDS = {16, 20, 21, 23, 700, 701, 1082, 1114, 1184, 25, 1042, 1043}
+_PG_WIDTHS = {21: '>i2', 23: '>i4', 20: '>i8', 700: '>f4', 701: '>f8'}
+
+# bulk loaders keyed on Blux.dialect
+LOADERS = {}
+
+
+class RejectedRowsError(Exception):
+    """
+    The database rejected some rows of a load and committed the others.
+    rejected holds (row offset in the dataframe, error message) for each rejected row, loaded the number of rows committed.
+    """
+
+    def __init__(self, table:str, loaded:int, rejected:list):
+        self.table = table
+        self.loaded = loaded
+        self.rejected = rejected
+        offsets = ', '.join(str(offset) for offset, _ in rejected[:10]) + (', ...' if len(rejected) > 10 else '')
+        super().__init__("{} rows rejected by {} ({} loaded), rows {}: {}".format(len(rejected), table, loaded, offsets,
+                                                                                  str(rejected[0][1]).split("\n")[0]))
+
+
+def register_loader(dialect:str, loader:Callable=None):
+    """
+    Register a bulk loader for a dialect, usable as a decorator:
+    >>> @register_loader('duckdb')
+    ... def duckdb_load(conn, dataframe, table, chunksize=100000, verbose=False, logger=print, **options):
+    ...     return rows_loaded
+    """
+    def decorator(func):
+        LOADERS[dialect] = func
+        return func
+    if loader is not None:
+        return decorator(loader)
+    return decorator
+
+
+def get_loader(dialect:str):
+    """
+    - get_loader(dialect)
+    - Returns (Callable): bulk loader registered for the dialect
+    """
+    if dialect not in LOADERS:
+        raise ValueError("No bulk loader registered for dialect {}".format(dialect))
+    return LOADERS[dialect]
+
+
+def records(chunk:pd.DataFrame, native_bool:bool=False):
+    """
+    - records(chunk, native_bool)
+    - Returns (list): chunk rows as tuples of python values, NaN/NaT as None and booleans as 0/1
+      so they bind to the numeric flag columns create_table_text generates (bit, number(1), byteint),
+      or as True/False with native_bool for drivers encoding boolean columns strictly (asyncpg binary COPY)
+    """
+    flags = {name: 'Int64' for name, dtype in chunk.dtypes.items() if pd.api.types.is_bool_dtype(dtype)}
+    if flags and not native_bool:
+        chunk = chunk.astype(flags)
+    values = chunk.astype(object).where(chunk.notna(), None)
+    for name, dtype in chunk.dtypes.items():
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            # drivers adapt datetime.datetime but not its pandas Timestamp subclass
+            values[name] = pd.Series([v.to_pydatetime() if v is not None else None for v in values[name]], index=values.index, dtype=object)
+    return list(values.itertuples(index=False, name=None))
+
+
+def report(logger:Callable, table:str, rows:int, start:float, final:bool=False):
+    """
+    Log rows loaded so far and throughput since start.
+    """
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed if elapsed > 0 else 0
+    if final:
+        logger("{} records loaded into {} in {:.1f}s -- {:.0f} rows/sec".format(rows, table, elapsed, rate))
+    else:
+        logger("{} records loaded -- {:.0f} rows/sec".format(rows, rate))
+
+
+class CopyStream(io.RawIOBase):
+    """
+    File-like producer for COPY FROM STDIN that encodes the dataframe one chunk at a time,
+    so only the chunk being sent is held in serialized form:
+    >>> cur.copy_expert("COPY t FROM STDIN WITH (FORMAT csv, DELIMITER E'\\t', NULL '')", CopyStream(df, chunksize=100000))
+    """
+
+    def __init__(self, dataframe:pd.DataFrame, chunksize:int=100000, binary:bool=False, verbose:bool=False, logger:Callable=print, oids:list=None):
+        """
+        Args:
+            dataframe (pd.DataFrame): source dataframe
+            chunksize (int): rows encoded per chunk
+            binary (bool): produce PGCOPY binary format instead of tab separated csv
+            oids (list): type OIDs of the target columns for binary format, derived from the dtypes when None
+            verbose (bool): report rows sent and throughput per chunk
+            logger (Callable): progress logger
+        """
+        self._dataframe = dataframe
+        self._chunksize = chunksize
+        self._binary = binary
+        self._oids = oids
+        self._verbose = verbose
+        self._logger = logger
+        self._chunks = iter(self.__chunks())
+        self._buffer = b''
+        self._offset = 0
+        self.rows = 0
+        self.bytes = 0
+        self._start = time.perf_counter()
+
+    def readable(self):
+        return True
+
+    def read(self, size:int=-1):
+        parts = []
+        wanted = size
+        while wanted != 0:
+            if self._offset >= len(self._buffer):
+                self._buffer, self._offset = next(self._chunks, b''), 0
+                if not self._buffer:
+                    break
+            end = len(self._buffer) if wanted < 0 else min(len(self._buffer), self._offset + wanted)
+            parts.append(self._buffer[self._offset:end])
+            if wanted > 0:
+                wanted -= end - self._offset
+            self._offset = end
+        data = b''.join(parts)
+        self.bytes += len(data)
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def __chunks(self):
+        if self._binary:
+            yield _PGCOPY_HEADER
+        for i in range(0, len(self._dataframe), self._chunksize):
+            chunk = self._dataframe.iloc[i:i+self._chunksize]
+            with metrics.phase('serialize'):
+                data = encode_binary(chunk, self._oids) if self._binary else encode_text(chunk)
+            # the chunk is timed until the driver asks for the next one, which includes sending this one
+            metrics.chunk(len(chunk), len(data))
+            yield data
+            self.rows += len(chunk)
+            if self._verbose:
+                elapsed = time.perf_counter() - self._start
+                self._logger("{} records sent -- {:.0f} rows/sec".format(self.rows, self.rows / elapsed if elapsed > 0 else 0))
+        if self._binary:
+            yield _PGCOPY_TRAILER
+
+
+def encode_text(chunk:pd.DataFrame):
+    """
+    - encode_text(chunk)
+    - Returns (bytes): chunk as tab separated csv, empty fields are NULL
+    """
+    return chunk.to_csv(sep='\t', header=False, index=False).encode('utf-8')
+
+
+def encode_binary(chunk:pd.DataFrame, oids:list=None):
+    """
+    - encode_binary(chunk, oids)
+    - Returns (bytes): chunk as PGCOPY binary tuples, each column written as the target type OID
+      (bool, smallint, integer, bigint, real, double precision, date, timestamp, timestamptz or text).
+      Without oids the type follows the dtype: int as bigint, float as double precision, datetime64 as timestamp, others as text.
+    """
+    oids = oids or [_default_oid(chunk.iloc[:, i]) for i in range(chunk.shape[1])]
+    columns = [_binary_column(chunk.iloc[:, i], oid) for i, oid in enumerate(oids)]
+    count = struct.pack('!h', chunk.shape[1])
+    out = io.BytesIO()
+    for row in zip(*columns):
+        out.write(count)
+        out.write(b''.join(row))
+    return out.getvalue()
+
+
+def _default_oid(col:pd.Series):
+    if pd.api.types.is_bool_dtype(col):
+        return 16
+    if pd.api.types.is_integer_dtype(col):
+        return 20
+    if pd.api.types.is_float_dtype(col):
+        return 701
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return 1184 if col.dt.tz is not None else 1114
+    return 25
+
+
+def _fixed(raw:bytes, width:int, count:int):
+    prefix = struct.pack('!i', width)
+    return [prefix + raw[i*width:(i+1)*width] for i in range(count)]
+
+
+def _binary_column(col:pd.Series, oid:int=25):
+    """
+    Encode one column to a list of length-prefixed PGCOPY fields for the target type OID.
+    """
+    null = struct.pack('!i', -1)
+    mask = col.isna().to_numpy()
+    if oid == 16:
+        values = [struct.pack('!i?', 1, v) for v in col.to_numpy(dtype=bool, na_value=False)]
+    elif oid in (20, 21, 23):
+        raw = col.to_numpy(dtype='int64', na_value=0).astype(_PG_WIDTHS[oid]).tobytes()
+        values = _fixed(raw, int(_PG_WIDTHS[oid][-1]), len(col))
+    elif oid in (700, 701):
+        raw = col.to_numpy(dtype='float64', na_value=np.nan).astype(_PG_WIDTHS[oid]).tobytes()
+        values = _fixed(raw, int(_PG_WIDTHS[oid][-1]), len(col))
+    elif oid in (1082, 1114, 1184):
+        stamps = col if pd.api.types.is_datetime64_any_dtype(col) else pd.to_datetime(col)
+        if stamps.dt.tz is not None:
+            stamps = stamps.dt.tz_convert('UTC').dt.tz_localize(None)
+        if oid == 1082:
+            raw = (stamps.to_numpy(dtype='datetime64[D]').astype('int64') - _PG_EPOCH_DAYS).astype('>i4').tobytes()
+            values = _fixed(raw, 4, len(col))
+        else:
+            raw = (stamps.to_numpy(dtype='datetime64[us]').astype('int64') - _PG_EPOCH_US).astype('>i8').tobytes()
+            values = _fixed(raw, 8, len(col))
+    else:
+        values = []
+        for v in col.astype(object).to_numpy():
+            data = str(v).encode('utf-8')
+            values.append(struct.pack('!i', len(data)) + data)
+    return [null if m else v for v, m in zip(values, mask)]
+
+
+@register_loader('postgres')
+def copy_load(conn, dataframe:pd.DataFrame, table:str, chunksize:int=100000, binary:bool=False, verbose:bool=False, logger:Callable=print, **options):
+    """
+    - copy_load(conn, dataframe, table, chunksize, binary)
+    - Streams the dataframe into a postgres table with COPY FROM STDIN, encoding chunksize rows at a time.
+      Binary format writes each value as the type of its target column; tables with other column types (numeric, json, ...)
+      are loaded in csv format instead.
+    - Returns (int): number of rows loaded
+    """
+    cur = conn.cursor()
+    oids = None
+    if binary:
+        cur.execute("SELECT * FROM {} LIMIT 0".format(table))
+        oids = [desc[1] for desc in cur.description]
+        if not set(oids) <= _PG_BINARY_OIDS or len(oids) != dataframe.shape[1]:
+            if verbose:
+                logger("Column types of {} have no binary encoder, using csv COPY".format(table))
+            binary = False
+    if binary:
+        copy_sql = "COPY {} FROM STDIN WITH (FORMAT binary)".format(table)
+    else:
+        copy_sql = "COPY {} FROM STDIN WITH (FORMAT csv, DELIMITER E'\\t', NULL '')".format(table)
+    stream = CopyStream(dataframe, chunksize=chunksize, binary=binary, verbose=verbose, logger=logger, oids=oids)
+    try:
+        with metrics.phase('load'):
+            cur.copy_expert(copy_sql, stream, size=1024 * 1024)
+        with metrics.phase('commit'):
+            conn.commit()
+        metrics.current().bytes = stream.bytes
+    finally:
+        cur.close()
+    if verbose:
+        logger("{:.1f} MB sent".format(stream.bytes / 1e6))
+        report(logger, table, stream.rows, stream._start, final=True)
+    return stream.rows
+
+
+@register_loader('mssql')
+def mssql_load(conn, dataframe:pd.DataFrame, table:str, chunksize:int=100000, verbose:bool=False, logger:Callable=print, **options):
+    """
+    - mssql_load(conn, dataframe, table, chunksize)
+    - pyodbc executemany with fast_executemany, sending each chunk as one parameter array
+    - Returns (int): number of rows loaded
+    """
+    start = time.perf_counter()
+    rows = 0
+    insert_str = "INSERT INTO {} VALUES ({})".format(table, ", ".join(["?"] * dataframe.shape[1]))
+    cur = conn.cursor()
+    try:
+        cur.fast_executemany = True
+        for i in range(0, len(dataframe), chunksize):
+            chunk = dataframe.iloc[i:i+chunksize]
+            with metrics.phase('load'):
+                cur.executemany(insert_str, records(chunk))
+            metrics.chunk(len(chunk))
+            rows += len(chunk)
+            if verbose:
+                report(logger, table, rows, start)
+        with metrics.phase('commit'):
+            conn.commit()
+    finally:
+        cur.close()
+    if verbose:
+        report(logger, table, rows, start, final=True)
+    return rows
+
+
+@register_loader('mysql')
+def mysql_load(conn, dataframe:pd.DataFrame, table:str, chunksize:int=100000, verbose:bool=False, logger:Callable=print, **options):
+    """
+    - mysql_load(conn, dataframe, table, chunksize)
+    - Streams the dataframe chunk by chunk into a temp file and loads it with LOAD DATA LOCAL INFILE.
+      The connection must allow it (pymysql.connect(local_infile=True), ?local_infile=1 in the SQLAlchemy url).
+    - Returns (int): number of rows loaded
+    """
+    start = time.perf_counter()
+    rows = 0
+    handle, path = tempfile.mkstemp(suffix='.tsv', prefix='pyblux_')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            for i in range(0, len(dataframe), chunksize):
+                chunk = dataframe.iloc[i:i+chunksize]
+                flags = {name: 'Int64' for name, dtype in chunk.dtypes.items() if pd.api.types.is_bool_dtype(dtype)}
+                if flags:
+                    chunk = chunk.astype(flags)
+                # an unquoted NULL is read as null when fields are enclosed and not escaped
+                with metrics.phase('serialize'):
+                    output.write(chunk.to_csv(sep='\t', header=False, index=False, na_rep='NULL').encode('utf-8'))
+                metrics.chunk(len(chunk))
+                rows += len(chunk)
+        cur = conn.cursor()
+        try:
+            with metrics.phase('load'):
+                cur.execute("""LOAD DATA LOCAL INFILE '{}' INTO TABLE {} CHARACTER SET utf8mb4
+                               FIELDS TERMINATED BY '\\t' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+                               LINES TERMINATED BY '\\n'""".format(path.replace('\\', '/'), table))
+            with metrics.phase('commit'):
+                conn.commit()
+        finally:
+            cur.close()
+    finally:
+        os.remove(path)
+    if verbose:
+        report(logger, table, rows, start, final=True)
+    return rows
+
+
+@register_loader('oracle')
+def oracle_load(conn, dataframe:pd.DataFrame, table:str, chunksize:int=100000, verbose:bool=False, logger:Callable=print, **options):
+    """
+    - oracle_load(conn, dataframe, table, chunksize)
+    - cx_Oracle array DML: executemany per chunk with batcherrors so bad rows are collected instead of aborting the load.
+      The other rows are committed, then RejectedRowsError lists the rejected ones (row offset, message).
+    - Returns (int): number of rows loaded
+    """
+    start = time.perf_counter()
+    rows = 0
+    errors = []
+    insert_str = "INSERT INTO {} VALUES ({})".format(table, ", ".join([":{}".format(i + 1) for i in range(dataframe.shape[1])]))
+    cur = conn.cursor()
+    try:
+        for i in range(0, len(dataframe), chunksize):
+            chunk = dataframe.iloc[i:i+chunksize]
+            with metrics.phase('load'):
+                cur.executemany(insert_str, records(chunk), batcherrors=True)
+            metrics.chunk(len(chunk))
+            batch_errors = cur.getbatcherrors()
+            errors += [(i + error.offset, error.message) for error in batch_errors]
+            rows += len(chunk) - len(batch_errors)
+            if verbose:
+                report(logger, table, rows, start)
+        with metrics.phase('commit'):
+            conn.commit()
+    finally:
+        cur.close()
+    if verbose:
+        for offset, message in errors:
+            logger("Row {} rejected: {}".format(offset, message))
+        report(logger, table, rows, start, final=True)
+    if errors:
+        raise RejectedRowsError(table, rows, errors)
+    return rows
+
+
+@register_loader('sqlite')
+def sqlite_load(conn, dataframe:pd.DataFrame, table:str, chunksize:int=100000, verbose:bool=False, logger:Callable=print, **options):
+    """
+    - sqlite_load(conn, dataframe, table, chunksize)
+    - Batched executemany inside a single transaction with synchronous writes turned off for the load
+    - Returns (int): number of rows loaded
+    """
+    start = time.perf_counter()
+    rows = 0
+    insert_str = "INSERT INTO {} VALUES ({})".format(table, ", ".join(["?"] * dataframe.shape[1]))
+    cur = conn.cursor()
+    try:
+        cur.execute("PRAGMA synchronous")
+        synchronous = cur.fetchone()[0]
+        cur.execute("PRAGMA synchronous = OFF")
+        cur.execute("PRAGMA temp_store = MEMORY")
+        try:
+            for i in range(0, len(dataframe), chunksize):
+                chunk = dataframe.iloc[i:i+chunksize]
+                # sqlite3 cannot bind Decimal, numeric columns store it as a number anyway
+                with metrics.phase('load'):
+                    cur.executemany(insert_str, [tuple(float(v) if isinstance(v, decimal.Decimal) else v for v in row) for row in records(chunk)])
+                metrics.chunk(len(chunk))
+                rows += len(chunk)
+                if verbose:
+                    report(logger, table, rows, start)
+            with metrics.phase('commit'):
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.execute("PRAGMA synchronous = {}".format(synchronous))
+    finally:
+        cur.close()
+    if verbose:
+        report(logger, table, rows, start, final=True)
+    return rows
+
+
+@register_loader('teradata')
+def teradata_load(conn, dataframe:pd.DataFrame, table:str, chunksize:int=100000, verbose:bool=False, logger:Callable=print,
+                  mode:str='insert', sessions:int=1, errlimit:int=1, connection:Callable=None, warnings:list=None, errors:list=None,
+                  logons:list=None, **options):
+    """
+    - teradata_load(conn, dataframe, table, chunksize, mode, sessions)
+    - mode='insert': batched executemany per chunk in one transaction
+    - mode='fastload': {fn teradata_require_fastload} inserts; the FastLoad job begins with the first chunk and ends
+      loading at commit. The target table must be empty and FastLoad sessions are set on the connection (parameter='?sessions=8').
+    - sessions: with mode='insert' and a pooled engine (connection), split the dataframe across that many sessions in parallel.
+      Each session commits its own slice: when one fails, slices not started yet are skipped, the committed slices stay
+      loaded, and the error names their row ranges so the rest can be reloaded.
+    - Warnings and errors are collected once per load instead of once per chunk and appended to warnings/errors.
+    - Returns (int): number of rows sent
+    """
+    if mode not in ('insert', 'fastload'):
+        raise ValueError("Unknown teradata load mode {}".format(mode))
+    if sessions > 1 and mode == 'insert' and connection is not None and len(dataframe) > chunksize:
+        step = -(-len(dataframe) // sessions)
+        slices = [dataframe.iloc[i:i+step] for i in range(0, len(dataframe), step)]
+        if verbose:
+            logger("Loading {} slices over {} sessions in parallel...".format(len(slices), sessions))
+        start = time.perf_counter()
+
+        failed = threading.Event()
+
+        def load_slice(part):
+            if failed.is_set():
+                return None
+            try:
+                with connection() as session:
+                    return teradata_load(session, part, table, chunksize=chunksize, verbose=verbose, logger=logger, mode=mode,
+                                         errlimit=errlimit, warnings=warnings, errors=errors, logons=logons)
+            except Exception:
+                failed.set()
+                raise
+
+        with ThreadPoolExecutor(max_workers=sessions) as executor:
+            futures = [executor.submit(load_slice, part) for part in slices]
+        outcomes = [(i * step, f.exception() or f.result()) for i, f in enumerate(futures)]
+        error = next((outcome for _, outcome in outcomes if isinstance(outcome, Exception)), None)
+        if error is not None:
+            committed = [(offset, outcome) for offset, outcome in outcomes if isinstance(outcome, int)]
+            raise RuntimeError("Load into {} failed: {}; {} rows committed by the other sessions (rows {})".format(
+                table, str(error).split("\n")[0], sum(n for _, n in committed),
+                ', '.join('{}-{}'.format(offset, offset + n - 1) for offset, n in committed) or 'none')) from error
+        rows = sum(outcome for _, outcome in outcomes)
+        if verbose:
+            report(logger, table, rows, start, final=True)
+        return rows
+
+    warnings = warnings if warnings is not None else []
+    errors = errors if errors is not None else []
+    logons = logons if logons is not None else []
+    start = time.perf_counter()
+    rows = 0
+    insert_str = "INSERT INTO {} ({})".format(table, ", ".join(["?"] * dataframe.shape[1]))
+    escape = "{fn teradata_require_fastload}" if mode == 'fastload' else ""
+    with conn.cursor() as cur:
+        cur.execute("{fn teradata_nativesql}{fn teradata_autocommit_off}")
+        if verbose:
+            logger("Autocommit turned off \n")
+            logger("Attempting to {} {} records into {}...".format(mode, len(dataframe), table))
+        try:
+            for i in range(0, len(dataframe), chunksize):
+                chunk = dataframe.iloc[i:i+chunksize]
+                with metrics.phase('load'):
+                    cur.executemany(escape + insert_str, records(chunk))
+                metrics.chunk(len(chunk))
+                rows += len(chunk)
+                if verbose:
+                    report(logger, table, rows, start)
+            # diagnostics are matched on the statement text, escape included
+            _teradata_diagnostics(cur, escape + insert_str, errlimit, warnings, errors, logons)
+            # commit ends the FastLoad loading phase
+            with metrics.phase('commit'):
+                conn.commit()
+            if mode == 'fastload':
+                _teradata_diagnostics(cur, escape + insert_str, errlimit, warnings, errors, logons)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            try:
+                cur.execute("{fn teradata_nativesql}{fn teradata_autocommit_on}")
+            except Exception as e:
+                # keep the load error; a session left without autocommit is discarded by the pool instead of reused
+                if hasattr(conn, 'invalidate'):
+                    conn.invalidate()
+                if verbose:
+                    logger("Autocommit not restored: {}".format(str(e).split("\n")[0]))
+    if verbose:
+        flat_warnings = [item for sublist in warnings for item in sublist if item]
+        flat_errors = [item for sublist in errors for item in sublist if item]
+        if flat_warnings or flat_errors:
+            logger("\n Warnings or errors detected. \n")
+            logger("\n Warnings: {}\n".format(flat_warnings))
+            logger("\n Errors: {} \n".format(flat_errors))
+        else:
+            logger("\nFinished. No warnings or errors detected. \n")
+        report(logger, table, rows, start, final=True)
+    return rows
+
+
+def _teradata_diagnostics(cur, insert_str:str, errlimit:int, warnings:list, errors:list, logons:list):
+    """
+    Fetch the warnings and errors of the load, and the logon sequence number that locates the error tables.
+    """
+    cur.execute("{fn teradata_nativesql}{fn teradata_get_warnings}" + "ERRLIMIT {};".format(errlimit) + insert_str)
+    warnings += cur.fetchall()
+    cur.execute("{fn teradata_nativesql}{fn teradata_get_errors}" + insert_str)
+    err = cur.fetchall()
+    errors += err
+    if any(item for row in err for item in row):
+        cur.execute("{fn teradata_nativesql}{fn teradata_logon_sequence_number}" + insert_str)
+        logons += cur.fetchall()
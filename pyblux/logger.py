@@ -1,52 +1,164 @@
 #!/bin/python
 # -*- coding: utf-8 -*-
-import os, logging
-from datetime import datetime, timedelta
-from urllib.parse import urlparse
-import time 
- 
- 
+import os, json, queue, atexit, logging, threading
+import logging.handlers
+from typing import Callable
+
+_FORMAT = '%(asctime)s-%(levelname)s-%(module)s: line:%(lineno)s  %(message)s'
+
+# level of each logging.Logger method passed as a pyblux logger callable
+_METHOD_LEVELS = {'debug': logging.DEBUG, 'info': logging.INFO, 'warning': logging.WARNING, 'warn': logging.WARNING,
+                  'error': logging.ERROR, 'exception': logging.ERROR, 'critical': logging.CRITICAL, 'fatal': logging.CRITICAL}
+
+# listeners started by Logger.logger(), one per logger name
+_listeners = {}
+_lock = threading.Lock()
+
+
+def enabled(logger:Callable):
+    """
+    - enabled(logger)
+    - logger: a pyblux logger callable, e.g. print or log.debug
+    - Returns (boolean): False when logger is a method of a logging.Logger whose level drops its records,
+      so callers can skip building the message
+    """
+    target = getattr(logger, '__self__', None)
+    if not isinstance(target, (logging.Logger, logging.LoggerAdapter)):
+        return True
+    level = _METHOD_LEVELS.get(getattr(logger, '__name__', ''))
+    return level is None or target.isEnabledFor(level)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line: time, level, logger, module, line, message and exception,
+    plus any extra={...} fields given to the logging call.
+    """
+
+    _RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+    def format(self, record:logging.LogRecord):
+        data = {'time': self.formatTime(record), 'level': record.levelname, 'logger': record.name, 'module': record.module,
+                'line': record.lineno, 'message': record.getMessage()}
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        for key, value in record.__dict__.items():
+            if key not in self._RESERVED and not key.startswith('_'):
+                data[key] = value
+        return json.dumps(data, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # records stay in this process, so formatting is left to the listener thread instead of the caller
+    def prepare(self, record:logging.LogRecord):
+        return record
+
 
 class Logger:
     """
-    This class connects to a local database session using the db `connnection` library.
+    This class sets up a named logger writing to a log file and the console.
+    Records are put on a queue and written by a background listener thread, so logging calls never wait on disk I/O.
+    Calling logger() again for the same name returns the configured logger without adding handlers:
+    >>> log = Logger(logname='etl', filename='/var/log/etl/etl.log', rotate='size', max_bytes=50 * 2**20, json=True).logger()
+    >>> blux.sql(dataframe=df, table=table, verbose=True, logger=log.debug)   # messages are not built while DEBUG is disabled
     """
 
-    def __init__(self, logname:str, filename:str, level=logging.INFO, console:bool=True):
+    def __init__(self, logname:str, filename:str, level=logging.INFO, console:bool=True, rotate:str=None, max_bytes:int=10 * 2**20,
+                 backup_count:int=5, when:str='midnight', json:bool=False):
         """
         Args:
             logname (str): Logger Name.
-            filename (str): log file path 
+            filename (str): log file path
             level (str): Logger Level (DEBUG, INFO, WARNING, ERROR)
             console (cool): print to console
+            rotate (str): None, 'size' to rotate at max_bytes or 'time' to rotate at when
+            max_bytes (int): log file size that triggers a rotation with rotate='size'
+            backup_count (int): rotated files kept
+            when (str): rotation interval with rotate='time' ('S', 'M', 'H', 'D', 'midnight', 'W0'-'W6')
+            json (bool): write one JSON object per record instead of text lines
         """
         self._logname = logname
         self._filename = filename
         self._level = level
         self._console = console
-    
-    def logger(self, verbose:bool=False): 
-        directory = os.path.dirname(self._filename)
-        if verbose:
-            print("File Name -->",self._filename)
-            print("Directory --> ",directory)
-        if not os.path.exists(directory):
-            if verbose:
-                print("Directory --> ",directory)
-            os.makedirs(directory)
+        self._rotate = rotate
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._when = when
+        self._json = json
+
+    def logger(self, verbose:bool=False):
+        """
+        - logger(verbose)
+        - Returns (logging.Logger): the named logger, configured once per name
+        """
         logger = logging.getLogger(self._logname)
-        handler = logging.FileHandler(self._filename)
-        formatter = logging.Formatter('%(asctime)s-%(levelname)s-%(module)s: line:%(lineno)s  %(message)s')
-        handler.setFormatter(formatter)
         logger.setLevel(self._level)
-        logger.addHandler(handler)
+        with _lock:
+            if self._logname in _listeners:
+                if verbose:
+                    print("logger already configured --> ", logger)
+                return logger
+            handlers = [self.__file_handler(verbose)]
+            if self._console:
+                console = logging.StreamHandler()
+                console.setLevel(logging.INFO)
+                console.setFormatter(self.__formatter())
+                handlers.append(console)
+            # respect_handler_level keeps the console at INFO when the logger is set to DEBUG
+            listener = logging.handlers.QueueListener(queue.SimpleQueue(), *handlers, respect_handler_level=True)
+            logger.addHandler(_QueueHandler(listener.queue))
+            listener.start()
+            _listeners[self._logname] = listener
         if verbose:
             print("logger.addHandler --> ",logger)
-        if self._console:
-            console = logging.StreamHandler()
-            console.setLevel(logging.INFO)
-            formatter = logging.Formatter('%(asctime)s-%(levelname)s-%(module)s: line:%(lineno)s  %(message)s')
-            console.setFormatter(formatter)
-            logger.addHandler(console)
         return logger
- 
\ No newline at end of file
+
+    def close(self):
+        """
+        Write the queued records, stop the listener thread and close the handlers of the logger.
+        """
+        stop(self._logname)
+
+    def __formatter(self):
+        return JsonFormatter() if self._json else logging.Formatter(_FORMAT)
+
+    def __file_handler(self, verbose:bool=False):
+        directory = os.path.dirname(self._filename)
+        if verbose:
+            print("File Name -->",self._filename)
+            print("Directory --> ",directory)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        if self._rotate == 'size':
+            handler = logging.handlers.RotatingFileHandler(self._filename, maxBytes=self._max_bytes, backupCount=self._backup_count)
+        elif self._rotate == 'time':
+            handler = logging.handlers.TimedRotatingFileHandler(self._filename, when=self._when, backupCount=self._backup_count)
+        elif self._rotate is None:
+            handler = logging.FileHandler(self._filename)
+        else:
+            raise ValueError("rotate must be None, 'size' or 'time', got {}".format(self._rotate))
+        handler.setFormatter(self.__formatter())
+        return handler
+
+
+def stop(logname:str=None):
+    """
+    - stop(logname)
+    - Flush and stop the listener of logname, or of every logger configured by Logger when logname is None
+    """
+    with _lock:
+        names = [logname] if logname is not None else list(_listeners)
+        for name in names:
+            listener = _listeners.pop(name, None)
+            if listener is None:
+                continue
+            logger = logging.getLogger(name)
+            for handler in [h for h in logger.handlers if isinstance(h, _QueueHandler)]:
+                logger.removeHandler(handler)
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+
+
+atexit.register(stop)
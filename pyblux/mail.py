@@ -0,0 +1,243 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+import os, html, zlib, base64, mimetypes, threading
+from concurrent.futures import ThreadPoolExecutor
+from email.header import Header
+from email.utils import formatdate, make_msgid
+from pyblux._lazy import pandas as pd
+from typing import Callable
+
+# report table style, same look as the former pandas Styler output; declared once instead of per cell
+_TABLE_STYLE = ('<style>table.pyblux{border-collapse:collapse}'
+                'table.pyblux th{font-size:9pt;font-family:Calibri;padding:8px;text-align:left;vertical-align:bottom;border-bottom:1px solid black}'
+                'table.pyblux td{border-bottom:1px solid #ddd;font-size:9pt;font-family:Calibri;padding:8px;width:75px}</style>')
+
+# raw bytes per base64 line (76 characters) and lines sent per socket write
+_B64_LINE = 57
+_B64_LINES_PER_WRITE = 1024
+_READ_SIZE = _B64_LINE * _B64_LINES_PER_WRITE
+
+
+def html_table(df:pd.DataFrame, precision:int=2, index:bool=False):
+    """
+    - html_table(df, precision, index)
+    - Builds the report table column by column with vectorized string operations instead of pandas Styler,
+      so large frames render in a fraction of the time; floats are rounded to precision digits
+    - Returns (string): HTML style block and table
+    """
+    if index:
+        df = df.reset_index()
+    cells = []
+    for name, col in df.items():
+        if pd.api.types.is_float_dtype(col):
+            text = col.map(('{:.%df}' % precision).format, na_action='ignore')
+        else:
+            text = col.astype(object).where(col.notna(), None).map(str, na_action='ignore')
+        text = text.fillna('').astype(str).map(html.escape)
+        cells.append('<td>' + text + '</td>')
+    header = ''.join('<th>{}</th>'.format(html.escape(str(name))) for name in df.columns)
+    body = ''
+    if cells:
+        rows = cells[0]
+        for cell in cells[1:]:
+            rows = rows + cell
+        body = ''.join('<tr>' + rows + '</tr>')
+    return '{}<table class="pyblux"><thead><tr>{}</tr></thead><tbody>{}</tbody></table>'.format(_TABLE_STYLE, header, body)
+
+
+def _b64_lines(blocks):
+    # re-block the input to whole 57 byte groups so every encoded line is 76 characters
+    pending = b''
+    for block in blocks:
+        pending += block
+        size = len(pending) - len(pending) % _B64_LINE
+        if size:
+            data, pending = pending[:size], pending[size:]
+            yield b''.join(base64.b64encode(data[i:i + _B64_LINE]) + b'\r\n' for i in range(0, size, _B64_LINE))
+    if pending:
+        yield base64.b64encode(pending) + b'\r\n'
+
+
+def _read_blocks(source, compress:bool=False):
+    handle = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    try:
+        while True:
+            block = handle.read(_READ_SIZE)
+            if not block:
+                break
+            block = gzip.compress(block) if gzip else block
+            if block:
+                yield block
+        if gzip:
+            yield gzip.flush()
+    finally:
+        if handle is not source:
+            handle.close()
+
+
+def _header(value:str):
+    value = ' '.join(str(value).splitlines())
+    return Header(value, 'utf-8').encode() if not value.isascii() else value
+
+
+def message_chunks(sender:str, receivers:list, subject:str, body_html:str, attachments:list=None, compress:bool=False):
+    """
+    - message_chunks(sender, receivers, subject, body_html, attachments, compress)
+    - attachments: file paths, or (filename, file object) pairs
+    - compress: gzip each attachment while it is encoded (filename.gz)
+    - Returns (generator): the MIME message as bytes blocks; attachments are read and base64 encoded block by block
+    """
+    boundary = 'pyblux-' + make_msgid().strip('<>').replace('@', '.')
+    headers = ['From: {}'.format(_header(sender)), 'To: {}'.format(_header(', '.join(receivers))), 'Subject: {}'.format(_header(subject)),
+               'Date: {}'.format(formatdate(localtime=True)), 'Message-ID: {}'.format(make_msgid()), 'MIME-Version: 1.0',
+               'Content-Type: multipart/mixed; boundary="{}"'.format(boundary)]
+    yield ('\r\n'.join(headers) + '\r\n\r\n').encode('utf-8')
+    yield ('--{}\r\nContent-Type: text/html; charset="utf-8"\r\nContent-Transfer-Encoding: base64\r\n\r\n'.format(boundary)).encode('ascii')
+    yield from _b64_lines([body_html.encode('utf-8')])
+    for attachment in attachments or []:
+        name, source = (os.path.basename(attachment), attachment) if isinstance(attachment, (str, os.PathLike)) else attachment
+        content_type = 'application/gzip' if compress else (mimetypes.guess_type(str(name))[0] or 'application/octet-stream')
+        filename = str(name) + ('.gz' if compress else '')
+        yield ('--{}\r\nContent-Type: {}\r\nContent-Transfer-Encoding: base64\r\nContent-Disposition: attachment; filename="{}"\r\n\r\n'
+               .format(boundary, content_type, filename.replace('"', ''))).encode('utf-8')
+        yield from _b64_lines(_read_blocks(source, compress))
+    yield '--{}--\r\n'.format(boundary).encode('ascii')
+
+
+class MailSender:
+    """
+    This class keeps one SMTP session open for a batch of messages and streams each message to the server,
+    so attachments are never held in memory whole:
+    >>> with MailSender('smtp.example.com', 587, user='etl', password='...') as mailer:
+    ...     for region, report in reports.items():
+    ...         mailer.send(sender, receivers[region], 'Daily report ' + region, 'See attached', df=report.head(50), attachments=[paths[region]], compress=True)
+    submit() sends in the background and returns a Future; messages are sent one at a time on the session.
+    """
+
+    def __init__(self, server:str, port:int=587, user:str=None, password:str=None, starttls:bool=True, ssl:bool=False, timeout:float=60,
+                 precision:int=2, logger:Callable=None):
+        """
+        Args:
+            server (str): SMTP host
+            port (int): SMTP port
+            user (str): login user, None to send without authentication
+            password (str): login password
+            starttls (bool): upgrade the session with STARTTLS (ignored with ssl=True)
+            ssl (bool): connect with SMTP over SSL (port 465)
+            timeout (float): socket timeout in seconds
+            precision (int): float digits in rendered dataframes
+            logger (Callable): reports messages that failed in the background, None to stay silent
+        """
+        self._server = server
+        self._port = port
+        self._user = user
+        self._password = password
+        self._starttls = starttls
+        self._ssl = ssl
+        self._timeout = timeout
+        self._precision = precision
+        self._logger = logger
+        self._smtp = None
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def send(self, sender:str, receivers:list, subject:str, body_text:str='', attachments:list=None, df:pd.DataFrame=None, compress:bool=False):
+        """
+        - send(sender, receivers, subject, body_text, attachments, df, compress)
+        - df: dataframe rendered as an HTML table under the text
+        - Returns (dict): refused recipients and their SMTP error, empty when all were accepted
+        """
+        table = html_table(df, precision=self._precision) if df is not None else ''
+        body = '<html><body><p>{} <br>{}</p></body></html>'.format(body_text, table)
+        with self._lock:
+            try:
+                return self.__send(sender, receivers, body, subject, attachments, compress)
+            except Exception as e:
+                import smtplib
+                if not isinstance(e, (smtplib.SMTPServerDisconnected, ConnectionError)):
+                    raise
+                # the server closed an idle session: reconnect once
+                self.__disconnect()
+                return self.__send(sender, receivers, body, subject, attachments, compress)
+
+    def submit(self, *args, **kwargs):
+        """
+        Send in the background with the arguments of send().
+        - Returns (concurrent.futures.Future): result of send()
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pyblux-mail')
+        future = self._executor.submit(self.send, *args, **kwargs)
+        if self._logger is not None:
+            future.add_done_callback(lambda f: f.exception() and self._logger("### Mail not sent ### \n {}".format(f.exception())))
+        return future
+
+    def close(self):
+        """
+        Wait for the background messages and end the SMTP session.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            self.__disconnect()
+
+    def __connect(self):
+        import smtplib
+        if self._ssl:
+            smtp = smtplib.SMTP_SSL(self._server, self._port, timeout=self._timeout)
+        else:
+            smtp = smtplib.SMTP(self._server, self._port, timeout=self._timeout)
+            smtp.ehlo()
+            if self._starttls:
+                smtp.starttls()
+                smtp.ehlo()
+        if self._user:
+            smtp.login(self._user, self._password)
+        return smtp
+
+    def __disconnect(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                self._smtp.close()
+            self._smtp = None
+
+    def __send(self, sender:str, receivers:list, body:str, subject:str, attachments:list, compress:bool):
+        import smtplib
+        if self._smtp is None:
+            self._smtp = self.__connect()
+        smtp = self._smtp
+        code, response = smtp.mail(sender)
+        if code != 250:
+            smtp.rset()
+            raise smtplib.SMTPSenderRefused(code, response, sender)
+        refused = {}
+        for receiver in receivers:
+            code, response = smtp.rcpt(receiver)
+            if code not in (250, 251):
+                refused[receiver] = (code, response)
+        if len(refused) == len(receivers):
+            smtp.rset()
+            raise smtplib.SMTPRecipientsRefused(refused)
+        code, response = smtp.docmd('DATA')
+        if code != 354:
+            smtp.rset()
+            raise smtplib.SMTPDataError(code, response)
+        # every part is base64, so no line of the stream starts with a dot that would need stuffing
+        for chunk in message_chunks(sender, receivers, subject, body, attachments, compress):
+            smtp.sock.sendall(chunk)
+        smtp.sock.sendall(b'.\r\n')
+        code, response = smtp.getreply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, response)
+        return refused
@@ -0,0 +1,57 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+from pyblux._lazy import pandas as pd
+from pyblux.ddl import quote
+
+
+def row_hash(dataframe:pd.DataFrame, keys:list):
+    """
+    - row_hash(dataframe, keys)
+    - Returns (pd.Series): signed 64 bit hash of the non key columns of each row
+    """
+    values = [c for c in dataframe.columns if c not in keys]
+    hashes = pd.util.hash_pandas_object(dataframe[values] if values else dataframe[keys], index=False)
+    return pd.Series(hashes.values.view('int64'), index=dataframe.index)
+
+
+def unchanged_statement(table:str, staging:str, keys:list, hash_column:str, dialect:str=None):
+    """
+    - unchanged_statement(table, staging, keys, hash_column, dialect)
+    - Returns (string): DELETE of the staged rows whose key and row hash are already in the target table
+    """
+    # the staging table is referenced by its unqualified name, which every dialect exposes
+    exposed = staging.split('.')[-1]
+    match = ' AND '.join('tgt.{0} = {1}.{0}'.format(quote(c, dialect), exposed) for c in list(keys) + [hash_column])
+    return "DELETE FROM {0} WHERE EXISTS (SELECT 1 FROM {1} tgt WHERE {2})".format(staging, table, match)
+
+
+def merge_statement(table:str, staging:str, columns:list, keys:list, dialect:str=None):
+    """
+    - merge_statement(table, staging, columns, keys, dialect)
+    - table: target table, needs a primary key or unique index on keys for postgres, mysql and sqlite
+    - staging: table holding the new and changed rows
+    - columns: columns to insert or update, keys included
+    - keys: columns identifying a row
+    - Returns (string): ON CONFLICT upsert for postgres/sqlite, ON DUPLICATE KEY UPDATE for mysql, MERGE for the others
+    """
+    names = [quote(c, dialect) for c in columns]
+    key_names = [quote(c, dialect) for c in keys]
+    updates = [c for c in names if c not in key_names]
+    column_list = ', '.join(names)
+    if dialect in ('postgres', 'sqlite'):
+        action = 'DO UPDATE SET ' + ', '.join('{0} = excluded.{0}'.format(c) for c in updates) if updates else 'DO NOTHING'
+        # WHERE true keeps sqlite from reading ON CONFLICT as a join constraint
+        return "INSERT INTO {0} ({1}) SELECT {1} FROM {2} WHERE true ON CONFLICT ({3}) {4}".format(
+            table, column_list, staging, ', '.join(key_names), action)
+    if dialect == 'mysql':
+        action = ', '.join('{0} = src.{0}'.format(c) for c in (updates or key_names[:1]))
+        return "INSERT INTO {0} ({1}) SELECT * FROM (SELECT {1} FROM {2}) src ON DUPLICATE KEY UPDATE {3}".format(
+            table, column_list, staging, action)
+    on = ' AND '.join('tgt.{0} = src.{0}'.format(c) for c in key_names)
+    matched = "WHEN MATCHED THEN UPDATE SET {} ".format(', '.join('{0} = src.{0}'.format(c) for c in updates)) if updates else ''
+    alias = 'src' if dialect == 'oracle' else 'AS src'
+    text = "MERGE INTO {0} tgt USING {1} {2} ON ({3}) {4}WHEN NOT MATCHED THEN INSERT ({5}) VALUES ({6})".format(
+        table, staging, alias, on, matched, column_list, ', '.join('src.' + c for c in names))
+    # sql server requires MERGE to be terminated
+    return text + ';' if dialect == 'mssql' else text
@@ -0,0 +1,405 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+import time, socket, threading, functools
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Callable
+
+# metrics hooks, each called with one record per finished operation
+HOOKS = []
+
+# operations running on this thread, innermost last
+_local = threading.local()
+
+
+def register_hook(hook:Callable):
+    """
+    - register_hook(hook)
+    - hook: callable receiving the record (dict) of every finished operation, e.g. MemoryCollector() or StatsdExporter()
+    - Returns (Callable): hook, so it can be kept for remove_hook
+    """
+    if hook not in HOOKS:
+        HOOKS.append(hook)
+    return hook
+
+
+def remove_hook(hook:Callable):
+    if hook in HOOKS:
+        HOOKS.remove(hook)
+
+
+class Operation:
+    """
+    This class times one pyblux operation: named phases (connect, execute, fetch, dataframe, serialize, load, commit),
+    rows, bytes and per chunk timings. Used as a context manager it becomes the current operation of the thread,
+    so loaders and helpers add to it through pyblux.metrics.phase() and pyblux.metrics.chunk().
+    """
+
+    def __init__(self, name:str, **labels):
+        """
+        Args:
+            name (str): operation name (sql, load, iter_sql, get_engine, is_exist, ...)
+            labels: dialect, table and other dimensions reported with the record
+        """
+        self.name = name
+        self.labels = {k: v for k, v in labels.items() if v is not None}
+        self.phases = {}
+        self.chunks = []
+        self.rows = 0
+        self.bytes = 0
+        self.error = None
+        self._wall = time.time()
+        self._start = time.perf_counter()
+        self._mark = self._start
+
+    @contextmanager
+    def phase(self, name:str):
+        """
+        Add the time spent in the block to the phase; a phase entered several times accumulates.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def chunk(self, rows:int, nbytes:int=0, seconds:float=None):
+        """
+        Record a chunk of rows, timed from the previous chunk (or the start of the operation) unless seconds is given.
+        """
+        now = time.perf_counter()
+        self.chunks.append({'rows': rows, 'bytes': nbytes, 'seconds': now - self._mark if seconds is None else seconds})
+        self._mark = now
+
+    def finish(self, error:str=None):
+        """
+        Emit the record to the registered hooks.
+        """
+        seconds = time.perf_counter() - self._start
+        self.error = self.error or error
+        record = {'operation': self.name, 'labels': self.labels, 'started': self._wall, 'seconds': seconds,
+                  'phases': self.phases, 'rows': self.rows, 'bytes': self.bytes,
+                  'rows_per_sec': self.rows / seconds if seconds > 0 else 0.0, 'chunks': self.chunks, 'error': self.error}
+        for hook in list(HOOKS):
+            try:
+                hook(record)
+            except Exception:
+                # a failing exporter must not fail the load it observes
+                pass
+        return record
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.stack.remove(self)
+        self.finish(error=exc_type.__name__ if exc_type is not None else None)
+        return False
+
+
+class _NullOperation:
+    """
+    Stand-in when no hook is registered, so instrumentation costs one check.
+    """
+    name = None
+    rows = 0
+    bytes = 0
+    error = None
+
+    @property
+    def labels(self):
+        return {}
+
+    @property
+    def phases(self):
+        return {}
+
+    @property
+    def chunks(self):
+        return []
+
+    def phase(self, name:str):
+        return nullcontext()
+
+    def chunk(self, rows:int, nbytes:int=0, seconds:float=None):
+        pass
+
+    def finish(self, error:str=None):
+        pass
+
+    def __setattr__(self, name, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL = _NullOperation()
+
+
+def operation(name:str, **labels):
+    """
+    - operation(name, **labels)
+    - Returns (Operation): a new operation, or a no-op when no hook is registered
+    >>> with operation('sql', dialect='postgres') as op:
+    ...     with op.phase('execute'):
+    ...         cur.execute(query)
+    """
+    return Operation(name, **labels) if HOOKS else _NULL
+
+
+def current():
+    """
+    - Returns (Operation): innermost operation running on this thread, or a no-op
+    """
+    stack = getattr(_local, 'stack', None)
+    return stack[-1] if stack else _NULL
+
+
+def phase(name:str):
+    """
+    Time a block as a phase of the current operation.
+    """
+    return current().phase(name)
+
+
+def chunk(rows:int, nbytes:int=0, seconds:float=None):
+    """
+    Record a loaded or fetched chunk on the current operation.
+    """
+    current().chunk(rows, nbytes, seconds)
+
+
+def fail(message:str):
+    """
+    Record the error of the current operation (the message pyblux reports before sys.exit).
+    """
+    op = current()
+    if op is not _NULL:
+        op.error = message.strip()
+
+
+def timed(name:str):
+    """
+    Decorator running a function as an operation, labelled with its dialect (or Blux.dialect) and table keyword arguments.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not HOOKS:
+                return func(*args, **kwargs)
+            blux = kwargs.get('Blux')
+            with Operation(name, dialect=kwargs.get('dialect') or getattr(blux, 'dialect', None), table=kwargs.get('table')):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MemoryCollector:
+    """
+    This class keeps the latest operation records in memory:
+    >>> collector = register_hook(MemoryCollector())
+    >>> blux.sql(query=query)
+    >>> collector.summary()['sql']['phases']
+    """
+
+    def __init__(self, maxlen:int=10000):
+        """
+        Args:
+            maxlen (int): records kept, the oldest are dropped first
+        """
+        self._records = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def __call__(self, record:dict):
+        with self._lock:
+            self._records.append(record)
+
+    def records(self, operation:str=None):
+        """
+        - records(operation)
+        - Returns (list): collected records, only those of operation when given
+        """
+        with self._lock:
+            return [r for r in self._records if operation is None or r['operation'] == operation]
+
+    def summary(self):
+        """
+        - Returns (dict): per operation count, errors, total/mean/p95 seconds, rows, bytes, rows/sec and seconds per phase
+        """
+        summary = {}
+        for record in self.records():
+            entry = summary.setdefault(record['operation'], {'count': 0, 'errors': 0, 'seconds': 0.0, 'rows': 0, 'bytes': 0,
+                                                             'phases': {}, 'durations': []})
+            entry['count'] += 1
+            entry['errors'] += record['error'] is not None
+            entry['seconds'] += record['seconds']
+            entry['rows'] += record['rows']
+            entry['bytes'] += record['bytes']
+            entry['durations'].append(record['seconds'])
+            for name, seconds in record['phases'].items():
+                entry['phases'][name] = entry['phases'].get(name, 0.0) + seconds
+        for entry in summary.values():
+            durations = sorted(entry.pop('durations'))
+            entry['mean'] = entry['seconds'] / entry['count']
+            entry['p95'] = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+            entry['rows_per_sec'] = entry['rows'] / entry['seconds'] if entry['seconds'] > 0 else 0.0
+        return summary
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+
+def _metric_name(*parts):
+    return '.'.join(str(p).replace('.', '_').replace(':', '_').replace('|', '_') for p in parts if p)
+
+
+class StatsdExporter:
+    """
+    This class sends every record to a StatsD (or DogStatsD) agent over UDP:
+    timers <prefix>.<operation>.seconds and <prefix>.<operation>.<phase>, counters rows, bytes and errors.
+    The lines of an operation are packed into as few datagrams as fit under packet_size bytes.
+    >>> register_hook(StatsdExporter(host='localhost', port=8125, tags=True))
+    """
+
+    def __init__(self, host:str='localhost', port:int=8125, prefix:str='pyblux', tags:bool=False, packet_size:int=1400):
+        """
+        Args:
+            host (str): StatsD agent host
+            port (int): StatsD agent UDP port
+            prefix (str): metric name prefix
+            tags (bool): append the labels as DogStatsD tags (|#dialect:postgres) instead of leaving them out
+            packet_size (int): maximum datagram size; the default fits an ethernet MTU, a load of thousands of
+                chunks would otherwise exceed the UDP limit (EMSGSIZE)
+        """
+        self._address = (host, port)
+        self._prefix = prefix
+        self._tags = tags
+        self._packet_size = packet_size
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def lines(self, record:dict):
+        """
+        - lines(record)
+        - Returns (list): StatsD lines for one record
+        """
+        op = record['operation']
+        suffix = '|#' + ','.join('{}:{}'.format(k, v) for k, v in sorted(record['labels'].items())) if self._tags and record['labels'] else ''
+        lines = ['{}:{:.3f}|ms{}'.format(_metric_name(self._prefix, op, 'seconds'), record['seconds'] * 1000, suffix)]
+        lines += ['{}:{:.3f}|ms{}'.format(_metric_name(self._prefix, op, name), seconds * 1000, suffix) for name, seconds in record['phases'].items()]
+        lines += ['{}:{}|c{}'.format(_metric_name(self._prefix, op, 'rows'), record['rows'], suffix),
+                  '{}:{}|c{}'.format(_metric_name(self._prefix, op, 'bytes'), record['bytes'], suffix)]
+        lines += ['{}:{:.3f}|ms{}'.format(_metric_name(self._prefix, op, 'chunk'), c['seconds'] * 1000, suffix) for c in record['chunks']]
+        if record['error'] is not None:
+            lines.append('{}:1|c{}'.format(_metric_name(self._prefix, op, 'errors'), suffix))
+        return lines
+
+    def packets(self, record:dict):
+        """
+        - packets(record)
+        - Returns (list): datagrams of newline separated lines, each at most packet_size bytes unless a single line is longer
+        """
+        packets = []
+        packet = b''
+        for line in self.lines(record):
+            line = line.encode('utf-8')
+            if packet and len(packet) + 1 + len(line) > self._packet_size:
+                packets.append(packet)
+                packet = b''
+            packet = packet + b'\n' + line if packet else line
+        if packet:
+            packets.append(packet)
+        return packets
+
+    def __call__(self, record:dict):
+        for packet in self.packets(record):
+            self._socket.sendto(packet, self._address)
+
+    def close(self):
+        self._socket.close()
+
+
+class PrometheusExporter:
+    """
+    This class aggregates records into Prometheus counters, rendered in the text exposition format by render()
+    or served on /metrics by serve():
+    >>> exporter = register_hook(PrometheusExporter())
+    >>> exporter.serve(port=9464)
+    """
+
+    def __init__(self, prefix:str='pyblux'):
+        """
+        Args:
+            prefix (str): metric name prefix
+        """
+        self._prefix = prefix
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def __call__(self, record:dict):
+        labels = tuple(sorted(dict(record['labels'], operation=record['operation']).items()))
+        with self._lock:
+            self.__add('operations_total', labels, 1)
+            self.__add('operation_seconds_total', labels, record['seconds'])
+            self.__add('rows_total', labels, record['rows'])
+            self.__add('bytes_total', labels, record['bytes'])
+            self.__add('chunks_total', labels, len(record['chunks']))
+            if record['error'] is not None:
+                self.__add('errors_total', labels, 1)
+            for name, seconds in record['phases'].items():
+                self.__add('phase_seconds_total', labels + (('phase', name),), seconds)
+
+    def __add(self, metric:str, labels:tuple, value):
+        key = (metric, labels)
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self):
+        """
+        - Returns (string): counters in the Prometheus text exposition format
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+        lines = []
+        seen = set()
+        for (metric, labels), value in counters:
+            name = '{}_{}'.format(self._prefix, metric)
+            if name not in seen:
+                seen.add(name)
+                lines.append('# TYPE {} counter'.format(name))
+            label_text = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in labels)
+            lines.append('{}{{{}}} {}'.format(name, label_text, repr(float(value))))
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port:int=9464, host:str='127.0.0.1'):
+        """
+        - serve(port, host)
+        - Serves render() on http://host:port/metrics from a daemon thread
+        - Returns (ThreadingHTTPServer): the running server, stop it with shutdown()
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = exporter.render().encode('utf-8')
+                self.send_response(200 if self.path.rstrip('/') in ('', '/metrics') else 404)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='pyblux-metrics').start()
+        return self._server
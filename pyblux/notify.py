@@ -0,0 +1,238 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+import json, time, queue, atexit, random, threading
+from typing import Callable
+
+_ACTIVITY_IMAGE = "https://teamsnodesample.azurewebsites.net/static/img/image5.png"
+
+# alerts merged into one card list at most this many distinct messages
+_MAX_FACTS = 10
+
+
+def teams_card(title:str='', text:str='', message:str='', status:str='', error_message:str='', activitySubtitle:str='', activityText:str='', facts:list=None):
+    """
+    - teams_card(title, text, message, status, error_message, activitySubtitle, activityText, facts)
+    - facts: (name, value) pairs replacing the single Message / Error Message fact
+    - Returns (dict): MessageCard payload for a Teams incoming webhook
+    """
+    if facts is None:
+        if status == "FAILLED":
+            facts = [("Error Message", json.dumps(error_message))]
+        else:
+            facts = [("Message", message)]
+    return {
+        "title": title,
+        "text": text,
+        "sections": [
+            {
+                "activityTitle": status,
+                "activitySubtitle": activitySubtitle,
+                "activityText": activityText,
+                "activityImage": _ACTIVITY_IMAGE
+            },
+            {
+                "title": "Output",
+                "facts": [{"name": name, "value": value} for name, value in facts]
+            }
+        ]
+    }
+
+
+def http_session(pool_maxsize:int=1):
+    """
+    - Returns (requests.Session): keep-alive session without transport retries (retries are handled by the caller)
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+
+class TeamsDispatcher:
+    """
+    This class sends Teams cards from a background thread so the pipeline never waits on the webhook.
+    Alerts with the same title, status and subtitle queued within window seconds are coalesced into one card,
+    posts are rate limited, and failed posts are retried with exponential backoff:
+    >>> alerts = TeamsDispatcher(hookurl, window=30)
+    >>> alerts.notify(title='ETL flights', status='FAILLED', error_message=str(e))
+    >>> alerts.close()
+    """
+
+    def __init__(self, hookurl:str, max_queue:int=1000, rate:float=1.0, window:float=10.0, retries:int=5, backoff:float=1.0,
+                 max_backoff:float=60.0, timeout:float=10.0, logger:Callable=None):
+        """
+        Args:
+            hookurl (str): Teams incoming webhook url
+            max_queue (int): alerts held while the webhook is slow; notify drops new alerts when full
+            rate (float): maximum posts per second
+            window (float): seconds alerts are collected before similar ones are merged and sent, 0 sends each alert alone
+            retries (int): attempts after the first failed post (connection errors, 429 and 5xx)
+            backoff (float): first retry delay in seconds, doubled per attempt up to max_backoff (a Retry-After header wins)
+            timeout (float): HTTP timeout per post
+            logger (Callable): reports posts given up after the retries, None to stay silent
+        """
+        self._hookurl = hookurl
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._interval = 1.0 / rate if rate else 0.0
+        self._window = window
+        self._retries = retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._timeout = timeout
+        self._logger = logger
+        self._session = None
+        self._next_post = 0.0
+        self._flush = threading.Event()
+        self._closed = False
+        self.stats = {'queued': 0, 'sent': 0, 'coalesced': 0, 'dropped': 0, 'retries': 0, 'failed': 0}
+        self._thread = threading.Thread(target=self.__run, daemon=True, name='pyblux-teams')
+        self._thread.start()
+        atexit.register(self.close, 5.0)
+
+    def notify(self, title:str='', text:str='', message:str='', status:str='', error_message:str='', activitySubtitle:str='', activityText:str=''):
+        """
+        Queue an alert without waiting; same arguments as send_teams_notification.
+        - Returns (boolean): False when the queue is full or the dispatcher is closed and the alert was dropped
+        """
+        alert = {'title': title, 'text': text, 'message': message, 'status': status, 'error_message': error_message,
+                 'activitySubtitle': activitySubtitle, 'activityText': activityText}
+        if self._closed:
+            self.stats['dropped'] += 1
+            return False
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return False
+        self.stats['queued'] += 1
+        return True
+
+    def flush(self, timeout:float=None):
+        """
+        Send the queued alerts now instead of at the end of the coalescing window.
+        - Returns (boolean): True when everything queued was handled within timeout
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        self._flush.set()
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout:float=10.0):
+        """
+        Flush, stop the background thread and close the HTTP session.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self.flush(timeout)
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self._session is not None:
+            self._session.close()
+        atexit.unregister(self.close)
+
+    def __run(self):
+        while True:
+            alert = self._queue.get()
+            if alert is None:
+                self._queue.task_done()
+                return
+            batch = [alert]
+            deadline = time.monotonic() + self._window
+            stop = False
+            # collect what arrives within the window; flush() ends the window early
+            while not self._flush.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    alert = self._queue.get(timeout=min(remaining, 0.05))
+                except queue.Empty:
+                    continue
+                if alert is None:
+                    stop = True
+                    break
+                batch.append(alert)
+            while self._flush.is_set() or stop:
+                try:
+                    alert = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if alert is None:
+                    stop = True
+                    continue
+                batch.append(alert)
+            self._flush.clear()
+            try:
+                for card in self.__coalesce(batch):
+                    self.__post(card)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                if stop:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def __coalesce(self, batch:list):
+        groups = {}
+        for alert in batch:
+            groups.setdefault((alert['title'], alert['status'], alert['activitySubtitle']), []).append(alert)
+        for alerts in groups.values():
+            first = alerts[0]
+            if len(alerts) == 1:
+                yield teams_card(**first)
+                continue
+            self.stats['coalesced'] += len(alerts) - 1
+            name = "Error Message" if first['status'] == "FAILLED" else "Message"
+            values = []
+            for alert in alerts:
+                value = json.dumps(alert['error_message']) if first['status'] == "FAILLED" else alert['message']
+                if value not in values:
+                    values.append(value)
+            facts = [(name, value) for value in values[:_MAX_FACTS]]
+            if len(values) > _MAX_FACTS:
+                facts.append(("More", "{} more distinct messages".format(len(values) - _MAX_FACTS)))
+            card = dict(first, text="{} ({} alerts)".format(first['text'], len(alerts)).strip())
+            card.pop('message'), card.pop('error_message')
+            yield teams_card(facts=facts, **card)
+
+    def __post(self, card:dict):
+        if self._session is None:
+            self._session = http_session()
+        body = json.dumps(card)
+        error = None
+        for attempt in range(self._retries + 1):
+            wait = self._next_post - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._next_post = time.monotonic() + self._interval
+            retry_after = None
+            try:
+                response = self._session.post(self._hookurl, data=body, timeout=self._timeout)
+                if response.status_code < 400:
+                    self.stats['sent'] += 1
+                    return True
+                error = 'HTTP {}'.format(response.status_code)
+                if response.status_code != 429 and response.status_code < 500:
+                    break
+                retry_after = response.headers.get('Retry-After')
+            except Exception as e:
+                error = str(e).split("\n")[0]
+            if attempt < self._retries:
+                self.stats['retries'] += 1
+                delay = min(self._max_backoff, self._backoff * 2 ** attempt) * (0.5 + random.random() / 2)
+                if retry_after is not None and retry_after.isdigit():
+                    delay = float(retry_after)
+                time.sleep(delay)
+        self.stats['failed'] += 1
+        if self._logger is not None:
+            self._logger("### Teams notification not sent ### \n {}".format(error))
+        return False
@@ -0,0 +1,161 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+import re, weakref, itertools
+from collections import OrderedDict
+
+# DBAPI paramstyle of the driver behind each dialect
+PARAMSTYLES = {
+    'postgres': 'pyformat',
+    'mysql':    'pyformat',
+    'oracle':   'named',
+    'sqlite':   'qmark',
+    'mssql':    'qmark',
+    'teradata': 'qmark',
+}
+
+# string literals, quoted identifiers and comments are copied as-is; ::type casts are not parameters
+_TOKENS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/|::|(?<![\w:]):(\w+)|(\?)|(%)", re.S)
+
+_statement_ids = itertools.count(1)
+
+
+def bind(query:str, params=None, style:str='qmark'):
+    """
+    - bind(query, params, style)
+    - query: SQL text using :name placeholders with dict params, or ? placeholders with tuple params
+    - params: dict, tuple/list, or a list of those for a batch
+    - style: DBAPI paramstyle of the target driver (qmark, named, numeric, format, pyformat) or dollar for PREPARE
+    - Returns (tuple): query rewritten for the paramstyle and params converted to match (a list for a batch)
+    """
+    batch = isinstance(params, list) and len(params) > 0 and isinstance(params[0], (dict, list, tuple))
+    sample = params[0] if batch else params
+    named = isinstance(sample, dict)
+    order = []
+    counter = itertools.count(1)
+
+    def replace(match):
+        name, qmark, percent = match.group(1), match.group(2), match.group(3)
+        if percent:
+            return '%%' if style in ('format', 'pyformat') else '%'
+        if name is None and qmark is None and style in ('format', 'pyformat'):
+            # the driver interpolates % inside literals too
+            return match.group(0).replace('%', '%%')
+        if (name is not None and not named) or (qmark is not None and named) or (name is None and qmark is None):
+            return match.group(0)
+        if name is not None and style == 'named':
+            order.append(name)
+            return ':' + name
+        if name is not None and style == 'pyformat':
+            order.append(name)
+            return '%({})s'.format(name)
+        if name is not None:
+            order.append(name)
+        position = next(counter)
+        if style == 'qmark':
+            return '?'
+        if style in ('format', 'pyformat'):
+            return '%s'
+        if style in ('numeric', 'named'):
+            return ':{}'.format(position)
+        return '${}'.format(position)
+
+    text = _TOKENS.sub(replace, query)
+
+    def convert(values):
+        if not named:
+            return tuple(values)
+        if style in ('named', 'pyformat'):
+            return {name: values[name] for name in order}
+        return tuple(values[name] for name in order)
+
+    if params is None:
+        return text, None
+    if batch:
+        return text, [convert(values) for values in params]
+    return text, convert(params)
+
+
+def _statements(conn, weak:weakref.WeakKeyDictionary, pinned:dict):
+    """
+    Per-connection statement registry. Pooled connections keep it in the pool record info so it
+    lives exactly as long as the database session; bare driver connections fall back to a weak dict keyed on the
+    connection. Connections without weak references (sqlite3, pyodbc) are kept in pinned next to their registry,
+    so their id cannot be reused by a new connection while the registry exists.
+    """
+    info = getattr(conn, 'info', None)
+    if isinstance(info, dict):
+        return info.setdefault('pyblux_statements', OrderedDict())
+    try:
+        return weak.setdefault(conn, OrderedDict())
+    except TypeError:
+        return pinned.setdefault(id(conn), (conn, OrderedDict()))[1]
+
+
+class StatementCache:
+    """
+    This class reuses prepared statements per connection so repeated parameterised queries skip the hard parse.
+    Postgres statements are prepared on the server with PREPARE/EXECUTE, or bound on the client when the server cannot
+    prepare them (parameters of unknown type, as in select :value); qmark, named and numeric drivers
+    (teradatasql, pyodbc, cx_Oracle, sqlite3) keep one open cursor per statement text, which they re-execute without preparing again.
+    """
+
+    def __init__(self, size:int=100):
+        """
+        Args:
+            size (int): statements kept per connection, least recently used are released first
+        """
+        self._size = size
+        self._weak = weakref.WeakKeyDictionary()
+        self._pinned = {}
+
+    def execute(self, conn, query:str, params, dialect:str):
+        """
+        - execute(conn, query, params, dialect)
+        - Returns (tuple): executed cursor and whether it belongs to the cache (and must not be closed)
+        """
+        statements = _statements(conn, self._weak, self._pinned)
+        if dialect == 'postgres':
+            text, values = bind(query, params, style='dollar')
+            name = statements.get(text)
+            cur = conn.cursor()
+            if name is None:
+                name = 'pyblux_{}'.format(next(_statement_ids))
+                try:
+                    cur.execute("PREPARE {} AS {}".format(name, text))
+                except Exception:
+                    # PREPARE is the first statement of the borrowed session: rolling back only clears the failed PREPARE
+                    conn.rollback()
+                    name = ''
+                statements[text] = name
+                self.__release(statements, cur)
+            statements.move_to_end(text)
+            if not name:
+                cur.execute(*bind(query, params, style=PARAMSTYLES['postgres']))
+            elif values:
+                cur.execute("EXECUTE {} ({})".format(name, ", ".join(["%s"] * len(values))), values)
+            else:
+                cur.execute("EXECUTE {}".format(name))
+            return cur, False
+        text, values = bind(query, params, style=PARAMSTYLES.get(dialect, 'qmark'))
+        if dialect == 'mysql':
+            # pymysql interpolates parameters on the client, there is nothing to prepare
+            cur = conn.cursor()
+            cur.execute(text, values)
+            return cur, False
+        cur = statements.get(text)
+        if cur is None:
+            cur = conn.cursor()
+            statements[text] = cur
+            self.__release(statements, None)
+        statements.move_to_end(text)
+        cur.execute(text, values)
+        return cur, True
+
+    def __release(self, statements:OrderedDict, cur):
+        while len(statements) > self._size:
+            text, statement = statements.popitem(last=False)
+            if cur is not None:
+                if statement:
+                    cur.execute("DEALLOCATE {}".format(statement))
+            else:
+                statement.close()
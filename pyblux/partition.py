@@ -0,0 +1,150 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+import datetime
+from pyblux._lazy import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+
+# modulo expression per dialect, abs() keeps negative keys in range
+_MODULO = {
+    'teradata': 'ABS({column} MOD {n})',
+    'mssql':    'ABS({column} % {n})',
+    'sqlite':   'ABS({column} % {n})',
+}
+
+
+def partition_queries(query:str, column:str, partitions:int=None, bounds:list=None, scheme:str='range', dialect:str=None):
+    """
+    - partition_queries(query, column, partitions, bounds, scheme, dialect)
+    - query: source query
+    - column: partition column
+    - partitions: number of slices (required for scheme='hash')
+    - bounds: sorted boundary values [b0, b1, ..., bn] giving n range slices
+    - scheme: 'range' (bounds) or 'hash' (modulo of an integer column)
+    - Returns (list): one query per slice; rows with a NULL partition column go to the first slice
+    """
+    source = "SELECT * FROM ({}) pyblux_partition".format(query.strip().rstrip(';'))
+    if scheme == 'hash':
+        if not partitions:
+            raise ValueError("partitions is required for scheme='hash'")
+        modulo = _MODULO.get(dialect, 'ABS(MOD({column}, {n}))').format(column=column, n=partitions)
+        return ["{} WHERE {} = {}{}".format(source, modulo, i, " OR {} IS NULL".format(column) if i == 0 else "")
+                for i in range(partitions)]
+    if scheme != 'range':
+        raise ValueError("Unknown partition scheme {}".format(scheme))
+    if not bounds or len(bounds) < 2:
+        raise ValueError("bounds needs at least two values for scheme='range'")
+    queries = []
+    for i, (lower, upper) in enumerate(zip(bounds[:-1], bounds[1:])):
+        last = i == len(bounds) - 2
+        where = "{column} >= {lower} AND {column} {op} {upper}".format(column=column, lower=_literal(lower, dialect), upper=_literal(upper, dialect), op='<=' if last else '<')
+        if i == 0:
+            where = "({}) OR {} IS NULL".format(where, column)
+        queries.append("{} WHERE {}".format(source, where))
+    return queries
+
+
+def range_bounds(lower, upper, partitions:int):
+    """
+    - range_bounds(lower, upper, partitions)
+    - Returns (list): partitions+1 evenly spaced boundary values between lower and upper
+    """
+    if isinstance(lower, int) and isinstance(upper, int):
+        step = max(1, -(-(upper - lower) // partitions))
+        bounds = list(range(lower, upper, step)) + [upper]
+        return bounds if len(bounds) > 1 else [lower, upper]
+    step = (upper - lower) / partitions
+    return [lower + step * i for i in range(partitions)] + [upper]
+
+
+def _literal(value, dialect:str=None):
+    if isinstance(value, (int, float)):
+        return str(value)
+    if hasattr(value, 'isoformat') and dialect == 'sqlite':
+        # sqlite has no timestamp type (TIMESTAMP '...' would be a column alias): compare with the text sqlite3 stores
+        return "'{}'".format(value.isoformat(sep=' ') if hasattr(value, 'hour') else value.isoformat())
+    if hasattr(value, 'isoformat'):
+        return "TIMESTAMP '{}'".format(value.isoformat(sep=' ') if hasattr(value, 'hour') else value.isoformat() + ' 00:00:00')
+    return "'{}'".format(str(value).replace("'", "''"))
+
+
+def _bound(value):
+    # sqlite returns MIN/MAX of a timestamp column as the text it stores
+    if not isinstance(value, str):
+        return value
+    for parse in (int, float, datetime.date.fromisoformat, datetime.datetime.fromisoformat):
+        try:
+            return parse(value)
+        except ValueError:
+            pass
+    raise ValueError("cannot split the range {!r}: pass bounds=[...] or scheme='hash'".format(value))
+
+
+def _read_slice(url, query:str):
+    """
+    Process pool worker: open a private connection from the engine url and run one slice.
+    """
+    from sqlalchemy import create_engine
+    engine = create_engine(url)
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(query)
+        data = pd.DataFrame(cur.fetchall(), columns=[desc[0].lower() for desc in cur.description])
+        cur.close()
+        return data
+    finally:
+        conn.close()
+        engine.dispose()
+
+
+def read_partitioned(blux, query:str, column:str, partitions:int=4, bounds:list=None, scheme:str='range', workers:int=None,
+                     executor:str='thread', stream:bool=False, verbose:bool=False, logger:Callable=print):
+    """
+    - read_partitioned(blux, query, column, partitions, bounds, scheme, workers, executor, stream)
+    - Runs the slices of the query concurrently, each on its own connection.
+      executor='thread' borrows sessions from the pooled engine of blux (get_engine(raw_engine=False, pool_size=...)),
+      executor='process' opens one connection per worker process from the engine url.
+    - Returns (pd.DataFrame): slices concatenated in partition order, or a generator of slices as they finish when stream=True
+    """
+    if not hasattr(blux.engine, 'raw_connection'):
+        raise ValueError("read_partitioned needs a pooled engine: get_engine(..., raw_engine=False, pool_size=n)")
+    if scheme == 'range' and bounds is None:
+        stats = blux.sql(query="SELECT MIN({0}) AS lower_bound, MAX({0}) AS upper_bound FROM ({1}) pyblux_partition".format(column, query.strip().rstrip(';')),
+                         verbose=verbose, logger=logger)
+        lower, upper = stats.iloc[0, 0], stats.iloc[0, 1]
+        if lower is None or pd.isna(lower):
+            bounds = [0, 0]
+        else:
+            lower, upper = _bound(getattr(lower, 'item', lambda: lower)()), _bound(getattr(upper, 'item', lambda: upper)())
+            bounds = range_bounds(lower, upper, partitions)
+    queries = partition_queries(query, column, partitions=partitions, bounds=bounds, scheme=scheme, dialect=blux.dialect)
+    workers = workers or len(queries)
+    if verbose:
+        logger("Running {} partitions of {} on {} {} workers...".format(len(queries), column, workers, executor))
+    if executor == 'process':
+        # multiprocessing is only imported for process pools
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=workers)
+        futures = {pool.submit(_read_slice, blux.engine.url, q): i for i, q in enumerate(queries)}
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+        futures = {pool.submit(blux.sql, query=q, verbose=verbose, logger=logger): i for i, q in enumerate(queries)}
+    if stream:
+        return _as_completed(pool, futures, verbose, logger)
+    with pool:
+        results = {futures[future]: future.result() for future in as_completed(futures)}
+    frames = [results[i] for i in range(len(queries)) if results[i] is not None]
+    if verbose:
+        logger("Read {} records from {} partitions".format(sum(len(f) for f in frames), len(queries)))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def _as_completed(pool, futures, verbose:bool, logger:Callable):
+    with pool:
+        for future in as_completed(futures):
+            data = future.result()
+            if verbose:
+                logger("Partition {} done -- # of records-->:  {}".format(futures[future], len(data)))
+            yield data
@@ -0,0 +1,129 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+import sys, time, queue, threading
+from pyblux.blux import Blux
+from pyblux import metrics
+from pyblux.logger import enabled
+from pyblux.utils import is_exist, drop_table, create_table_text
+from typing import Callable
+
+# marks the end of the extract stream on the queue
+_DONE = object()
+
+
+class _Failed:
+    # carries an extract error (including the SystemExit of Blux.iter_sql) to the loading thread
+    def __init__(self, error:BaseException):
+        self.error = error
+
+
+def _extract(source:Blux, query:str, chunks:queue.Queue, stop:threading.Event, stats:dict, chunksize:int, params, verbose:bool, logger:Callable):
+    stream = source.iter_sql(query=query, chunksize=chunksize, verbose=verbose, logger=logger, params=params)
+    try:
+        for frame in stream:
+            # backpressure: wait for room on the queue, give up when the load side stopped
+            waited = time.perf_counter()
+            while not stop.is_set():
+                try:
+                    chunks.put(frame, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            stats['load_wait'] += time.perf_counter() - waited
+            if stop.is_set():
+                return
+        chunks.put(_DONE)
+    except BaseException as e:
+        chunks.put(_Failed(e))
+    finally:
+        # closes the source cursor and returns its connection when the load side stopped early
+        stream.close()
+
+
+def transfer(source:Blux, query:str, target:Blux, table:str, chunksize:int=100000, queue_size:int=4, params=None, create:bool=True,
+             replace:bool=False, ddl:str=None, verbose:bool=False, logger:Callable=print, **load_options):
+    """
+    - transfer(source, query, target, table, chunksize, queue_size, params, create, replace, ddl, **load_options)
+    - source: Blux the query runs on; rows are streamed with iter_sql, chunksize rows at a time
+    - target: Blux the chunks are loaded into with its bulk loader (Blux.sql(dataframe=...)), load_options are passed on
+      (binary, mode, sessions)
+    - queue_size: chunks extracted ahead of the load; the extract waits when the queue is full, so at most
+      queue_size + 2 chunks are in memory
+    - create: create the table when it does not exist, with ddl or else from the dtypes of the first chunk, widened for the
+      rest of the stream (create_table_text(wide=True): 64 bit integers, 38 digit decimals, wide text)
+    - replace: drop the table first
+    - Extraction runs on a background thread and overlaps the load of the previous chunks:
+    >>> transfer(teradata_blux, "select * from sales.flights", postgres_blux, 'staging.flights', chunksize=200000, verbose=True)
+    - Returns (dict): rows, chunks, seconds, rows_per_sec, and the seconds the load waited on the extract (extract_wait)
+      and the extract on the load (load_wait)
+    """
+    log = verbose and enabled(logger)
+    chunks = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    stats = {'rows': 0, 'chunks': 0, 'seconds': 0.0, 'rows_per_sec': 0.0, 'extract_wait': 0.0, 'load_wait': 0.0}
+    stdout=''
+    start = time.perf_counter()
+    producer = threading.Thread(target=_extract, args=(source, query, chunks, stop, stats, chunksize, params, verbose, logger),
+                                daemon=True, name='pyblux-transfer')
+    with metrics.operation('transfer', source=source.dialect, dialect=target.dialect, table=table) as op:
+        try:
+            if replace:
+                drop_table(table=table, Blux=target, verbose=verbose, logger=logger)
+            exists = is_exist(table=table, Blux=target, verbose=verbose, logger=logger)
+            if not exists and ddl is not None and create:
+                target.sql(query=ddl, verbose=verbose, logger=logger)
+                exists = True
+            if log:
+                logger("Attempting to transfer sql query...{} into {}".format(query, table))
+            producer.start()
+            while True:
+                waited = time.perf_counter()
+                item = chunks.get()
+                stats['extract_wait'] += time.perf_counter() - waited
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failed):
+                    raise item.error
+                frame = item
+                if not exists:
+                    if not create:
+                        raise ValueError("Table {} does not exist and create=False".format(table))
+                    # wide types: later chunks may hold larger numbers and longer strings than the first one
+                    target.sql(query=create_table_text(frame, table, dialect=target.dialect, wide=True), verbose=verbose, logger=logger)
+                    exists = True
+                loaded = time.perf_counter()
+                target.sql(dataframe=frame, table=table, chunksize=chunksize, verbose=verbose, logger=logger, **load_options)
+                op.chunk(len(frame), seconds=time.perf_counter() - loaded)
+                stats['rows'] += len(frame)
+                stats['chunks'] += 1
+                if log:
+                    elapsed = time.perf_counter() - start
+                    logger("\n Transferred chunk {} -- # of records-->:  {} ({:.0f} rows/sec)".format(
+                        stats['chunks'], stats['rows'], stats['rows'] / elapsed if elapsed else 0.0))
+                del frame, item
+        except (Exception, SystemExit) as e:
+            stdout = (str(e) or type(e).__name__).split("\n")[0] + "\n"
+            if log:
+                logger("### Exception ### \n {}".format(stdout))
+            metrics.fail(stdout)
+        finally:
+            stop.set()
+            if producer.is_alive():
+                # unblock a producer waiting on a full queue so it can close the source cursor
+                while producer.is_alive():
+                    try:
+                        chunks.get_nowait()
+                    except queue.Empty:
+                        producer.join(0.1)
+        op.rows = stats['rows']
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_sec'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    if len(stdout)>0 and verbose:
+        sys.exit("### Exception ### \n {}".format(stdout))
+    elif len(stdout)>0:
+        sys.exit("### Exception - hint: verbose=True to have error details###")
+    if log:
+        logger("Completed transfer into {} -- # of records-->:  {} in {:.1f}s ({:.0f} rows/sec)".format(
+            table, stats['rows'], stats['seconds'], stats['rows_per_sec']))
+    return stats
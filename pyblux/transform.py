@@ -0,0 +1,140 @@
+#!/bin/python
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+from collections import deque
+from pyblux._lazy import pandas as pd
+from pyblux.merge import row_hash
+from pyblux import metrics
+
+# Transforms are classes instead of closures so they can be sent to worker processes.
+
+
+class Cast:
+    """
+    Cast columns to dtypes; columns missing from the chunk are skipped:
+    >>> Cast({'amount': 'float64', 'flight_id': 'Int64', 'departure': 'datetime64[ns]'})
+    """
+
+    def __init__(self, dtypes:dict):
+        self.dtypes = dtypes
+
+    def __call__(self, df:pd.DataFrame):
+        dtypes = {column: dtype for column, dtype in self.dtypes.items() if column in df.columns}
+        return df.astype(dtypes) if dtypes else df
+
+
+class Clean:
+    """
+    Strip whitespace from text columns (every column holding only strings by default) and turn empty strings into nulls:
+    >>> Clean(['origin', 'destination'], lower=True)
+    """
+
+    def __init__(self, columns:list=None, strip:bool=True, empty_as_null:bool=True, lower:bool=False):
+        self.columns = columns
+        self.strip = strip
+        self.empty_as_null = empty_as_null
+        self.lower = lower
+
+    def __call__(self, df:pd.DataFrame):
+        columns = self.columns or [c for c in df.columns if pd.api.types.infer_dtype(df[c], skipna=True) == 'string']
+        df = df.copy(deep=False)
+        for column in columns:
+            text = df[column]
+            if self.strip:
+                text = text.str.strip()
+            if self.lower:
+                text = text.str.lower()
+            if self.empty_as_null:
+                text = text.mask(text == '')
+            df[column] = text
+        return df
+
+
+class HashColumns:
+    """
+    Add a signed 64 bit hash of columns (all columns by default) as a new column, e.g. for change detection:
+    >>> HashColumns(['origin', 'destination', 'carrier'], name='route_hash')
+    """
+
+    def __init__(self, columns:list=None, name:str='row_hash'):
+        self.columns = columns
+        self.name = name
+
+    def __call__(self, df:pd.DataFrame):
+        columns = self.columns or [c for c in df.columns if c != self.name]
+        df = df.copy(deep=False)
+        df[self.name] = row_hash(df[columns], keys=[])
+        return df
+
+
+class Ascii:
+    """
+    Transliterate text columns to ASCII with Unidecode ('Zürich' -> 'Zurich'); each distinct value is converted once:
+    >>> Ascii(['city', 'customer_name'])
+    """
+
+    def __init__(self, columns:list):
+        self.columns = columns
+
+    def __call__(self, df:pd.DataFrame):
+        from unidecode import unidecode
+        df = df.copy(deep=False)
+        for column in self.columns:
+            values = df[column]
+            # missing values get code -1 (the default of every pandas version, use_na_sentinel needs pandas 1.5)
+            codes, uniques = pd.factorize(values)
+            converted = pd.Series([unidecode(v) if isinstance(v, str) else v for v in uniques], dtype=object)
+            result = pd.Series(converted.to_numpy()[codes], index=df.index).where(codes >= 0)
+            df[column] = result.astype(values.dtype) if pd.api.types.is_string_dtype(values.dtype) else result
+        return df
+
+
+class Pipeline:
+    """
+    Apply transforms in order, each taking and returning a chunk:
+    >>> Pipeline([Clean(), Ascii(['city']), Cast({'amount': 'float64'}), HashColumns(name='row_hash')])
+    """
+
+    def __init__(self, steps:list):
+        self.steps = list(steps)
+
+    def __call__(self, df):
+        for step in self.steps:
+            df = step(df)
+        return df
+
+
+def transform_chunks(chunks, transform, workers:int=0, max_in_flight:int=None):
+    """
+    - transform_chunks(chunks, transform, workers, max_in_flight)
+    - chunks: iterable of dataframes (or record batches)
+    - transform: callable taking and returning a chunk, or a list of them applied in order
+    - workers: processes applying the transform, 0 to apply it on the calling thread. Transforms must then be picklable:
+      the classes of this module or module level functions, not lambdas.
+    - max_in_flight: chunks submitted and not yet yielded (2 x workers by default); reading the source waits beyond that
+    - Returns (generator): transformed chunks in source order
+    """
+    if isinstance(transform, (list, tuple)):
+        transform = Pipeline(transform)
+    if not workers:
+        for chunk in chunks:
+            with metrics.phase('transform'):
+                chunk = transform(chunk)
+            yield chunk
+        return
+    # multiprocessing is only imported for process pools
+    from concurrent.futures import ProcessPoolExecutor
+    limit = max(1, max_in_flight or 2 * workers)
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            for chunk in chunks:
+                pending.append(pool.submit(transform, chunk))
+                del chunk
+                while len(pending) >= limit:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -1,20 +1,39 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-import os,sys
-import pandas as pd
-import requests
+from __future__ import annotations
+import os,sys,uuid
+import threading
 import json
-import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.dialects import oracle, postgresql, mysql, mssql
+# pandas, SQLAlchemy, requests and the database drivers are imported on first use
+from pyblux._lazy import pandas as pd
 from pyblux.blux import Blux
+from pyblux.dialects import get_dialect
+from pyblux import metrics
+from pyblux.catalog import Catalog
+from pyblux.ddl import column_type, quote
+from pyblux.merge import merge_statement, row_hash, unchanged_statement
+from pyblux.notify import TeamsDispatcher, http_session, teams_card
+from pyblux.mail import MailSender
 from typing import AnyStr, Callable
 
-def get_engine(user:str,password:str,host:str,port:int,database:str,dialect:str,verbose:bool=False,parameter:str=None,raw_engine:bool=True,logger:Callable=print):
+# pooled engines shared by get_engine calls with the same connection string and pool settings
+_pooled_engines = {}
+_pooled_engines_lock = threading.Lock()
+
+@metrics.timed('get_engine')
+def get_engine(user:str,password:str,host:str,port:int,database:str,dialect:str,verbose:bool=False,parameter:str=None,raw_engine:bool=True,logger:Callable=print,
+               pool_size:int=None,max_overflow:int=0,pool_timeout:int=30,pool_recycle:int=3600,pool_pre_ping:bool=True):
 
     """
     Get Engine for Teradata , Oracle, Aurora/Postgres, Aurora/MySql/MariaDB, SQLite, and  Microsoft SQL Server
+    With pool_size set, the engine is created once per connection string and kept in a thread-safe pool:
+        - pool_size: number of sessions kept open
+        - max_overflow: extra sessions allowed above pool_size under load
+        - pool_timeout: seconds to wait for a free session
+        - pool_recycle: seconds after which an idle session is reconnected
+        - pool_pre_ping: health check the session on checkout
+    Pass raw_engine=False and hand the engine to Blux so every operation borrows and returns a pooled session.
     Returns
     -------
     Connection Engine Object
@@ -26,30 +45,14 @@ def get_engine(user:str,password:str,host:str,port:int,database:str,dialect:str,
         logger('Attempting to connect to {} Database...'.format(dialect))
     engine = None
     try:
-        if dialect == 'teradata':
-            import teradatasqlalchemy
-            if parameter == None:
-                parameter = ''
-            Connection_String = 'teradatasql://{user}:{password}@{host}:{port}/{database}{parameter}'.format(host=host, user=user, password=password, port=port, database=database, parameter=parameter)
-        elif dialect == 'oracle':
-            import cx_Oracle as orcl
-            dsn = orcl.makedsn(host, port, service_name=database)
-            Connection_String = 'oracle://{user}:{password}@{dsn}'.format(user=user, password=password, dsn=dsn)
-        elif dialect == 'postgres':
-            import psycopg2
-            Connection_String = 'postgresql+psycopg2://{user}:{password}@{host}:{port}/{database}'.format(host=host, user=user, password=password, port=port, database=database)
-        elif dialect == 'mssql':
-            import pyodbc
-            Connection_String ='mssql+pyodbc://{user}:{password}@{host}:{port}/{database}?driver=SQL+Server+Native+Client+10.0'.format(host=host, user=user, password=password, port=port, database=database)
-        elif dialect == 'sqlite':
-            Connection_String ='sqlite://'
-        elif dialect == 'mysql':
-            import pymysql
-            Connection_String ='mysql+pymysql://{user}:{password}@{host}:{port}/{database}'.format(host=host, user=user, password=password, port=port, database=database)
-        if raw_engine:
-            engine=create_engine(Connection_String).raw_connection()
+        Connection_String = get_dialect(dialect, 'url')(user, password, host, port, database, parameter)
+        if pool_size:
+            engine=get_pooled_engine(Connection_String,dialect=dialect,pool_size=pool_size,max_overflow=max_overflow,pool_timeout=pool_timeout,pool_recycle=pool_recycle,pool_pre_ping=pool_pre_ping)
         else:
+            from sqlalchemy import create_engine
             engine=create_engine(Connection_String)
+        if raw_engine:
+            engine=engine.raw_connection()
     except Exception as e:
         stdout = str(e).split("\n")[0] + "\n"
         if verbose:
@@ -63,6 +66,39 @@ def get_engine(user:str,password:str,host:str,port:int,database:str,dialect:str,
     return engine
 
 
+def get_pooled_engine(Connection_String:str,dialect:str=None,pool_size:int=5,max_overflow:int=0,pool_timeout:int=30,pool_recycle:int=3600,pool_pre_ping:bool=True):
+    """
+    Get the shared pooled SQLAlchemy engine for a connection string, creating it on first use.
+    Returns
+    -------
+    Engine Object
+    """
+    from sqlalchemy import create_engine
+    key = (Connection_String, pool_size, max_overflow, pool_timeout, pool_recycle, pool_pre_ping)
+    with _pooled_engines_lock:
+        engine = _pooled_engines.get(key)
+        if engine is None:
+            if dialect == 'sqlite':
+                # sqlite keeps one connection per thread and has no overflow or timeout settings
+                engine = create_engine(Connection_String, pool_size=pool_size, pool_recycle=pool_recycle, pool_pre_ping=pool_pre_ping)
+            else:
+                engine = create_engine(Connection_String, pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout,
+                                       pool_recycle=pool_recycle, pool_pre_ping=pool_pre_ping)
+            _pooled_engines[key] = engine
+    return engine
+
+
+def dispose_engines():
+    """
+    Close every session held by the pooled engines created through get_engine(pool_size=...).
+    """
+    with _pooled_engines_lock:
+        for engine in _pooled_engines.values():
+            engine.dispose()
+        _pooled_engines.clear()
+
+
+@metrics.timed('get_connection')
 def get_connection(user:str,password:str,host:str,port:int,database:str,dialect:str,verbose:bool=False,parameter:str=None,logger:Callable=print):
     """
     Get a regular connection for Teradata , Oracle, Aurora/Postgres, Aurora/MySql/MariaDB, SQLite, and  Microsoft SQL Server
@@ -75,22 +111,7 @@ def get_connection(user:str,password:str,host:str,port:int,database:str,dialect:
         logger('Attempting to connect to {} Database...'.format(dialect))
     connection = None
     try:
-        if dialect == 'teradata':
-            import teradatasql
-            if parameter == None:
-                parameter = ''
-            connection = teradatasql.connect(host, user, password, parameter.replace('?',''))
-        elif dialect == 'oracle':
-            import cx_Oracle as orcl
-            connection = orcl.connect(host, user, password) 
-        elif dialect == 'postgres':
-            connection = psycopg2.connect( host, user, password, port, database)  
-        elif dialect == 'mysql':
-            import pymysql
-            connection = mysql.connect( host, user, password, port, database)  
-        elif dialect == 'mssql':
-            import pyodbc
-            connection = pyodbc.connect(driver=parameter,uid=user,pwd=password,server=host,database=database,port=port)
+        connection = get_dialect(dialect, 'connect')(user, password, host, port, database, parameter)
     except Exception as e:
         stdout = str(e).split("\n")[0] + "\n"
         if verbose:
@@ -100,10 +121,50 @@ def get_connection(user:str,password:str,host:str,port:int,database:str,dialect:
     elif len(stdout)>0:
         sys.exit("### Exception - hint: verbose=True to have error details###")
     if verbose and connection != None:
-        logger('Connected to {} Database......'.format(driver))
+        logger('Connected to {} Database......'.format(dialect))
     return connection
 
 
+_EXISTS_QUERY = {}
+_EXISTS_QUERY['postgres']="""select table_name as name FROM information_schema.tables WHERE  table_schema = :schema AND    table_name   = :name
+                    union 
+                    select matviewname as name  from pg_matviews WHERE  schemaname = :schema AND    matviewname   = :name
+                    union
+                    select table_name as name FROM information_schema.views WHERE  table_schema = :schema AND    table_name   = :name;
+                """
+_EXISTS_QUERY['teradata'] = """select tablename as name from dbc.tables where databasename = :database and tablename = :name;"""
+
+_EXISTS_QUERY['mssql'] = """select table_name as name from information_schema.tables where table_schema = :schema and table_name = :name
+                    union 
+                    select table_name as name from information_schema.views where table_schema = :schema and table_name = :name
+                ;"""
+
+_EXISTS_QUERY['mysql'] = """select table_name as name from information_schema.tables where table_schema = :schema and table_name = :name
+                    union 
+                    select table_name as name from information_schema.views where table_schema = :schema and table_name = :name
+                ;"""
+
+_EXISTS_QUERY['oracle'] = """select table_name as name from all_all_tables where owner=upper(:database) and table_name =upper(:name)"""
+
+_EXISTS_QUERY['sqlite'] = """select tbl_name as name from sqlite_schema  where tbl_name = :name"""
+
+
+def exists_query(table:str, dialect:str):
+    """
+    - exists_query(table, dialect)
+    - Returns (tuple): catalog query checking that the table or view exists and its bound params
+    """
+    if '.' in table and dialect in ['postgres','mssql','mysql']:
+        schema, database, name = table.split('.')[0], '', table.split('.')[1]
+    elif '.' in table and dialect not in ['postgres','mssql','mysql']:
+        schema, database, name = '', table.split('.')[0], table.split('.')[1]
+    else:
+        schema, database, name = '', '', table
+    params = {'schema': schema, 'name': name, 'database': database}
+    return _EXISTS_QUERY[dialect], params
+
+
+@metrics.timed('is_exist')
 def is_exist(table:str='', Blux:Blux=None,verbose:bool=False,logger:Callable=print, stdout:str=''):
     """
     Check if table exist for Teradata , Oracle, Aurora/Postgres, Aurora/MySql/MariaDB, SQLite, and  Microsoft SQL Server
@@ -113,40 +174,17 @@ def is_exist(table:str='', Blux:Blux=None,verbose:bool=False,logger:Callable=pri
     """
     stdout=''
     try:
-        query = {}
-        query['postgres']="""select table_name as name FROM information_schema.tables WHERE  table_schema = '{schema}' AND    table_name   = '{name}'
-                            union 
-                            select matviewname as name  from pg_matviews WHERE  schemaname = '{schema}' AND    matviewname   = '{name}'
-                            union
-                            select table_name as name FROM information_schema.views WHERE  table_schema = '{schema}' AND    table_name   = '{name}';
-                        """
-        query['teradata'] = """select tablename as name from dbc.tables where databasename = '{database}' and tablename = '{name}';"""
-
-        query['mssql'] = """select table_name as name from information_schema.tables where table_schema = '{schema}' and table_name = '{name}'
-                            union 
-                            select table_name as name from information_schema.views where table_schema = '{schema}' and table_name = '{name}'
-                        ;"""
-
-        query['mysql'] = """select table_name as name from information_schema.tables where table_schema = '{schema}' and table_name = '{name}'
-                            union 
-                            select table_name as name from information_schema.views where table_schema = '{schema}' and table_name = '{name}'
-                        ;"""
-
-        query['oracle'] = """select table_name as name from all_all_tables where owner=upper('{database}') and table_name =upper('{name}')"""
-
-        query['sqlite'] = """select tbl_name as name from sqlite_schema  where tbl_name = '{name}'"""
-        
-        
+        if Blux.catalog is not None:
+            exists = Blux.catalog.exists(table, verbose=verbose, logger=logger)
+            if verbose:
+                logger(' Table or view {} exists in catalog cache......result-->{}'.format(table, exists))
+            return exists
         if verbose:
             logger('Check if the table or view {} Exists in the database......'.format(table))
 
-        if '.' in table and Blux.dialect in ['postgres','mssql','mysql']:
-            schema, database, name = table.split('.')[0], '', table.split('.')[1]
-        elif '.' in table and Blux.dialect not in ['postgres','mssql','mysql']:
-            schema, database, name = '', table.split('.')[0], table.split('.')[1]
-        else:
-            schema, database, name = '', '', table
-        df = Blux.sql(query=query[Blux.dialect].replace('{schema}',schema).replace('{name}',name).replace('{database}',database), verbose=verbose,logger=logger)
+        query, params = exists_query(table, Blux.dialect)
+        database = params['database']
+        df = Blux.sql(query=query, params=params, verbose=verbose,logger=logger)
         if verbose:
             if df.empty:
                 logger(' Table or view {}  Does not Exists in database {}......result-->{}'.format(table,database,not df.empty))
@@ -163,18 +201,50 @@ def is_exist(table:str='', Blux:Blux=None,verbose:bool=False,logger:Callable=pri
         sys.exit("### Exception - hint: verbose=True to have error details###")
     return False
 
-def create_table_text(dataframe:pd.DataFrame=None, table:str=None,verbose:bool=False,logger:Callable=print):
+@metrics.timed('is_exist_many')
+def is_exist_many(tables:list, Blux:Blux=None, verbose:bool=False, logger:Callable=print):
     """
-    - create_table_text(dataframe, table)
+    Check many tables at once: the table lists of their schemas are loaded in one catalog query and cached on Blux.catalog
+    Returns
+    -------
+    dict Object: table -> boolean
+    """
+    stdout=''
+    try:
+        catalog = Blux.catalog if Blux.catalog is not None else Catalog(Blux)
+        return catalog.exists_many(tables, verbose=verbose, logger=logger)
+    except Exception as e:
+        stdout = str(e).split("\n")[0] + "\n"
+        if verbose:
+            logger("### Exception ### \n {}".format(stdout))
+    if len(stdout)>0 and verbose:
+        sys.exit("### Exception ### \n {}".format(stdout))
+    elif len(stdout)>0:
+        sys.exit("### Exception - hint: verbose=True to have error details###")
+
+def create_table_text(dataframe:pd.DataFrame=None, table:str=None,verbose:bool=False,logger:Callable=print,dialect:str=None,infer_types:bool=True,
+                      primary_key:list=None, wide:bool=False):
+    """
+    - create_table_text(dataframe, table, dialect, infer_types, primary_key, wide)
     - dataframe: source dataframe
     - table: target table to be created in database
+    - dialect: database system name used for the column types (postgres, oracle, teradata,...), None for ANSI types
+    - infer_types: size column types from the dtypes and values (integer widths from min/max, decimals, timestamps,
+      booleans, varchar lengths from the longest value); False makes every column varchar(255)
+    - primary_key: key columns, declared not null and as the primary key (the unique primary index on teradata)
+    - wide: for tables that keep receiving rows, size types for values beyond the dataframe: 64 bit integers,
+      38 digit decimals and wide text (text, nvarchar(max), varchar2(4000 char),...; indexable lengths for key columns)
     - Returns (string): SQL create table statement
     """
     stdout=''
     if verbose:
         logger("\nAttempting to generate SQL create table statement for {}....\n".format(table))  
     try:
-        create_table_columns=',\n'.join(['"'+columnname.lower()+'" varchar(255)' for columnname in dataframe.columns])
+        primary_key=primary_key or []
+        create_table_columns=',\n'.join([quote(columnname, dialect)+' '+(column_type(dataframe[columnname], dialect, wide=wide, key=columnname in primary_key) if infer_types else 'varchar(255)')
+                                         +(' not null' if columnname in primary_key else '') for columnname in dataframe.columns])
+        if primary_key:
+            create_table_columns+=',\nprimary key ({})'.format(', '.join(quote(key, dialect) for key in primary_key))
         create_text="""
         CREATE TABLE    {}
                         (
@@ -194,6 +264,7 @@ def create_table_text(dataframe:pd.DataFrame=None, table:str=None,verbose:bool=F
     return create_text
 
 
+@metrics.timed('drop_table')
 def drop_table(table:str=None,Blux:Blux=None,verbose:bool=False,logger:Callable=print):
     stdout=''
     if verbose:
@@ -216,16 +287,26 @@ def drop_table(table:str=None,Blux:Blux=None,verbose:bool=False,logger:Callable=
         logger("\nDone with drop table {}....\n".format(table))
 
 
-def create_table_from_dataframe(dataframe:pd.DataFrame=None,table:str=None,Blux:Blux=None,verbose:bool=False,logger:Callable=print):
+@metrics.timed('create_table_from_dataframe')
+def create_table_from_dataframe(dataframe:pd.DataFrame=None,table:str=None,Blux:Blux=None,verbose:bool=False,logger:Callable=print,
+                                keys:list=None,skip_unchanged:bool=False,chunksize:int=100000):
+    """
+    - create_table_from_dataframe(dataframe, table, Blux, keys, skip_unchanged, chunksize)
+    - Without keys the table is dropped, created from the dataframe types and loaded.
+    - With keys the rows are merged into the table instead (merge_dataframe), creating it when it does not exist.
+    """
+    if keys:
+        return merge_dataframe(dataframe=dataframe, table=table, keys=keys, Blux=Blux, skip_unchanged=skip_unchanged,
+                               chunksize=chunksize, verbose=verbose, logger=logger)
     stdout=''
     try:
-        sql_create_table_text=create_table_text(dataframe, table)
+        sql_create_table_text=create_table_text(dataframe, table, dialect=Blux.dialect)
         if verbose:
             logger("\nAttempting to create table {}....\n".format(table))
             logger("\nCreate Table Text is: {}\n".format(sql_create_table_text))
         drop_table(table=table,Blux=Blux,verbose=verbose,logger=logger)    
         Blux.sql(query=sql_create_table_text, verbose=verbose, logger=logger)
-        Blux.sql(dataframe=dataframe,table=table, verbose=verbose, logger=logger)
+        Blux.sql(dataframe=dataframe,table=table, chunksize=chunksize, verbose=verbose, logger=logger)
     except Exception as e:
         stdout = str(e).split("\n")[0] + "\n"
         if verbose:
@@ -238,103 +319,117 @@ def create_table_from_dataframe(dataframe:pd.DataFrame=None,table:str=None,Blux:
         logger("\nDone with create table {}....\n".format(table))
 
 
-def send_teams_notification ( hookurl: str, title: str='' , text: str='', message: str ='', status: str ='', error_message: str='', activitySubtitle: str='', activityText: str=''):
-    payload={}
-    # Section Title
-    payload["title"] = title
-    payload["text"] =  text
-    error_message = json.dumps(error_message)
-     
-    if status == "FAILLED":
-        facts_name = "Error Message"
-        facts_value = error_message
-    else:
-        facts_name = "Message"
-        facts_value = message
-        
-    payload["sections"] = [
-        {
-            "activityTitle": status,
-            "activitySubtitle": activitySubtitle,
-            "activityText":  activityText,
-            "activityImage": "https://teamsnodesample.azurewebsites.net/static/img/image5.png"
-        },
-        {
-            "title": "Output",
-            "facts": [
-                {
-                    "name": facts_name,
-                    "value": facts_value
-                }
-            ]
-        }
-    ]
-    headers = {"Content-Type":"application/json"}
-    r = requests.post(hookurl, data=json.dumps(payload), headers=headers)
- 
-
-
-def send_email(server:str, port:int,sender: str, receivers: list, subject: str, body_text: str, attachment: any = None,df: pd.DataFrame = None):
-    import smtplib
-    from email import encoders
-    from email.mime.base import MIMEBase
-    from email.mime.text import MIMEText
-    from email.mime.multipart import MIMEMultipart
-    subject = subject
-
-    if df is not None:
-        df = (
-            df.style
-            .set_table_styles([{'selector': 'th', 'props': [('font-size', '9pt'), 
-                                                            ('font-family', 'Calibri'),
-                                                            ('padding', '8px'),
-                                                            ('text-align', 'left'),
-                                                            ('vertical-align', 'bottom'),
-                                                            ('border-bottom', '1px solid black')]}])        
-            .set_properties(**{'border-collapse': 'collapse',
-                            'border-bottom': '1px solid #ddd',
-                            'font-size': '9pt', 
-                            'font-family': 'Calibri',
-                            'padding': '8px',
-                            'width': '75px'})
-            .set_precision(2)
-            .hide_index()
-            .render()
-        )
-    
-    else:
-        df = ''
-
-    body = f'''
-        <html>
-            <body>
-                <p>{body_text} <br>
-                {df}
-                </p>
-            </body>
-        </html>
-    '''
-    rec_list = receivers
-    sender = sender
-    receivers = ', '.join(rec_list)
-    
-    message = MIMEMultipart()
-    message['Subject'] = subject
-    message['From'] = sender
-    message['To'] = receivers
-    
-    message.attach(MIMEText(body, 'html'))
-
-    if attachment:
-        part = MIMEBase('application', 'octate-stream')
-        part.set_payload(open(attachment, 'rb').read())
-        encoders.encode_base64(part)
-        part.add_header('Content-Disposition', f'attachment; filename = {attachment.rpartition("/")[-1]}')
-        message.attach(part)
-
-    mailServer = smtplib.SMTP(server, port)
-    mailServer.ehlo()
-    mailServer.starttls()
-    mailServer.ehlo()
-    mailServer.sendmail(sender, rec_list, message.as_string())
-    mailServer.close()
+@metrics.timed('merge_dataframe')
+def merge_dataframe(dataframe:pd.DataFrame=None,table:str=None,keys:list=None,Blux:Blux=None,skip_unchanged:bool=False,hash_column:str='row_hash',
+                    chunksize:int=100000,verbose:bool=False,logger:Callable=print):
+    """
+    - merge_dataframe(dataframe, table, keys, Blux, skip_unchanged, hash_column, chunksize)
+    - dataframe: new and changed rows
+    - table: target table; created with a primary key on keys when it does not exist, with types wide enough for later
+      merges (create_table_text(wide=True)). Postgres, MySQL and SQLite need a primary key or unique index on keys,
+      the other dialects run MERGE.
+    - keys: columns identifying a row
+    - skip_unchanged: store a hash of the non key columns in hash_column and leave rows whose hash did not change untouched;
+      hash_column is added to an existing target that lacks it (its rows then count as changed once)
+    - The rows are bulk loaded into a staging table next to the target and applied with one MERGE / ON CONFLICT /
+      ON DUPLICATE KEY UPDATE statement; the staging table is dropped afterwards.
+    - Returns (int): number of rows inserted or updated
+    """
+    stdout=''
+    changed=0
+    staging='{}_stg_{}'.format(table, uuid.uuid4().hex[:8])
+    staged=False
+    try:
+        data=dataframe
+        if skip_unchanged:
+            data=dataframe.copy()
+            data[hash_column]=row_hash(dataframe, keys)
+        if not is_exist(table=table, Blux=Blux, verbose=verbose, logger=logger):
+            if verbose:
+                logger("\nTable {} does not exist, creating it with primary key ({})....\n".format(table, ', '.join(keys)))
+            Blux.sql(query=create_table_text(data, table, dialect=Blux.dialect, primary_key=keys, wide=True), verbose=verbose, logger=logger)
+            Blux.sql(dataframe=data, table=table, chunksize=chunksize, verbose=verbose, logger=logger)
+            return len(data)
+        if skip_unchanged:
+            columns=Blux.sql(query="SELECT * FROM {} WHERE 1 = 0".format(table), verbose=verbose, logger=logger).columns
+            if hash_column.lower() not in [str(c).lower() for c in columns]:
+                if verbose:
+                    logger("\nTable {} has no column {}, adding it....\n".format(table, hash_column))
+                Blux.sql(query="ALTER TABLE {} ADD {} {}".format(table, quote(hash_column, Blux.dialect), column_type(data[hash_column], Blux.dialect, wide=True)),
+                         verbose=verbose, logger=logger)
+        if verbose:
+            logger("\nAttempting to merge {} records into {} on ({}) through {}....\n".format(len(data), table, ', '.join(keys), staging))
+        try:
+            Blux.sql(query=create_table_text(data, staging, dialect=Blux.dialect), verbose=verbose, logger=logger)
+            staged=True
+            Blux.sql(dataframe=data, table=staging, chunksize=chunksize, verbose=verbose, logger=logger)
+            changed=len(data)
+            if skip_unchanged:
+                Blux.sql(query=unchanged_statement(table, staging, keys, hash_column, dialect=Blux.dialect), verbose=verbose, logger=logger)
+                changed=int(Blux.sql(query="SELECT COUNT(*) AS n FROM {}".format(staging), verbose=verbose, logger=logger).iloc[0, 0])
+                if verbose:
+                    logger("\n{} of {} records changed....\n".format(changed, len(data)))
+            if changed:
+                Blux.sql(query=merge_statement(table, staging, list(data.columns), keys, dialect=Blux.dialect), verbose=verbose, logger=logger)
+        finally:
+            if staged:
+                Blux.sql(query="DROP TABLE {}".format(staging), verbose=verbose, logger=logger)
+    except Exception as e:
+        stdout = str(e).split("\n")[0] + "\n"
+        if verbose:
+            logger("### Exception ### \n {}".format(stdout))
+    if len(stdout)>0 and verbose:
+        sys.exit("### Exception ### \n {}".format(stdout))
+    elif len(stdout)>0:
+        sys.exit("### Exception - hint: verbose=True to have error details###")
+    if verbose:
+        logger("\nDone with merge into {} -- # of records-->:  {}\n".format(table, changed))
+    return changed
+
+
+# keep-alive session and background dispatchers shared by send_teams_notification calls, per webhook url
+_teams_sessions = {}
+_teams_dispatchers = {}
+_teams_lock = threading.Lock()
+
+@metrics.timed('send_teams_notification')
+def send_teams_notification ( hookurl: str, title: str='' , text: str='', message: str ='', status: str ='', error_message: str='', activitySubtitle: str='', activityText: str='',
+                              background: bool=False, window: float=10.0, timeout: float=10.0):
+    """
+    Send a card to a MS Teams channel over a reused keep-alive connection, waiting at most timeout seconds for the webhook.
+    With background=True the card is queued on a TeamsDispatcher for the webhook and the call returns at once:
+    similar alerts within window seconds are merged, posts are rate limited and retried with backoff.
+    Returns
+    -------
+    requests.Response, or a boolean (queued) with background=True
+    """
+    if background:
+        with _teams_lock:
+            dispatcher = _teams_dispatchers.get(hookurl)
+            if dispatcher is None:
+                dispatcher = _teams_dispatchers[hookurl] = TeamsDispatcher(hookurl, window=window, timeout=timeout)
+        return dispatcher.notify(title=title, text=text, message=message, status=status, error_message=error_message,
+                                 activitySubtitle=activitySubtitle, activityText=activityText)
+    payload = teams_card(title=title, text=text, message=message, status=status, error_message=error_message,
+                         activitySubtitle=activitySubtitle, activityText=activityText)
+    with _teams_lock:
+        session = _teams_sessions.get(hookurl)
+        if session is None:
+            session = _teams_sessions[hookurl] = http_session(pool_maxsize=4)
+    return session.post(hookurl, data=json.dumps(payload), timeout=timeout)
+
+
+@metrics.timed('send_email')
+def send_email(server:str, port:int,sender: str, receivers: list, subject: str, body_text: str, attachment: any = None,df: pd.DataFrame = None,
+               compress: bool = False, mailer: MailSender = None):
+    """
+    - send_email(server, port, sender, receivers, subject, body_text, attachment, df, compress, mailer)
+    - attachment: file path or list of file paths, streamed to the server (gzip-compressed with compress=True)
+    - mailer: MailSender whose open session is reused for a batch of messages, None to open one for this message
+    - Returns (dict): refused recipients, empty when all were accepted
+    """
+    attachments = [attachment] if isinstance(attachment, (str, os.PathLike)) else attachment
+    if mailer is not None:
+        return mailer.send(sender, receivers, subject, body_text, attachments=attachments, df=df, compress=compress)
+    with MailSender(server, port) as mailer:
+        return mailer.send(sender, receivers, subject, body_text, attachments=attachments, df=df, compress=compress)
@@ -33,7 +33,7 @@ setup(
           'Download': 'https://pypi.org/project/pyblux/',
       },
   keywords=['etl', 'database', 'postgres', 'aurora', 'Oracle', 'Microsoft', 'Teams'], 
-  python_requires=">= 3.6",
-  packages=find_packages()
+  python_requires=">= 3.7",
+  packages=find_packages(exclude=['tests', 'tests.*'])
 )
 
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+import pytest
+import sqlalchemy
+from pyblux import Blux
+
+
+def sqlite_blux(path, **options):
+    # get_engine('sqlite') opens an in memory database per connection, tests share a file instead
+    return Blux(engine=sqlalchemy.create_engine('sqlite:///{}'.format(path)), dialect='sqlite', **options)
+
+
+@pytest.fixture
+def blux(tmp_path):
+    return sqlite_blux(tmp_path / 'pyblux.db')
+
+
+@pytest.fixture
+def target(tmp_path):
+    return sqlite_blux(tmp_path / 'target.db')
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from contextlib import asynccontextmanager
+import pandas as pd
+import pytest
+from pyblux import AsyncBlux
+
+aiosqlite = pytest.importorskip('aiosqlite')
+
+
+def flights():
+    return pd.DataFrame({'id': range(5), 'origin': ['ATL', 'JFK', 'ATL', None, 'SFO'], 'amount': [1.5, 2.0, None, 4.25, 5.0]})
+
+
+def test_aiosqlite_queries(tmp_path):
+    async def run():
+        async with AsyncBlux(engine=await aiosqlite.connect(str(tmp_path / 'a.db')), dialect='sqlite', max_concurrency=4) as ablux:
+            await ablux.sql(query='create table flights (id integer, origin text, amount real)')
+            await ablux.sql(dataframe=flights(), table='flights', chunksize=2)
+            frames = await asyncio.gather(*[ablux.sql(query='select * from flights where origin = :origin', params={'origin': origin})
+                                            for origin in ('ATL', 'JFK', 'SFO')])
+            chunks = [chunk async for chunk in await ablux.sql(query='select id from flights order by id', chunksize=2, stream=True)]
+            table = await ablux.sql(query='select * from flights order by id', output='arrow')
+            exists = await ablux.is_exist(table='flights')
+            await ablux.drop_table(table='flights')
+            return frames, chunks, table, exists, await ablux.is_exist(table='flights')
+
+    frames, chunks, table, exists, dropped = asyncio.run(run())
+    assert [len(frame) for frame in frames] == [2, 1, 1]
+    assert [chunk['id'].tolist() for chunk in chunks] == [[0, 1], [2, 3], [4]]
+    assert table.column('amount').to_pylist() == [1.5, 2.0, None, 4.25, 5.0]
+    assert exists and not dropped
+
+
+def test_failures_raise_instead_of_exiting(tmp_path, blux):
+    async def run(connect):
+        async with await connect() as ablux:
+            with pytest.raises(Exception) as error:
+                await ablux.sql(query='select * from missing_table')
+            with pytest.raises(Exception) as streamed:
+                [chunk async for chunk in ablux.iter_sql(query='select * from missing_table')]
+            # the connection is still usable
+            assert (await ablux.sql(query='select 1 as one'))['one'].tolist() == [1]
+            return error.value, streamed.value
+
+    async def native():
+        return AsyncBlux(engine=await aiosqlite.connect(str(tmp_path / 'a.db')), dialect='sqlite')
+
+    async def threaded():
+        return AsyncBlux(engine=blux, dialect='sqlite')
+
+    error, streamed = asyncio.run(run(native))
+    assert isinstance(error, aiosqlite.OperationalError) and 'missing_table' in str(error)
+    assert isinstance(streamed, aiosqlite.OperationalError)
+    # dialects run on the blocking Blux
+    error, streamed = asyncio.run(run(threaded))
+    assert isinstance(error, RuntimeError) and isinstance(streamed, RuntimeError)
+
+
+class _AsyncpgConnection:
+
+    def __init__(self):
+        self.copies = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def copy_records_to_table(self, name, records, columns, schema_name=None):
+        self.copies.append((schema_name, name, columns, records))
+
+
+class _AsyncpgPool:
+
+    def __init__(self):
+        self.conn = _AsyncpgConnection()
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+# detected as an asyncpg pool by its module
+_AsyncpgPool.__module__ = 'asyncpg.pool'
+
+
+def test_asyncpg_copy_gets_native_booleans():
+    pool = _AsyncpgPool()
+    df = pd.DataFrame({'id': [1, 2, 3], 'active': [True, False, True], 'checked': pd.array([True, None, False], dtype='boolean')})
+    asyncio.run(AsyncBlux(engine=pool, dialect='postgres').sql(dataframe=df, table='stage.flights', chunksize=2))
+    assert [(schema, name, columns) for schema, name, columns, _ in pool.conn.copies] == [('stage', 'flights', ['id', 'active', 'checked'])] * 2
+    rows = [row for *_, records in pool.conn.copies for row in records]
+    assert rows == [(1, True, True), (2, False, None), (3, True, False)]
+    assert all(type(row[1]) is bool for row in rows)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import decimal, time
+import pandas as pd
+import pyarrow as pa
+from pyblux.cache import ResultCache, is_cacheable
+from tests.conftest import sqlite_blux
+
+
+def frame():
+    return pd.DataFrame({'id': pd.array([1, None], dtype='Int64'), 'price': [decimal.Decimal('1.10'), None],
+                         'mixed': [1, 'a'], 'origin': pd.Categorical(['ATL', 'JFK']),
+                         'departure': pd.to_datetime(['2021-07-01 12:00', None]).tz_localize('UTC')})
+
+
+def test_spilled_results_keep_their_dtypes(tmp_path):
+    df = frame()
+    table = pa.table({'id': [1, 2]})
+    cache = ResultCache(max_bytes=df.memory_usage(deep=True).sum() + 100, spill_dir=str(tmp_path))
+    cache.put('frame', df)
+    cache.put('table', table)
+    cache.put('other', df.copy())
+    assert cache.stats()['spills'] >= 1 and cache.stats()['spilled'] >= 1
+    restored = cache.get('frame')
+    pd.testing.assert_frame_equal(restored, df)
+    assert restored['price'].tolist()[0] == decimal.Decimal('1.10')
+    assert cache.get('table').equals(table)
+
+
+def test_cacheable_statements():
+    assert is_cacheable('select * from flights')
+    assert is_cacheable('  (SELECT 1) union all (select 2)')
+    assert is_cacheable('with recent as (select * from flights) select * from recent')
+    assert not is_cacheable('insert into flights values (1) returning id')
+    assert not is_cacheable('update flights set origin = null returning id')
+    assert not is_cacheable('with moved as (delete from flights returning *) select * from moved')
+    assert not is_cacheable('select * from information_schema.tables')
+
+
+def test_writes_are_not_cached_and_invalidate_reads(tmp_path):
+    blux = sqlite_blux(tmp_path / 'cache.db', cache=ResultCache(ttl=60))
+    blux.sql(query='create table flights (id integer)')
+    assert blux.sql(query='select * from flights').empty
+    # each RETURNING statement runs: a cached result would skip the insert
+    assert blux.sql(query='insert into flights values (1) returning id')['id'].tolist() == [1]
+    assert blux.sql(query='insert into flights values (1) returning id')['id'].tolist() == [1]
+    assert blux.sql(query='select * from flights')['id'].tolist() == [1, 1]
+    assert blux.sql(query='select * from flights')['id'].tolist() == [1, 1]
+    assert blux.cache.stats()['hits'] == 1
+
+
+def test_ttl(tmp_path):
+    cache = ResultCache(ttl=0.05)
+    cache.put('key', pd.DataFrame({'a': [1]}))
+    assert cache.get('key') is not None
+    time.sleep(0.1)
+    assert cache.get('key') is None
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from pyblux.utils import is_exist
+from tests.conftest import sqlite_blux
+
+
+def test_qualified_sqlite_names(tmp_path):
+    blux = sqlite_blux(tmp_path / 'catalog.db', catalog_ttl=60)
+    blux.sql(query='create table x (a integer)')
+    assert is_exist(table='main.x', Blux=blux)
+    assert not is_exist(table='main.y', Blux=blux)
+
+
+def test_cache_follows_ddl(tmp_path):
+    from pyblux.utils import is_exist_many
+    blux = sqlite_blux(tmp_path / 'catalog.db', catalog_ttl=3600)
+    assert is_exist_many(['a', 'main.b'], Blux=blux) == {'a': False, 'main.b': False}
+    blux.sql(query='create table a (x integer)')
+    assert is_exist(table='a', Blux=blux)
+    blux.sql(query='drop table a')
+    assert not is_exist(table='a', Blux=blux)
+
+
+def test_catalog_queries():
+    from pyblux.cache import is_catalog_query
+    assert is_catalog_query('select * from information_schema.tables')
+    assert is_catalog_query('select name from sqlite_master')
+    assert is_catalog_query('select * from pg_tables', 'postgres')
+    assert is_catalog_query('select * from user_tables t join all_tab_columns c on c.table_name = t.table_name', 'oracle')
+    # user tables named like catalogs
+    for table in ('user_sessions', 'all_orders', 'pg_import', 'sys_events'):
+        assert not is_catalog_query('select * from {}'.format(table), 'postgres')
+        assert not is_catalog_query('select * from {}'.format(table), 'oracle')
+    assert not is_catalog_query('select * from user_tables', 'postgres')
+
+
+def test_tables_named_like_catalogs_are_cached(tmp_path):
+    from pyblux.cache import ResultCache
+    blux = sqlite_blux(tmp_path / 'catalog.db', cache=ResultCache())
+    blux.sql(query='create table user_sessions (id integer)')
+    blux.sql(query='insert into user_sessions values (1)')
+    cache = blux.cache
+    blux.sql(query='select * from user_sessions')
+    assert blux.sql(query='select * from user_sessions')['id'].tolist() == [1]
+    assert cache.stats()['hits'] == 1
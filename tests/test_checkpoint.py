@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import pytest
+import pandas as pd
+from pyblux import AsyncBlux
+from pyblux.checkpoint import FileCheckpoint, TableCheckpoint, LoadError
+from pyblux.transform import Cast
+from pyblux.utils import create_table_text
+
+
+@pytest.fixture
+def flights(blux):
+    df = pd.DataFrame({'id': range(100), 'amount': [1.5] * 100})
+    blux.sql(query=create_table_text(df, 'flights', dialect='sqlite', primary_key=['id']))
+    return df
+
+
+def test_resume_after_failure(blux, flights, tmp_path):
+    state = FileCheckpoint(str(tmp_path / 'flights.state'))
+    # row 45 collides with a row already in the table: the groups before it stay committed
+    blux.sql(query='insert into flights values (45, 0.0)')
+    with pytest.raises(LoadError) as error:
+        blux.load(dataframe=flights, table='flights', chunksize=10, commit_every=2, checkpoint=state)
+    assert error.value.offset == 40
+    assert state.get('flights') == 40 and state.total('flights') == 100
+    blux.sql(query='delete from flights where id = 45')
+    assert blux.load(dataframe=flights, table='flights', chunksize=10, commit_every=2, checkpoint=state) == 60
+    assert blux.sql(query='select count(*) as n from flights').iloc[0, 0] == 100
+    assert state.get('flights') == 0
+
+
+def test_other_dataframe_does_not_resume(blux, flights):
+    store = TableCheckpoint(blux)
+    store.set('flights', 40, 100)
+    with pytest.raises(ValueError):
+        blux.load(dataframe=flights.head(50), table='flights', chunksize=10, checkpoint=store)
+    assert blux.sql(query='select count(*) as n from flights').iloc[0, 0] == 0
+    assert store.get('flights') == 40
+
+
+def test_async_blux_passes_load_options(blux, flights, tmp_path):
+    async def run():
+        async with AsyncBlux(engine=blux, dialect='sqlite') as ablux:
+            loaded = await ablux.sql(dataframe=flights, table='flights', chunksize=10, checkpoint=str(tmp_path / 'state'))
+            result = await ablux.sql(query='select * from flights', chunksize=30, transform=Cast({'id': 'float64'}))
+            chunks = [chunk async for chunk in await ablux.sql(query='select * from flights', chunksize=30, stream=True,
+                                                               transform=Cast({'id': 'float64'}))]
+            return loaded, result, chunks
+    loaded, result, chunks = asyncio.run(run())
+    assert loaded == 100
+    assert len(result) == 100 and result['id'].dtype == 'float64'
+    assert [len(c) for c in chunks] == [30, 30, 30, 10] and chunks[0]['id'].dtype == 'float64'
+
+
+def test_async_driver_rejects_checkpoint(tmp_path):
+    aiosqlite = pytest.importorskip('aiosqlite')
+
+    async def run():
+        async with AsyncBlux(engine=await aiosqlite.connect(str(tmp_path / 'a.db')), dialect='sqlite') as ablux:
+            await ablux.sql(dataframe=pd.DataFrame({'id': [1]}), table='t', checkpoint=str(tmp_path / 'state'))
+    with pytest.raises(ValueError):
+        asyncio.run(run())
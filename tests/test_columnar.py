@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import decimal
+import pyarrow as pa
+import pytest
+from pyblux.columnar import arrow_batch, conform_batch, widen_schema, widen_type
+
+
+@pytest.fixture
+def amounts(blux):
+    blux.sql(query='create table amounts (id integer, amount numeric, note text)')
+    blux.sql(query="insert into amounts values (1, 1, null), (2, 2, null), (3, 2.5, 'late'), (4, 3.75, 'late')")
+    return blux
+
+
+def test_widened_column_keeps_fractions(amounts):
+    table = amounts.sql(query='select * from amounts order by id', output='arrow', chunksize=2)
+    assert table.column('amount').to_pylist() == [1, 2, 2.5, 3.75]
+    assert table.schema.field('amount').type == pa.float64()
+    assert table.column('note').to_pylist() == [None, None, 'late', 'late']
+
+
+def test_streamed_batches_widen(amounts):
+    batches = list(amounts.iter_sql(query='select amount, note from amounts order by id', output='arrow', chunksize=2))
+    assert [b.schema.field('amount').type for b in batches] == [pa.int64(), pa.float64()]
+    assert [v for b in batches for v in b.column(0).to_pylist()] == [1, 2, 2.5, 3.75]
+    assert batches[1].schema.field('note').type == pa.string()
+
+
+def test_widen_type():
+    assert widen_type(pa.null(), pa.int64()) == pa.int64()
+    assert widen_type(pa.int64(), pa.float64()) == pa.float64()
+    assert widen_type(pa.int64(), pa.decimal128(38, 2)) == pa.decimal128(38, 2)
+    assert widen_type(pa.decimal128(38, 2), pa.decimal128(38, 4)) == pa.decimal128(38, 4)
+    assert widen_type(pa.date32(), pa.timestamp('us')) == pa.timestamp('us')
+    assert widen_type(pa.int64(), pa.string()) == pa.string()
+
+
+def test_decimals_stay_exact():
+    rows = [(decimal.Decimal('0.10'),), (decimal.Decimal('12345678901234567.89'),)]
+    batch = arrow_batch(rows, ['amount'], ['decimal'], [None])
+    assert batch.schema.field('amount').type == pa.decimal128(38, 2)
+    assert batch.column(0).to_pylist() == [decimal.Decimal('0.10'), decimal.Decimal('12345678901234567.89')]
+    # drivers returning floats for a declared NUMBER(p, 2)
+    assert arrow_batch([(1.1,), (None,)], ['amount'], ['decimal'], [pa.decimal128(38, 2)]).column(0).to_pylist() == [decimal.Decimal('1.10'), None]
+
+
+def test_conform_refuses_to_truncate():
+    batch = pa.RecordBatch.from_pydict({'amount': [2.5]})
+    with pytest.raises(pa.ArrowInvalid):
+        conform_batch(batch, pa.schema([pa.field('amount', pa.int64())]))
+    schema = widen_schema(pa.schema([pa.field('amount', pa.int64())]), batch.schema)
+    assert conform_batch(batch, schema).column(0).to_pylist() == [2.5]
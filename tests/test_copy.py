@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import csv, datetime, io, struct
+import pandas as pd
+from pyblux.loaders import CopyStream, copy_load, encode_binary, encode_text
+
+
+def frame():
+    return pd.DataFrame({'id': pd.array([1, None, 3], dtype='Int64'), 'amount': [1.5, None, -2.25], 'flag': [True, False, None],
+                         'name': ['a\tb', None, 'line\nbreak'],
+                         'departure': pd.to_datetime(['2021-07-01 12:30:00', None, '1999-12-31 23:59:59.000001'], format='ISO8601')})
+
+
+def decode_binary(data:bytes, formats:list):
+    # PGCOPY tuples: field count, then per field a length (-1 for NULL) and the value
+    rows, offset = [], 0
+    while offset < len(data):
+        (count,), offset = struct.unpack_from('!h', data, offset), offset + 2
+        row = []
+        for fmt in formats[:count]:
+            (length,), offset = struct.unpack_from('!i', data, offset), offset + 4
+            if length < 0:
+                row.append(None)
+                continue
+            raw, offset = data[offset:offset + length], offset + length
+            row.append(raw.decode('utf-8') if fmt == 'text' else struct.unpack('!' + fmt, raw)[0])
+        rows.append(row)
+    return rows
+
+
+def test_text_format_round_trips():
+    rows = list(csv.reader(io.StringIO(encode_text(frame()).decode('utf-8')), delimiter='\t'))
+    assert rows[0][:4] == ['1', '1.5', 'True', 'a\tb']
+    # NULL is an empty field
+    assert rows[1] == ['', '', 'False', '', '']
+    assert rows[2][3] == 'line\nbreak'
+
+
+def test_binary_format_follows_target_types():
+    df = frame()
+    rows = decode_binary(encode_binary(df, oids=[23, 701, 16, 25, 1114]), ['i', 'd', '?', 'text', 'q'])
+    assert [row[:4] for row in rows] == [[1, 1.5, True, 'a\tb'], [None, None, False, None], [3, -2.25, None, 'line\nbreak']]
+    # timestamps are microseconds since 2000-01-01
+    epoch = datetime.datetime(2000, 1, 1)
+    assert [epoch + datetime.timedelta(microseconds=row[4]) if row[4] is not None else None for row in rows] == \
+        [datetime.datetime(2021, 7, 1, 12, 30), None, datetime.datetime(1999, 12, 31, 23, 59, 59, 1)]
+
+
+def test_binary_dates_and_default_types():
+    df = pd.DataFrame({'day': pd.to_datetime(['2000-01-02', '1999-12-31']), 'n': [7, 8]})
+    assert decode_binary(encode_binary(df, oids=[1082, 20]), ['i', 'q']) == [[1, 7], [-1, 8]]
+    # without oids: int64 as bigint and datetime64 as timestamp
+    assert decode_binary(encode_binary(df), ['q', 'q']) == [[86400000000, 7], [-86400000000, 8]]
+
+
+def test_stream_encodes_chunk_by_chunk():
+    df = pd.DataFrame({'id': range(10)})
+    stream = CopyStream(df, chunksize=4, binary=True)
+    data = b''
+    while True:
+        part = stream.read(7)
+        if not part:
+            break
+        data += part
+    assert data == b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0) + encode_binary(df) + struct.pack('!h', -1)
+    assert stream.rows == 10 and stream.bytes == len(data)
+    assert CopyStream(df, chunksize=3).read() == encode_text(df)
+
+
+class _Cursor:
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.description = None
+
+    def execute(self, query):
+        self.description = [('id', 20), ('amount', self.conn.amount_oid)]
+
+    def copy_expert(self, sql, stream, size=8192):
+        self.conn.copies.append((sql, stream.read()))
+
+    def close(self):
+        pass
+
+
+class _Connection:
+
+    def __init__(self, amount_oid):
+        self.amount_oid = amount_oid
+        self.copies = []
+        self.committed = False
+
+    def cursor(self):
+        return _Cursor(self)
+
+    def commit(self):
+        self.committed = True
+
+
+def test_copy_load_formats():
+    df = pd.DataFrame({'id': [1, 2], 'amount': [1.5, 2.5]})
+    conn = _Connection(amount_oid=701)
+    assert copy_load(conn, df, 'flights', binary=True) == 2 and conn.committed
+    sql, data = conn.copies[0]
+    assert 'FORMAT binary' in sql and data.startswith(b'PGCOPY')
+    # numeric (1700) has no binary encoder: csv COPY instead
+    conn = _Connection(amount_oid=1700)
+    copy_load(conn, df, 'flights', binary=True)
+    assert 'FORMAT csv' in conn.copies[0][0] and conn.copies[0][1] == b'1\t1.5\n2\t2.5\n'
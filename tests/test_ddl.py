@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import datetime, decimal
+import pandas as pd
+from pyblux.ddl import column_type
+
+
+def decimals(*values):
+    return pd.Series([decimal.Decimal(v) for v in values] + [None], dtype=object)
+
+
+def test_decimal_precision_and_scale():
+    assert column_type(decimals('1.25', '-10.5', '123'), 'postgres') == 'decimal(5,2)'
+    assert column_type(decimals('0.001'), 'oracle') == 'number(4,3)'
+    # a positive exponent adds integer digits
+    assert column_type(decimals('1E+5'), 'postgres') == 'decimal(6,0)'
+    assert column_type(decimals('1.5E+3', '0.25'), 'postgres') == 'decimal(6,2)'
+    assert column_type(decimals('1.25'), 'postgres', wide=True) == 'decimal(38,2)'
+    assert column_type(decimals('1.25'), 'sqlite') == 'numeric'
+
+
+def test_integer_sizes():
+    assert column_type(pd.Series([1, 127]), 'postgres') == 'smallint'
+    assert column_type(pd.Series([1, 40000]), 'oracle') == 'number(10)'
+    assert column_type(pd.Series([1, 2 ** 40]), None) == 'bigint'
+    assert column_type(pd.Series([1, 2]), 'mysql', wide=True) == 'bigint'
+
+
+def test_other_types():
+    assert column_type(pd.Series([True, False]), 'mssql') == 'bit'
+    assert column_type(pd.Series([1.5]), 'oracle') == 'binary_double'
+    assert column_type(pd.Series(pd.to_datetime(['2021-07-01']).tz_localize('UTC')), 'postgres') == 'timestamptz'
+    assert column_type(pd.Series([datetime.date(2021, 7, 1)], dtype=object), 'teradata') == 'date'
+    assert column_type(pd.Series(['abc', None], dtype=object), 'teradata').startswith('varchar(')
+    assert column_type(pd.Series(['abc'], dtype=object), 'mssql', wide=True, key=True) == 'nvarchar(450)'
+    assert column_type(pd.Series(['x' * 5000], dtype=object), 'oracle') == 'clob'
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import os
+import pyarrow as pa
+import pyarrow.csv as pcsv
+import pyarrow.parquet as pq
+import pytest
+from pyblux.export import export
+
+
+@pytest.fixture
+def flights(blux):
+    # amount is int64 in the first batch of 2 rows and float64 after, note is NULL in the first batch
+    blux.sql(query='create table flights (id integer, origin text, amount numeric, note text)')
+    blux.sql(query="insert into flights values (1, 'ATL', 1, null), (2, 'JFK', 2, null), (3, 'ATL', 2.5, 'late'), (4, 'JFK', 3.75, null),"
+                   " (5, 'ATL', 4, 'late')")
+    return blux
+
+
+def _read_arrow(path):
+    with pa.OSFile(path) as handle:
+        return pa.ipc.open_file(handle).read_all()
+
+
+def _read_csv(path):
+    return pcsv.read_csv(path)
+
+
+@pytest.mark.parametrize('format, read', [('parquet', pq.read_table), ('csv', _read_csv), ('arrow', _read_arrow)])
+@pytest.mark.parametrize('workers', [0, 2])
+def test_formats_keep_widened_values(flights, tmp_path, format, read, workers):
+    # csv is gzip compressed by default
+    path = str(tmp_path / 'flights.{}'.format('csv.gz' if format == 'csv' else format))
+    stats = export(flights, 'select * from flights order by id', path, format=format, chunksize=2, workers=workers)
+    assert stats['rows'] == 5 and stats['files'] == [path]
+    table = read(path)
+    assert table.column('amount').to_pylist() == [1, 2, 2.5, 3.75, 4]
+    assert table.column('note').to_pylist()[2] == 'late'
+
+
+def test_max_rows_parts_share_a_schema(flights, tmp_path):
+    path = str(tmp_path / 'flights')
+    stats = export(flights, 'select * from flights order by id', path, chunksize=2, max_rows=2)
+    assert [os.path.basename(f) for f in stats['files']] == ['part-00000.parquet', 'part-00001.parquet', 'part-00002.parquet']
+    schemas = [pq.read_schema(f) for f in stats['files']]
+    assert all(schema.equals(schemas[0]) for schema in schemas)
+    assert schemas[0].field('amount').type == pa.float64()
+    assert pq.read_table(path).column('amount').to_pylist() == [1, 2, 2.5, 3.75, 4]
+
+
+def test_partition_by(flights, tmp_path):
+    path = str(tmp_path / 'flights')
+    stats = export(flights, 'select * from flights order by id', path, chunksize=2, partition_by='origin', workers=2)
+    assert sorted(os.path.relpath(f, path) for f in stats['files']) == [os.path.join('origin=ATL', 'part-00000.parquet'),
+                                                                          os.path.join('origin=JFK', 'part-00000.parquet')]
+    assert 'origin' not in pq.read_schema(stats['files'][0]).names
+    df = pq.read_table(path).to_pandas().sort_values('id')
+    assert df['amount'].tolist() == [1, 2, 2.5, 3.75, 4]
+    assert df['origin'].astype(str).tolist() == ['ATL', 'JFK', 'ATL', 'JFK', 'ATL']
+
+
+def test_empty_result_writes_no_file(flights, tmp_path):
+    stats = export(flights, 'select * from flights where id > 10', str(tmp_path / 'none.parquet'))
+    assert stats['rows'] == 0 and stats['files'] == []
+
+
+def test_closed_parts_are_rewritten(flights, tmp_path):
+    # amount only becomes fractional in the third batch, after part-00000 was closed
+    path = str(tmp_path / 'flights')
+    query = 'select id, case when id = 5 then 4.5 else id end as amount from flights order by id'
+    for format in ('parquet', 'arrow'):
+        stats = export(flights, query, os.path.join(path, format), format=format, chunksize=2, max_rows=2, workers=2)
+        assert len(stats['files']) == 3
+        tables = [pq.read_table(f) if format == 'parquet' else _read_arrow(f) for f in stats['files']]
+        assert all(table.schema.field('amount').type == pa.float64() for table in tables)
+        assert [v for table in tables for v in table.column('amount').to_pylist()] == [1, 2, 3, 4, 4.5]
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import os, sys, subprocess, importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# same budget as benchmarks/import_budget.py
+BUDGET_MS = 150
+
+
+def load_benchmark():
+    spec = importlib.util.spec_from_file_location('import_budget', os.path.join(ROOT, 'benchmarks', 'import_budget.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_import_stays_light():
+    result = load_benchmark().measure(['pyblux', 'pyblux.utils', 'pyblux.logger'], runs=3)
+    assert result['loaded'] == []
+    assert result['seconds'] * 1000 < BUDGET_MS
+
+
+def test_feature_modules_stay_light():
+    result = load_benchmark().measure(['pyblux', 'pyblux.transfer', 'pyblux.export', 'pyblux.checkpoint', 'pyblux.transform'], runs=1)
+    assert result['loaded'] == []
+
+
+def test_lazy_modules_are_thread_safe():
+    # the first pandas access happens on several threads at once
+    code = ("from concurrent.futures import ThreadPoolExecutor\n"
+            "from pyblux._lazy import pandas as pd\n"
+            "with ThreadPoolExecutor(max_workers=8) as pool:\n"
+            "    print(len(list(pool.map(lambda i: pd.DataFrame({'a': [i]}), range(16)))))\n")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=ROOT)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '16'
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import decimal
+import pytest
+import pandas as pd
+from pyblux.loaders import RejectedRowsError, get_loader, sqlite_load
+from pyblux.utils import create_table_text
+
+
+def frame(n:int):
+    return pd.DataFrame({'id': range(n), 'name': ['name {}'.format(i) if i % 3 else None for i in range(n)],
+                         'amount': [i / 4 for i in range(n)]})
+
+
+def test_sqlite_loader_registered():
+    assert get_loader('sqlite') is sqlite_load
+
+
+def test_load_in_chunks(blux):
+    df = frame(1000)
+    blux.sql(query=create_table_text(df, 'flights', dialect='sqlite'))
+    blux.sql(dataframe=df, table='flights', chunksize=64)
+    result = blux.sql(query='select * from flights order by id')
+    assert len(result) == 1000
+    assert result['name'].isna().sum() == df['name'].isna().sum()
+    assert result['amount'].sum() == pytest.approx(df['amount'].sum())
+
+
+def test_load_decimals(blux):
+    df = pd.DataFrame({'id': [1, 2], 'price': [decimal.Decimal('1.25'), decimal.Decimal('10.50')]})
+    blux.sql(query=create_table_text(df, 'prices', dialect='sqlite'))
+    blux.sql(dataframe=df, table='prices')
+    assert blux.sql(query='select sum(price) as total from prices').iloc[0, 0] == pytest.approx(11.75)
+
+
+def test_failed_load_is_rolled_back(blux):
+    blux.sql(query='create table keyed (id integer primary key, name text)')
+    df = pd.DataFrame({'id': [1, 2, 2], 'name': ['a', 'b', 'c']})
+    with pytest.raises(SystemExit):
+        blux.sql(dataframe=df, table='keyed', chunksize=1)
+    assert blux.sql(query='select count(*) as n from keyed').iloc[0, 0] == 0
+
+
+class _BatchError:
+
+    def __init__(self, offset, message):
+        self.offset = offset
+        self.message = message
+
+
+class _OracleCursor:
+    # cx_Oracle cursor rejecting the rows whose id is negative
+    def __init__(self, conn):
+        self.conn = conn
+        self.errors = []
+
+    def executemany(self, statement, rows, batcherrors=False):
+        assert batcherrors
+        self.errors = [_BatchError(i, 'ORA-02290: check constraint violated') for i, row in enumerate(rows) if row[0] < 0]
+        self.conn.rows += [row for row in rows if row[0] >= 0]
+
+    def getbatcherrors(self):
+        return self.errors
+
+    def close(self):
+        pass
+
+
+class _OracleConnection:
+
+    def __init__(self):
+        self.rows = []
+        self.committed = 0
+
+    def cursor(self):
+        return _OracleCursor(self)
+
+    def commit(self):
+        self.committed = len(self.rows)
+
+
+def test_oracle_rejected_rows_are_raised():
+    conn = _OracleConnection()
+    df = pd.DataFrame({'id': [1, -2, 3, 4, -5], 'name': list('abcde')})
+    with pytest.raises(RejectedRowsError) as error:
+        get_loader('oracle')(conn, df, 'flights', chunksize=2)
+    assert error.value.rejected == [(1, 'ORA-02290: check constraint violated'), (4, 'ORA-02290: check constraint violated')]
+    assert error.value.loaded == 3 and conn.committed == 3
+    assert get_loader('oracle')(conn, df.iloc[[0, 2]], 'flights') == 2
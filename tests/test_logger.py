@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import json, logging, threading
+import pytest
+from pyblux.logger import Logger, enabled, stop
+
+
+@pytest.fixture
+def logname(request):
+    name = 'pyblux-test-{}'.format(request.node.name)
+    yield name
+    stop(name)
+
+
+def test_records_are_written_by_the_listener(tmp_path, logname):
+    path = tmp_path / 'logs' / 'etl.log'
+    log = Logger(logname=logname, filename=str(path), console=False).logger()
+    callers = []
+    log.addFilter(lambda record: callers.append(record.threadName) or True)
+    log.info('loaded %s rows', 10)
+    log.debug('not written at INFO')
+    stop(logname)
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1 and lines[0].endswith('loaded 10 rows') and '-INFO-' in lines[0]
+    # the record is created on the calling thread, the file is written on the listener thread
+    assert callers == [threading.current_thread().name]
+
+
+def test_configured_once_per_name(tmp_path, logname):
+    first = Logger(logname=logname, filename=str(tmp_path / 'a.log'), console=False).logger()
+    second = Logger(logname=logname, filename=str(tmp_path / 'b.log'), console=False).logger()
+    assert first is second and len(first.handlers) == 1
+    first.warning('once')
+    stop(logname)
+    assert (tmp_path / 'a.log').read_text().count('once') == 1
+    assert not (tmp_path / 'b.log').exists()
+    assert first.handlers == []
+
+
+def test_json_records(tmp_path, logname):
+    path = tmp_path / 'etl.json'
+    Logger(logname=logname, filename=str(path), console=False, json=True).logger().error('failed', extra={'table': 'flights', 'rows': 3})
+    stop(logname)
+    record = json.loads(path.read_text())
+    assert record['level'] == 'ERROR' and record['message'] == 'failed'
+    assert record['table'] == 'flights' and record['rows'] == 3 and record['logger'] == logname
+
+
+def test_size_rotation(tmp_path, logname):
+    path = tmp_path / 'etl.log'
+    log = Logger(logname=logname, filename=str(path), console=False, rotate='size', max_bytes=200, backup_count=2).logger()
+    for i in range(20):
+        log.info('line %s', i)
+    stop(logname)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['etl.log', 'etl.log.1', 'etl.log.2']
+    assert path.read_text().splitlines()[-1].endswith('line 19')
+    with pytest.raises(ValueError):
+        Logger(logname=logname + '-bad', filename=str(path), rotate='hourly').logger()
+
+
+def test_enabled_follows_the_logger_level():
+    log = logging.getLogger('pyblux-test-enabled')
+    log.setLevel(logging.INFO)
+    assert enabled(print) and enabled(log.info)
+    assert not enabled(log.debug)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import gzip, email, socket
+from email import policy
+import pytest
+import pandas as pd
+from pyblux.mail import MailSender, html_table
+
+aiosmtpd = pytest.importorskip('aiosmtpd.controller')
+
+
+class Mailbox:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.endswith('@refused.example.com'):
+            return '550 no such user'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.mail_from, list(envelope.rcpt_tos), email.message_from_bytes(envelope.content, policy=policy.default)))
+        return '250 Message accepted for delivery'
+
+
+def free_port():
+    # the controller checks its server by connecting to the port, so it cannot be 0
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture
+def smtp():
+    mailbox = Mailbox()
+    mailbox.port = free_port()
+    controller = aiosmtpd.Controller(mailbox, hostname='127.0.0.1', port=mailbox.port)
+    controller.start()
+    yield mailbox
+    controller.stop()
+
+
+def test_html_table():
+    html = html_table(pd.DataFrame({'city': ['Zürich', '<b>'], 'amount': [1.234, None]}))
+    assert '<table class="pyblux">' in html
+    assert '1.23' in html and '&lt;b&gt;' in html
+
+
+def test_send_with_attachments(smtp, tmp_path):
+    report = tmp_path / 'report.csv'
+    report.write_text('id,amount\n' + ''.join('{},{}\n'.format(i, i / 2) for i in range(5000)))
+    df = pd.DataFrame({'id': [1, 2], 'amount': [1.5, 2.25]})
+    with MailSender('127.0.0.1', smtp.port, starttls=False) as mailer:
+        refused = mailer.send('etl@example.com', ['ops@example.com', 'nobody@refused.example.com'], 'Daily report', 'See attached',
+                              attachments=[str(report)], df=df)
+        mailer.send('etl@example.com', ['ops@example.com'], 'Compressed report', 'See attached', attachments=[str(report)], compress=True)
+    assert list(refused) == ['nobody@refused.example.com']
+    assert len(smtp.messages) == 2
+    sender, receivers, message = smtp.messages[0]
+    assert sender == 'etl@example.com' and receivers == ['ops@example.com']
+    assert message['Subject'] == 'Daily report'
+    body = message.get_body(('html',)).get_content()
+    assert 'See attached' in body and '2.25' in body
+    attachment = next(message.iter_attachments())
+    assert attachment.get_filename() == 'report.csv'
+    assert attachment.get_payload(decode=True) == report.read_bytes()
+    attachment = next(smtp.messages[1][2].iter_attachments())
+    assert attachment.get_filename() == 'report.csv.gz'
+    assert gzip.decompress(attachment.get_payload(decode=True)) == report.read_bytes()
+
+
+def test_submit_in_background(smtp):
+    with MailSender('127.0.0.1', smtp.port, starttls=False) as mailer:
+        futures = [mailer.submit('etl@example.com', ['ops@example.com'], 'Report {}'.format(i), 'body') for i in range(3)]
+        assert [f.result(timeout=10) for f in futures] == [{}, {}, {}]
+    assert sorted(m[2]['Subject'] for m in smtp.messages) == ['Report 0', 'Report 1', 'Report 2']
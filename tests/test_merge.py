@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+from pyblux.utils import merge_dataframe, is_exist
+
+
+def frame(n:int):
+    return pd.DataFrame({'id': range(n), 'name': ['name {}'.format(i) if i % 3 else None for i in range(n)],
+                         'amount': [i / 4 for i in range(n)]})
+
+
+def test_merge_creates_then_updates(blux):
+    assert merge_dataframe(frame(10), 'accounts', keys=['id'], Blux=blux) == 10
+    assert is_exist(table='accounts', Blux=blux)
+    # wider values than the ones the table was created from
+    changes = pd.DataFrame({'id': [5, 10**12], 'name': ['x' * 500, 'new'], 'amount': [99.0, 1.0]})
+    assert merge_dataframe(changes, 'accounts', keys=['id'], Blux=blux) == 2
+    result = blux.sql(query='select * from accounts order by id')
+    assert len(result) == 11
+    assert result.set_index('id').loc[5, 'name'] == 'x' * 500
+
+
+def test_merge_skips_unchanged(blux):
+    df = frame(20)
+    # the target has no hash column yet: it is added and every row counts as changed once
+    merge_dataframe(df, 'accounts', keys=['id'], Blux=blux)
+    assert merge_dataframe(df, 'accounts', keys=['id'], Blux=blux, skip_unchanged=True) == 20
+    assert merge_dataframe(df, 'accounts', keys=['id'], Blux=blux, skip_unchanged=True) == 0
+    df.loc[3, 'amount'] = -1.0
+    assert merge_dataframe(df, 'accounts', keys=['id'], Blux=blux, skip_unchanged=True) == 1
+    assert blux.sql(query='select amount from accounts where id = 3').iloc[0, 0] == -1.0
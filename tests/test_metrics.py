@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import socket
+import pytest
+import pandas as pd
+from pyblux import metrics
+from pyblux.utils import create_table_text
+
+
+@pytest.fixture
+def collector():
+    collector = metrics.register_hook(metrics.MemoryCollector())
+    yield collector
+    metrics.remove_hook(collector)
+
+
+def test_no_hook_is_a_noop():
+    assert not metrics.HOOKS
+    with metrics.operation('sql') as op:
+        op.rows = 10
+    assert op.rows == 0 and op.phases == {}
+
+
+def test_load_and_query_records(blux, collector):
+    df = pd.DataFrame({'id': range(300), 'amount': [1.5] * 300})
+    blux.sql(query=create_table_text(df, 'flights', dialect='sqlite'))
+    blux.sql(dataframe=df, table='flights', chunksize=100)
+    blux.sql(query='select * from flights')
+    load = collector.records('load')[-1]
+    assert load['labels'] == {'dialect': 'sqlite', 'table': 'flights'}
+    assert load['rows'] == 300
+    assert [c['rows'] for c in load['chunks']] == [100, 100, 100]
+    assert 'load' in load['phases'] and 'commit' in load['phases']
+    assert load['error'] is None
+    summary = collector.summary()
+    assert summary['sql']['count'] >= 2
+    assert summary['load']['rows'] == 300
+
+
+def test_failure_is_recorded(blux, collector):
+    with pytest.raises(SystemExit):
+        blux.sql(query='select * from missing_table')
+    assert collector.records('sql')[-1]['error']
+
+
+def test_statsd_exporter_sends_datagram():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(('127.0.0.1', 0))
+    server.settimeout(5)
+    exporter = metrics.register_hook(metrics.StatsdExporter(host='127.0.0.1', port=server.getsockname()[1], tags=True))
+    try:
+        with metrics.operation('load', dialect='postgres', table='stage.flights') as op:
+            with op.phase('commit'):
+                pass
+            op.chunk(10)
+            op.rows = 10
+        lines = server.recv(65535).decode('utf-8').splitlines()
+    finally:
+        metrics.remove_hook(exporter)
+        exporter.close()
+        server.close()
+    assert lines[0].startswith('pyblux.load.seconds:') and lines[0].endswith('|ms|#dialect:postgres,table:stage.flights')
+    assert any(line.startswith('pyblux.load.commit:') for line in lines)
+    assert 'pyblux.load.rows:10|c|#dialect:postgres,table:stage.flights' in lines
+
+
+def test_prometheus_exporter_renders_counters():
+    exporter = metrics.PrometheusExporter()
+    exporter(metrics.Operation('load', dialect='sqlite').finish())
+    text = exporter.render()
+    assert 'pyblux_operations_total{dialect="sqlite",operation="load"} 1' in text
+
+
+def test_statsd_packets_stay_under_the_packet_size():
+    exporter = metrics.StatsdExporter(tags=True, packet_size=512)
+    op = metrics.Operation('load', dialect='postgres', table='stage.flights')
+    for _ in range(5000):
+        op.chunk(100, seconds=0.01)
+    record = op.finish()
+    try:
+        packets = exporter.packets(record)
+    finally:
+        exporter.close()
+    assert len(packets) > 1 and all(len(packet) <= 512 for packet in packets)
+    assert b'\n'.join(packets).decode('utf-8').splitlines() == exporter.lines(record)
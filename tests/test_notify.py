@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+import json, socket, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from pyblux.notify import TeamsDispatcher, teams_card
+from pyblux.utils import send_teams_notification
+
+
+class Webhook:
+    """
+    Local Teams webhook stub: records the posted cards and answers with the queued status codes, then 200.
+    """
+
+    def __init__(self):
+        self.cards = []
+        self.statuses = []
+        webhook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                status = webhook.statuses.pop(0) if webhook.statuses else 200
+                if status < 400:
+                    webhook.cards.append(json.loads(body))
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:{}/webhook'.format(self.server.server_address[1])
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def webhook():
+    webhook = Webhook()
+    yield webhook
+    webhook.close()
+
+
+def test_card_layout():
+    card = teams_card(title='ETL flights', text='load', status='FAILLED', error_message='boom')
+    assert card['title'] == 'ETL flights'
+    assert card['sections'][0]['activityTitle'] == 'FAILLED'
+    assert card['sections'][1]['facts'] == [{'name': 'Error Message', 'value': '"boom"'}]
+
+
+def test_dispatcher_posts(webhook):
+    dispatcher = TeamsDispatcher(webhook.url, window=0, rate=0)
+    try:
+        assert dispatcher.notify(title='ETL flights', status='SUCCESS', message='done')
+        assert dispatcher.flush(timeout=10)
+    finally:
+        dispatcher.close()
+    assert dispatcher.stats['sent'] == 1
+    assert webhook.cards[0]['title'] == 'ETL flights'
+
+
+def test_dispatcher_coalesces(webhook):
+    dispatcher = TeamsDispatcher(webhook.url, window=60, rate=0)
+    try:
+        for i in range(5):
+            dispatcher.notify(title='ETL flights', status='FAILLED', error_message='error {}'.format(i % 2))
+        dispatcher.notify(title='ETL hotels', status='FAILLED', error_message='error')
+        assert dispatcher.flush(timeout=10)
+    finally:
+        dispatcher.close()
+    assert len(webhook.cards) == 2
+    assert dispatcher.stats['coalesced'] == 4
+    flights = [card for card in webhook.cards if card['title'] == 'ETL flights'][0]
+    assert flights['text'] == '(5 alerts)'
+    assert [fact['value'] for fact in flights['sections'][1]['facts']] == ['"error 0"', '"error 1"']
+
+
+def test_dispatcher_retries(webhook):
+    webhook.statuses = [503, 429]
+    dispatcher = TeamsDispatcher(webhook.url, window=0, rate=0, backoff=0.01)
+    try:
+        dispatcher.notify(title='ETL flights', status='SUCCESS')
+        assert dispatcher.flush(timeout=10)
+    finally:
+        dispatcher.close()
+    assert dispatcher.stats['retries'] == 2
+    assert dispatcher.stats['sent'] == 1
+
+
+def test_dispatcher_gives_up(webhook):
+    webhook.statuses = [400]
+    errors = []
+    dispatcher = TeamsDispatcher(webhook.url, window=0, rate=0, logger=errors.append)
+    try:
+        dispatcher.notify(title='ETL flights')
+        assert dispatcher.flush(timeout=10)
+    finally:
+        dispatcher.close()
+    assert dispatcher.stats['failed'] == 1 and dispatcher.stats['retries'] == 0
+    assert 'HTTP 400' in errors[0]
+
+
+def test_send_teams_notification(webhook):
+    response = send_teams_notification(webhook.url, title='ETL flights', status='SUCCESS', message='done')
+    assert response.status_code == 200
+    assert webhook.cards[0]['title'] == 'ETL flights'
+
+
+def test_send_teams_notification_times_out():
+    # accepts the connection and never answers
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    try:
+        with pytest.raises(requests.exceptions.Timeout):
+            send_teams_notification('http://127.0.0.1:{}/webhook'.format(server.getsockname()[1]), title='ETL flights', timeout=0.5)
+    finally:
+        server.close()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+from pyblux.params import bind, StatementCache
+
+
+class PostgresStub:
+    """
+    Records statements; PREPARE fails for parameters the server cannot type, as select $1 does on postgres.
+    """
+
+    def __init__(self):
+        self.log = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, values=None):
+        self.log.append(query)
+        if query.startswith('PREPARE') and 'where' not in query:
+            raise Exception('could not determine data type of parameter $1')
+
+    def rollback(self):
+        self.log.append('ROLLBACK')
+
+
+def test_bind_styles():
+    assert bind("select * from t where a = :a and b = ':a'", {'a': 1}, style='qmark') == ("select * from t where a = ? and b = ':a'", (1,))
+    assert bind("select * from t where a = :a", {'a': 1}, style='dollar') == ("select * from t where a = $1", (1,))
+    assert bind("select '%' from t where a = :a", {'a': 1}, style='pyformat') == ("select '%%' from t where a = %(a)s", {'a': 1})
+
+
+def test_postgres_prepares_once():
+    conn, cache = PostgresStub(), StatementCache()
+    for value in (1, 2):
+        cache.execute(conn, 'select * from t where a = :a', {'a': value}, 'postgres')
+    assert [q.split()[0] for q in conn.log] == ['PREPARE', 'EXECUTE', 'EXECUTE']
+
+
+def test_postgres_falls_back_to_client_binding():
+    conn, cache = PostgresStub(), StatementCache()
+    for value in (1, 2):
+        cache.execute(conn, 'select :a as x', {'a': value}, 'postgres')
+    assert conn.log == ['PREPARE pyblux_{} AS select $1 as x'.format(conn.log[0].split()[1][7:]), 'ROLLBACK',
+                        'select %(a)s as x', 'select %(a)s as x']
+
+
+def test_cursor_reused_per_connection():
+    cache = StatementCache()
+    conn = sqlite3.connect(':memory:')
+    first, cached = cache.execute(conn, 'select :a', {'a': 1}, 'sqlite')
+    assert cached and first.fetchall() == [(1,)]
+    second, _ = cache.execute(conn, 'select :a', {'a': 2}, 'sqlite')
+    assert second is first and second.fetchall() == [(2,)]
+    other = sqlite3.connect(':memory:')
+    assert cache.execute(other, 'select :a', {'a': 3}, 'sqlite')[0] is not first
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import datetime
+import pandas as pd
+from pyblux.partition import partition_queries, range_bounds
+
+
+def test_range_bounds():
+    assert range_bounds(0, 100, 4) == [0, 25, 50, 75, 100]
+    assert range_bounds(5, 5, 4) == [5, 5]
+
+
+def test_timestamp_literals():
+    bounds = [datetime.datetime(2021, 7, 1), datetime.datetime(2021, 7, 2)]
+    assert "TIMESTAMP '2021-07-01 00:00:00'" in partition_queries('select * from flights', 'departure', bounds=bounds, dialect='postgres')[0]
+    assert "departure >= '2021-07-01 00:00:00'" in partition_queries('select * from flights', 'departure', bounds=bounds, dialect='sqlite')[0]
+    assert "day < '2021-07-02'" in partition_queries('select * from flights', 'day', bounds=[datetime.date(2021, 7, 1), datetime.date(2021, 7, 2),
+                                                                                               datetime.date(2021, 7, 3)], dialect='sqlite')[0]
+
+
+def test_slices_cover_every_row_once(blux):
+    departures = pd.date_range('2021-07-01', periods=48, freq='h')
+    df = pd.DataFrame({'id': range(48), 'departure': departures.to_pydatetime(), 'origin': ['ATL', None] * 24})
+    blux.sql(query='create table flights (id integer, departure timestamp, origin text)')
+    blux.sql(dataframe=df, table='flights')
+    blux.sql(query='insert into flights values (48, null, null)')
+    bounds = [datetime.datetime(2021, 7, 1), datetime.datetime(2021, 7, 1, 12), datetime.datetime(2021, 7, 2, 23)]
+    for queries in (partition_queries('select * from flights', 'departure', bounds=bounds, dialect='sqlite'),
+                    partition_queries('select * from flights', 'id', partitions=3, scheme='hash', dialect='sqlite')):
+        ids = [i for query in queries for i in blux.sql(query=query)['id'].tolist()]
+        assert sorted(ids) == list(range(49))
+
+
+def test_read_partitioned_text_timestamps(blux):
+    # sqlite returns MIN/MAX of the timestamp column as text: the bounds are parsed before splitting the range
+    departures = pd.date_range('2021-07-01', periods=48, freq='h')
+    df = pd.DataFrame({'id': range(48), 'departure': departures.to_pydatetime()})
+    blux.sql(query='create table flights (id integer, departure timestamp)')
+    blux.sql(dataframe=df, table='flights')
+    blux.sql(query='insert into flights values (48, null)')
+    for column in ('departure', 'id'):
+        data = blux.sql_partitioned(query='select * from flights', column=column, partitions=4)
+        assert sorted(data['id'].tolist()) == list(range(49))
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from pyblux import Blux
+from pyblux.utils import dispose_engines, get_engine, get_pooled_engine
+
+
+@pytest.fixture(autouse=True)
+def engines():
+    yield
+    dispose_engines()
+
+
+def test_engines_are_shared_per_connection_string():
+    first = get_engine(None, None, None, None, None, 'sqlite', raw_engine=False, pool_size=2)
+    assert get_engine(None, None, None, None, None, 'sqlite', raw_engine=False, pool_size=2) is first
+    assert get_engine(None, None, None, None, None, 'sqlite', raw_engine=False, pool_size=3) is not first
+    dispose_engines()
+    assert get_engine(None, None, None, None, None, 'sqlite', raw_engine=False, pool_size=2) is not first
+
+
+def test_operations_borrow_and_return_sessions(tmp_path):
+    engine = get_pooled_engine('sqlite:///{}'.format(tmp_path / 'pooled.db'), dialect='sqlite', pool_size=2)
+    blux = Blux(engine=engine, dialect='sqlite')
+    blux.sql(query='create table flights (id integer)')
+    blux.sql(query='insert into flights values (1), (2), (3)')
+    with blux.connection() as conn:
+        assert engine.pool.checkedout() == 1
+        assert conn.cursor().execute('select count(*) from flights').fetchone() == (3,)
+    assert engine.pool.checkedout() == 0
+    # one Blux shared by threads, each operation on its own session
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        counts = list(pool.map(lambda _: len(blux.sql(query='select * from flights')), range(8)))
+    assert counts == [3] * 8
+    assert engine.pool.checkedout() == 0
+
+
+def test_failed_operation_returns_its_session(tmp_path):
+    engine = get_pooled_engine('sqlite:///{}'.format(tmp_path / 'pooled.db'), dialect='sqlite', pool_size=1)
+    blux = Blux(engine=engine, dialect='sqlite')
+    with pytest.raises(SystemExit):
+        blux.sql(query='select * from missing_table')
+    assert engine.pool.checkedout() == 0
+    assert blux.sql(query='select 1 as one')['one'].tolist() == [1]
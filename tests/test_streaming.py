@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import types
+import pandas as pd
+import pytest
+from pyblux import Blux
+
+
+@pytest.fixture
+def flights(blux):
+    blux.sql(query='create table flights (id integer, origin text)')
+    blux.sql(dataframe=pd.DataFrame({'id': range(25), 'origin': ['ATL', 'JFK', None, 'SFO', 'ORD'] * 5}), table='flights')
+    return blux
+
+
+def test_chunks_of_chunksize(flights):
+    chunks = list(flights.iter_sql(query='select * from flights order by id', chunksize=10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    streamed = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(streamed, flights.sql(query='select * from flights order by id'))
+
+
+def test_stream_is_lazy(flights):
+    chunks = flights.sql(query='select * from missing_table', stream=True)
+    assert isinstance(chunks, types.GeneratorType)
+    with pytest.raises(SystemExit):
+        next(chunks)
+
+
+def test_stream_params_and_empty_result(flights):
+    chunks = flights.sql(query='select id from flights where origin = :origin', params={'origin': 'ATL'}, stream=True, chunksize=2)
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert list(flights.iter_sql(query='select * from flights where id < 0')) == []
+
+
+class _Cursor:
+
+    def __init__(self, log, name=None):
+        self.log = log
+        self.log['name'] = name
+        self.rows = [(i,) for i in range(5)]
+        self.description = None
+
+    def execute(self, query):
+        self.log['itersize'] = getattr(self, 'itersize', None)
+        self.log['arraysize'] = getattr(self, 'arraysize', None)
+        self.description = [('ID', int, None, None, None, None, None)]
+
+    def fetchmany(self, size):
+        self.log.setdefault('fetches', []).append(size)
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+class _Connection:
+
+    def __init__(self):
+        self.log = {}
+
+    def cursor(self, name=None):
+        return _Cursor(self.log, name)
+
+    def commit(self):
+        self.log['committed'] = True
+
+    def rollback(self):
+        pass
+
+
+@pytest.mark.parametrize('dialect', ['postgres', 'oracle'])
+def test_rows_are_fetched_chunksize_at_a_time(dialect):
+    conn = _Connection()
+    blux = Blux(engine=conn, dialect=dialect)
+    assert [chunk['id'].tolist() for chunk in blux.iter_sql(query='select id from flights', chunksize=2)] == [[0, 1], [2, 3], [4]]
+    assert conn.log['fetches'] == [2, 2, 2, 2] and conn.log['committed']
+    if dialect == 'postgres':
+        # server-side cursor: rows stay on the server until fetched
+        assert conn.log['name'].startswith('pyblux_') and conn.log['itersize'] == 2
+    else:
+        assert conn.log['name'] is None and conn.log['arraysize'] == 2
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import pytest
+import pandas as pd
+from pyblux.transfer import transfer
+from pyblux.utils import is_exist
+
+
+@pytest.fixture
+def source(blux):
+    blux.sql(query='create table flights (id integer, origin text, amount real)')
+    blux.sql(dataframe=pd.DataFrame({'id': range(1000), 'origin': ['ATL', 'JFK', None, 'LAX'] * 250,
+                                     'amount': [i / 8 for i in range(1000)]}), table='flights')
+    return blux
+
+
+def test_transfer_creates_and_loads(source, target):
+    stats = transfer(source, 'select * from flights', target, 'flights_copy', chunksize=128, queue_size=2)
+    assert stats['rows'] == 1000 and stats['chunks'] == 8
+    copied = target.sql(query='select * from flights_copy order by id')
+    expected = source.sql(query='select * from flights order by id')
+    pd.testing.assert_frame_equal(copied, expected)
+
+
+def test_later_chunks_may_be_wider(source, target):
+    source.sql(query="insert into flights values (10000000000, '{}', 1.0)".format('x' * 400))
+    stats = transfer(source, 'select * from flights order by id', target, 'flights_copy', chunksize=100)
+    assert stats['rows'] == 1001
+    assert target.sql(query='select max(length(origin)) as n from flights_copy').iloc[0, 0] == 400
+
+
+def test_transfer_with_ddl_and_replace(source, target):
+    ddl = 'create table flights_copy (id integer, origin varchar(3), amount real)'
+    transfer(source, 'select * from flights where id < 10', target, 'flights_copy', ddl=ddl)
+    transfer(source, 'select * from flights where id < 20', target, 'flights_copy', ddl=ddl, replace=True)
+    assert target.sql(query='select count(*) as n from flights_copy').iloc[0, 0] == 20
+
+
+def test_transfer_without_create(source, target):
+    with pytest.raises(SystemExit):
+        transfer(source, 'select * from flights', target, 'flights_copy', create=False)
+    assert not is_exist(table='flights_copy', Blux=target)
+
+
+def test_extract_error_stops_transfer(source, target):
+    with pytest.raises(SystemExit):
+        transfer(source, 'select * from no_such_table', target, 'flights_copy')
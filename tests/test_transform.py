@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import pytest
+import pandas as pd
+from pyblux.transform import Ascii, Cast, Clean, HashColumns, Pipeline, transform_chunks
+from pyblux.utils import create_table_text
+
+pytest.importorskip('unidecode')
+
+
+def test_ascii_keeps_missing_values():
+    df = pd.DataFrame({'city': ['Zürich', None, 'Zürich', 'Café'], 'id': [1, 2, 3, 4]})
+    result = Ascii(['city'])(df)
+    assert result['city'].tolist()[0] == 'Zurich' and result['city'].tolist()[3] == 'Cafe'
+    assert result['city'].isna().tolist() == [False, True, False, False]
+    assert df['city'][0] == 'Zürich'
+
+
+def test_pipeline():
+    df = pd.DataFrame({'origin': [' atl ', '', 'JFK'], 'amount': ['1.5', '2', '3']})
+    result = Pipeline([Clean(['origin'], lower=True), Cast({'amount': 'float64'}), HashColumns(name='row_hash')])(df)
+    assert result['origin'].tolist()[0] == 'atl' and pd.isna(result['origin'][1])
+    assert result['amount'].dtype == 'float64'
+    assert result['row_hash'].dtype == 'int64'
+
+
+def test_chunks_keep_order_on_processes():
+    chunks = [pd.DataFrame({'amount': [str(i)] * 10}) for i in range(6)]
+    result = list(transform_chunks(chunks, Cast({'amount': 'int64'}), workers=2, max_in_flight=2))
+    assert [int(chunk['amount'][0]) for chunk in result] == list(range(6))
+
+
+def test_transformed_load_and_query(blux):
+    df = pd.DataFrame({'id': range(100), 'city': ['Zürich', 'Köln'] * 50})
+    blux.sql(query=create_table_text(df, 'cities', dialect='sqlite'))
+    blux.sql(dataframe=df, table='cities', chunksize=10, commit_every=2, transform=Ascii(['city']))
+    result = blux.sql(query='select * from cities', chunksize=30, transform=[Cast({'id': 'float64'})])
+    assert len(result) == 100 and result['id'].dtype == 'float64'
+    assert sorted(set(result['city'])) == ['Koln', 'Zurich']